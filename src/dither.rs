@@ -0,0 +1,142 @@
+use rayon::prelude::*;
+
+/// (columns ahead, rows down, weight) to spread error to,
+/// with columns reversed on right to left rows
+pub type Kernel = [(isize, usize, f64)];
+
+pub const FLOYD_STEINBERG: [(isize, usize, f64); 4] = [
+    (1, 0, 7.0 / 16.0),
+    (-1, 1, 3.0 / 16.0),
+    (0, 1, 5.0 / 16.0),
+    (1, 1, 1.0 / 16.0),
+];
+
+/// only 6/8 of the error is spread, so large areas of error wash out
+pub const ATKINSON: [(isize, usize, f64); 6] = [
+    (1, 0, 1.0 / 8.0),
+    (2, 0, 1.0 / 8.0),
+    (-1, 1, 1.0 / 8.0),
+    (0, 1, 1.0 / 8.0),
+    (1, 1, 1.0 / 8.0),
+    (0, 2, 1.0 / 8.0),
+];
+
+/// index of the palette color closest to an rgb value
+pub fn nearest(palette: &[u8], red: f64, green: f64, blue: f64) -> usize {
+    let mut nearest_index = 0;
+    let mut nearest_distance = f64::MAX;
+
+    for (index, color) in palette.chunks(3).enumerate() {
+        let distance = (red - color[0] as f64).powi(2)
+            + (green - color[1] as f64).powi(2)
+            + (blue - color[2] as f64).powi(2);
+
+        if distance < nearest_distance {
+            nearest_index = index;
+            nearest_distance = distance;
+        }
+    }
+
+    nearest_index
+}
+
+/// bayer threshold matrix of a power of 2 size, scaled to (-.5, .5)
+pub fn bayer_matrix(size: usize) -> Vec<f64> {
+    let mut matrix = vec![0usize];
+    let mut matrix_size = 1;
+
+    while matrix_size < size {
+        let next_size = matrix_size * 2;
+        let mut next_matrix = vec![0usize; next_size * next_size];
+
+        for y in 0..matrix_size {
+            for x in 0..matrix_size {
+                let value = matrix[y * matrix_size + x] * 4;
+
+                next_matrix[y * next_size + x] = value;
+                next_matrix[y * next_size + x + matrix_size] = value + 2;
+                next_matrix[(y + matrix_size) * next_size + x] = value + 3;
+                next_matrix[(y + matrix_size) * next_size + x + matrix_size] = value + 1;
+            }
+        }
+
+        matrix = next_matrix;
+        matrix_size = next_size;
+    }
+
+    let cells = (matrix_size * matrix_size) as f64;
+
+    matrix
+        .iter()
+        .map(|&value| (value as f64 + 0.5) / cells - 0.5)
+        .collect()
+}
+
+/// ordered dither a (height, width, 3) frame, with rows in parallel
+///
+/// each pixel is offset by its cell of the threshold matrix times spread
+/// before snapping to the nearest palette color
+pub fn ordered(frame: &mut [u8], width: usize, palette: &[u8], matrix_size: usize, spread: f64) {
+    let matrix = bayer_matrix(matrix_size);
+    let matrix_size = (matrix.len() as f64).sqrt() as usize;
+
+    frame
+        .par_chunks_mut(width * 3)
+        .enumerate()
+        .for_each(|(y, row)| {
+            for (x, pixel) in row.chunks_mut(3).enumerate() {
+                let offset = matrix[(y % matrix_size) * matrix_size + x % matrix_size] * spread;
+
+                let index = nearest(
+                    palette,
+                    pixel[0] as f64 + offset,
+                    pixel[1] as f64 + offset,
+                    pixel[2] as f64 + offset,
+                ) * 3;
+
+                pixel.copy_from_slice(&palette[index..index + 3]);
+            }
+        });
+}
+
+/// error diffusion dither a (height, width, 3) frame
+///
+/// rows are scanned in alternating directions (serpentine),
+/// so errors don't pile up in one direction
+pub fn diffuse(frame: &mut [u8], width: usize, height: usize, palette: &[u8], kernel: &Kernel, level: f64) {
+    let mut errors = vec![0f64; width * height * 3];
+
+    for y in 0..height {
+        let reverse = y % 2 == 1;
+
+        for step in 0..width {
+            let x = if reverse { width - 1 - step } else { step };
+            let pixel_index = (y * width + x) * 3;
+
+            let mut value = [0f64; 3];
+            for channel in 0..3 {
+                value[channel] = (frame[pixel_index + channel] as f64 + errors[pixel_index + channel])
+                    .max(0.0)
+                    .min(255.0);
+            }
+
+            let color_index = nearest(palette, value[0], value[1], value[2]) * 3;
+
+            for channel in 0..3 {
+                let color = palette[color_index + channel];
+                let error = (value[channel] - color as f64) * level;
+
+                for &(columns, rows, weight) in kernel {
+                    let next_x = if reverse { x as isize - columns } else { x as isize + columns };
+                    let next_y = y + rows;
+
+                    if next_x >= 0 && (next_x as usize) < width && next_y < height {
+                        errors[(next_y * width + next_x as usize) * 3 + channel] += error * weight;
+                    }
+                }
+
+                frame[pixel_index + channel] = color;
+            }
+        }
+    }
+}
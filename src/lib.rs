@@ -1,2 +1,6 @@
+pub mod dither;
+pub mod magnify;
+pub mod palette;
 pub mod pymodule;
-pub mod quantize;
\ No newline at end of file
+pub mod quantize;
+pub mod threshold;
\ No newline at end of file
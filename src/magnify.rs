@@ -0,0 +1,71 @@
+use image::RgbaImage;
+use rayon::prelude::*;
+
+/// rows of neighbors that mmpx reads on either side of a pixel
+const HALO: usize = 2;
+
+/// fewest rows to magnify in one tile
+const MIN_TILE_ROWS: usize = 16;
+
+/// magnify a (rows, columns, 3) rgb image 2x with mmpx, in parallel tiles of rows
+///
+/// each tile is magnified with HALO extra rows on either side,
+/// so that its edges see the same neighbors as they would in the whole image,
+/// then the magnified halo rows are dropped
+pub fn magnify_rgb(pixels: &[u8], rows: usize, columns: usize) -> Vec<u8> {
+    let tile_rows = (rows / (rayon::current_num_threads() * 4)).max(MIN_TILE_ROWS);
+    let magnified_row_size = columns * 2 * 3;
+
+    let mut magnified = vec![0u8; rows * 2 * magnified_row_size];
+
+    magnified
+        .par_chunks_mut(tile_rows * 2 * magnified_row_size)
+        .enumerate()
+        .for_each(|(tile, magnified_tile)| {
+            let start = tile * tile_rows;
+            let end = (start + tile_rows).min(rows);
+
+            let halo_start = start.saturating_sub(HALO);
+            let halo_end = (end + HALO).min(rows);
+
+            // mmpx works on rgba
+            let mut rgba = Vec::with_capacity((halo_end - halo_start) * columns * 4);
+            for pixel in pixels[halo_start * columns * 3..halo_end * columns * 3].chunks(3) {
+                rgba.extend_from_slice(&[pixel[0], pixel[1], pixel[2], 255]);
+            }
+
+            let image = RgbaImage::from_raw(
+                columns as u32, (halo_end - halo_start) as u32, rgba,
+            ).unwrap();
+
+            let magnified_halo_tile = mmpx::magnify(&image);
+
+            let skip = (start - halo_start) * 2 * columns * 2 * 4;
+            let raw = &magnified_halo_tile.as_raw()[skip..];
+
+            for (pixel, magnified_pixel) in magnified_tile.chunks_mut(3).zip(raw.chunks(4)) {
+                pixel.copy_from_slice(&magnified_pixel[..3]);
+            }
+        });
+
+    magnified
+}
+
+/// magnify a (rows, columns, 3) rgb image by a power of 2 (at least 2) with repeated 2x passes
+///
+/// returns the magnified pixels, rows, and columns
+pub fn magnify(pixels: &[u8], rows: usize, columns: usize, factor: usize) -> (Vec<u8>, usize, usize) {
+    let mut magnified = magnify_rgb(pixels, rows, columns);
+    let mut rows = rows * 2;
+    let mut columns = columns * 2;
+    let mut scale = 2;
+
+    while scale < factor {
+        magnified = magnify_rgb(&magnified, rows, columns);
+        rows *= 2;
+        columns *= 2;
+        scale *= 2;
+    }
+
+    (magnified, rows, columns)
+}
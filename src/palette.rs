@@ -0,0 +1,208 @@
+use rayon::prelude::*;
+
+/// bins per channel in the color histogram (5 bits)
+const BINS: usize = 32;
+
+/// a histogram bin with pixels in it
+#[derive(Clone, Copy)]
+struct Entry {
+    count: f64,
+    color: [f64; 3],
+}
+
+/// count pixels and sum their colors in a 5 bit per channel histogram
+fn histogram(pixels: &[u8]) -> Vec<Entry> {
+    let bin_count = BINS * BINS * BINS;
+
+    let (counts, sums) = pixels
+        .par_chunks(3 * 4096)
+        .fold(
+            || (vec![0u64; bin_count], vec![[0u64; 3]; bin_count]),
+            |(mut counts, mut sums), chunk| {
+                for pixel in chunk.chunks(3) {
+                    let bin = ((pixel[0] as usize >> 3) << 10)
+                        | ((pixel[1] as usize >> 3) << 5)
+                        | (pixel[2] as usize >> 3);
+
+                    counts[bin] += 1;
+                    sums[bin][0] += pixel[0] as u64;
+                    sums[bin][1] += pixel[1] as u64;
+                    sums[bin][2] += pixel[2] as u64;
+                }
+
+                (counts, sums)
+            },
+        )
+        .reduce(
+            || (vec![0u64; bin_count], vec![[0u64; 3]; bin_count]),
+            |(mut counts, mut sums), (other_counts, other_sums)| {
+                for bin in 0..bin_count {
+                    counts[bin] += other_counts[bin];
+                    for channel in 0..3 {
+                        sums[bin][channel] += other_sums[bin][channel];
+                    }
+                }
+
+                (counts, sums)
+            },
+        );
+
+    (0..bin_count)
+        .filter(|&bin| counts[bin] > 0)
+        .map(|bin| {
+            let count = counts[bin] as f64;
+
+            Entry {
+                count,
+                color: [
+                    sums[bin][0] as f64 / count,
+                    sums[bin][1] as f64 / count,
+                    sums[bin][2] as f64 / count,
+                ],
+            }
+        })
+        .collect()
+}
+
+/// mean color of some entries, weighted by their counts
+fn mean(entries: &[Entry]) -> [f64; 3] {
+    let mut total = 0.0;
+    let mut sums = [0.0; 3];
+
+    for entry in entries {
+        total += entry.count;
+        for channel in 0..3 {
+            sums[channel] += entry.color[channel] * entry.count;
+        }
+    }
+
+    [sums[0] / total, sums[1] / total, sums[2] / total]
+}
+
+/// (largest sum of squared error of a channel, that channel) of some entries
+fn widest_channel(entries: &[Entry]) -> (f64, usize) {
+    let color = mean(entries);
+    let mut widest = (-1.0, 0);
+
+    for channel in 0..3 {
+        let error: f64 = entries
+            .iter()
+            .map(|entry| (entry.color[channel] - color[channel]).powi(2) * entry.count)
+            .sum();
+
+        if error > widest.0 {
+            widest = (error, channel);
+        }
+    }
+
+    widest
+}
+
+/// index of the palette color closest to a color
+fn nearest(palette: &[[f64; 3]], color: &[f64; 3]) -> usize {
+    let mut nearest_index = 0;
+    let mut nearest_distance = f64::MAX;
+
+    for (index, palette_color) in palette.iter().enumerate() {
+        let distance = (color[0] - palette_color[0]).powi(2)
+            + (color[1] - palette_color[1]).powi(2)
+            + (color[2] - palette_color[2]).powi(2);
+
+        if distance < nearest_distance {
+            nearest_index = index;
+            nearest_distance = distance;
+        }
+    }
+
+    nearest_index
+}
+
+/// extract a palette from (n, 3) pixels
+///
+/// a 5 bit per channel histogram of the pixels is split with median cut
+/// (splitting the box with the most error at its mean),
+/// then the colors are refined with k-means on the histogram
+pub fn extract(pixels: &[u8], palette_size: usize, iterations: usize) -> Vec<u8> {
+    let entries = histogram(pixels);
+
+    if entries.is_empty() || palette_size == 0 {
+        return Vec::new();
+    }
+
+    // median cut
+    let mut boxes = vec![entries.clone()];
+
+    while boxes.len() < palette_size {
+        // split the box with the most error in a channel
+        let mut split = None;
+        let mut widest_error = -1.0;
+
+        for (index, entries) in boxes.iter().enumerate() {
+            if entries.len() < 2 {
+                continue;
+            }
+
+            let (error, channel) = widest_channel(entries);
+
+            if error > widest_error {
+                widest_error = error;
+                split = Some((index, channel));
+            }
+        }
+
+        let (index, channel) = match split {
+            Some(split) => split,
+            None => break,
+        };
+
+        let mut entries = boxes.remove(index);
+        entries.sort_by(|a, b| a.color[channel].partial_cmp(&b.color[channel]).unwrap());
+
+        // split at the mean, which separates clusters better than the median
+        let channel_mean = mean(&entries)[channel];
+        let position = entries
+            .iter()
+            .position(|entry| entry.color[channel] > channel_mean)
+            .unwrap_or(entries.len() - 1);
+
+        let position = position.max(1).min(entries.len() - 1);
+
+        let upper = entries.split_off(position);
+        boxes.insert(index, upper);
+        boxes.insert(index, entries);
+    }
+
+    let mut palette: Vec<[f64; 3]> = boxes.iter().map(|entries| mean(entries)).collect();
+
+    // k-means
+    for _ in 0..iterations {
+        let assignments: Vec<usize> = entries
+            .par_iter()
+            .map(|entry| nearest(&palette, &entry.color))
+            .collect();
+
+        let mut totals = vec![0.0; palette.len()];
+        let mut sums = vec![[0.0; 3]; palette.len()];
+
+        for (entry, &assignment) in entries.iter().zip(assignments.iter()) {
+            totals[assignment] += entry.count;
+            for channel in 0..3 {
+                sums[assignment][channel] += entry.color[channel] * entry.count;
+            }
+        }
+
+        // colors without any entries are left where they are
+        for (index, color) in palette.iter_mut().enumerate() {
+            if totals[index] > 0.0 {
+                for channel in 0..3 {
+                    color[channel] = sums[index][channel] / totals[index];
+                }
+            }
+        }
+    }
+
+    palette
+        .iter()
+        .flat_map(|color| color.iter().map(|&value| (value + 0.5).floor() as u8).collect::<Vec<u8>>())
+        .collect()
+}
@@ -9,5 +9,7 @@ pierogis.restaurant -> feedback/terminal interface handler
 
 pierogis.course -> animation wrapper
 
+pierogis.probe -> media headers and frame index
+
 pierogis.algorithms -> Rust algorithm implementations via pyo3
 """
@@ -1,11 +1,12 @@
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
-import imageio
 import imageio_ffmpeg
 import numpy as np
 
+from .gif import save_gif
 from .ingredients.dish import Dish
 
 
@@ -44,13 +45,17 @@ class Course:
             path: str,
             optimize: bool = True,
             duration: float = None,
-            fps: float = None
+            fps: float = None,
+            segments: int = 1,
+            align: int = 1
     ) -> None:
         """
         :param path: path to save output
-        :param optimize: whether or not to try to optimize a gif output with gifsicle
+        :param optimize: whether or not to crop gif frames to what changes from the frame before
         :param duration: ms duration between frames (gets converted into fps)
         :param fps: frames per second for image
+        :param segments: number of video segments to encode at the same time
+        :param align: segment boundaries fall on multiples of this many frames
         """
         if len(self.dishes) > 1:
             if duration is not None:
@@ -65,56 +70,105 @@ class Course:
             ext = os.path.splitext(path)[1]
 
             if ext == ".gif":
-                # 30/60 fps is impossible for gif because maximum decimal precision is 2
-                # (duration .03 rounds to 25fps)
-                writer = imageio.get_writer(
+                # palette frames are written as is, without quantizing again
+                # 30/60 fps is impossible for gif because delays are in hundredths of a second
+                # (duration .03 rounds to 33fps)
+                save_gif(
                     path,
-                    fps=fps
+                    [dish.pierogi.image for dish in self.dishes],
+                    duration=1000 / fps,
+                    optimize=optimize
                 )
 
-                for dish in self.dishes:
-                    writer.append_data(np.asarray(dish.pierogi.image))
+            elif segments > 1:
+                self._save_segments(path, fps, segments, align)
 
             else:
-                if ext == ".webm":
-                    writer = imageio_ffmpeg.write_frames(
-                        path,
-                        size=self.dishes[0].pierogi.pixels.shape[:2],
-                        fps=fps,
-                        codec='libvpx-vp9',
-                        bitrate='0',
-                        output_params=['-crf', '30'],
-                        input_params=['-thread_queue_size', '128'],
-                    )
-                else:
-                    writer = imageio_ffmpeg.write_frames(
-                        path,
-                        size=self.dishes[0].pierogi.pixels.shape[:2],
-                        fps=fps
-                    )
+                self._write_video(path, self.dishes, fps)
+
+        elif len(self.dishes) == 1:
+            self.dishes[0].pierogi.save(path, optimize=optimize)
 
-                writer.send(None)
+        else:
+            raise Exception("Dish has no pierogis")
 
-                for dish in self.dishes:
-                    writer.send(np.asarray(dish.pierogi.image))
+    @staticmethod
+    def _write_video(path: str, dishes: List[Dish], fps: float) -> None:
+        """
+        encode dishes as a video with an ffmpeg process
+        """
+        if os.path.splitext(path)[1] == ".webm":
+            writer = imageio_ffmpeg.write_frames(
+                path,
+                size=dishes[0].pierogi.pixels.shape[:2],
+                fps=fps,
+                codec='libvpx-vp9',
+                bitrate='0',
+                output_params=['-crf', '30'],
+                input_params=['-thread_queue_size', '128'],
+            )
+        else:
+            writer = imageio_ffmpeg.write_frames(
+                path,
+                size=dishes[0].pierogi.pixels.shape[:2],
+                fps=fps
+            )
 
-            writer.close()
+        writer.send(None)
 
-            if optimize and ext == '.gif':
-                try:
-                    return_code = subprocess.call(
-                        ['gifsicle', '--optimize', path, '--output', path],
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL
-                    )
-                except:
-                    return_code = 1
+        for dish in dishes:
+            writer.send(np.asarray(dish.pierogi.image))
 
-                if return_code != 0:
-                    print("install gifsicle and ensure it's on PATH to optimize gif")
+        writer.close()
 
-        elif len(self.dishes) == 1:
-            self.dishes[0].pierogi.save(path, optimize=optimize)
+    def _save_segments(self, path: str, fps: float, segments: int, align: int) -> None:
+        """
+        encode contiguous segments of the dishes with concurrent ffmpeg processes,
+        then join the segments without reencoding using the concat demuxer
 
-        else:
-            raise Exception("Dish has no pierogis")
+        threads only feed frames, so the encoding is spread over the ffmpeg processes
+        """
+        frames = len(self.dishes)
+
+        # split whole blocks of align frames as evenly as possible
+        blocks = -(-frames // align)
+        segments = min(segments, blocks)
+        boundaries = [
+            min(round(blocks * i / segments) * align, frames)
+            for i in range(segments + 1)
+        ]
+
+        base, ext = os.path.splitext(path)
+        segment_paths = ['{}.segment-{}{}'.format(base, i, ext) for i in range(segments)]
+        list_path = base + '.segments.txt'
+
+        try:
+            with ThreadPoolExecutor(segments) as executor:
+                futures = [
+                    executor.submit(self._write_video, segment_path, self.dishes[start:end], fps)
+                    for segment_path, start, end
+                    in zip(segment_paths, boundaries[:-1], boundaries[1:])
+                ]
+
+                for future in futures:
+                    future.result()
+
+            with open(list_path, 'w') as list_file:
+                for segment_path in segment_paths:
+                    # the concat demuxer reads paths relative to the list's directory
+                    segment_path = os.path.abspath(segment_path)
+                    list_file.write("file '{}'\n".format(segment_path.replace("'", "'\\''")))
+
+            subprocess.run(
+                [
+                    imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-v', 'error',
+                    '-f', 'concat', '-safe', '0', '-i', list_path,
+                    '-c', 'copy', path
+                ],
+                check=True
+            )
+
+        finally:
+            for segment_path in segment_paths + [list_path]:
+                if os.path.isfile(segment_path):
+                    os.remove(segment_path)
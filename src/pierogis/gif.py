@@ -0,0 +1,224 @@
+"""
+write animated gifs with frames cropped and made transparent where they don't change
+"""
+import io
+import struct
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+DISPOSAL_NONE = 1
+"""leave each frame in place, so the next one only has to draw what changes"""
+
+
+def palette_frame(image: Image.Image) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (height, width) palette indices and (colors, 3) palette of an image
+
+    images that aren't already palette images are quantized to 255 colors,
+    leaving an index free for transparency
+
+    :param image: frame to index
+    """
+    if image.mode != 'P':
+        image = image.convert('RGB').convert('P', palette=Image.ADAPTIVE, colors=255)
+
+    indices = np.asarray(image)
+    palette = np.asarray(image.getpalette(), dtype=np.dtype('uint8')).reshape(-1, 3)
+
+    # the palette can be padded past the colors that are used
+    return indices, palette[:max(int(indices.max()) + 1, 1)]
+
+
+def transparent_index(indices: np.ndarray, palette: np.ndarray) -> Optional[int]:
+    """
+    a palette index that no pixel uses, or None if every index is used
+
+    :param indices: palette indices of a frame
+    :param palette: palette of the frame
+    """
+    if len(palette) < 256:
+        return len(palette)
+
+    unused = np.flatnonzero(np.bincount(indices.ravel(), minlength=256) == 0)
+
+    if len(unused) == 0:
+        return None
+
+    return int(unused[0])
+
+
+def delta(
+        previous: Optional[np.ndarray],
+        indices: np.ndarray,
+        palette: np.ndarray,
+        transparency: Optional[int]
+) -> Tuple[Optional[Tuple[int, int, int, int]], np.ndarray]:
+    """
+    box of a frame that changed from the previous frame,
+    and the indices in that box with unchanged pixels made transparent
+
+    :param previous: (height, width, 3) colors showing before this frame, None for the first frame
+    :param indices: (height, width) palette indices of this frame
+    :param palette: palette of this frame
+    :param transparency: index to use for unchanged pixels, None to leave them
+
+    :return: ((left, top, right, bottom) or None if nothing changed, cropped indices)
+    """
+    if previous is None:
+        return (0, 0, indices.shape[1], indices.shape[0]), indices
+
+    changed = np.any(palette[indices] != previous, axis=-1)
+
+    rows = np.flatnonzero(changed.any(axis=1))
+
+    if len(rows) == 0:
+        return None, indices[:0, :0]
+
+    columns = np.flatnonzero(changed.any(axis=0))
+
+    top, bottom = rows[0], rows[-1] + 1
+    left, right = columns[0], columns[-1] + 1
+
+    cropped = indices[top:bottom, left:right]
+
+    if transparency is not None:
+        cropped = np.where(changed[top:bottom, left:right], cropped, transparency).astype(np.dtype('uint8'))
+
+    return (int(left), int(top), int(right), int(bottom)), cropped
+
+
+def encode(indices: np.ndarray, palette: np.ndarray) -> Tuple[bytes, bytes]:
+    """
+    lzw compress palette indices with PIL
+
+    :param indices: (height, width) palette indices
+    :param palette: (colors, 3) palette
+
+    :return: (color table padded to a power of 2 colors, image descriptor and data blocks)
+    """
+    image = Image.fromarray(np.ascontiguousarray(indices, dtype=np.dtype('uint8')), 'P')
+    image.putpalette(palette.ravel().tolist())
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='GIF', optimize=False, interlace=False)
+    data = buffer.getvalue()
+
+    # header (6) and logical screen descriptor (7)
+    flags = data[10]
+    table_end = 13 + (3 * (2 << (flags & 7)) if flags & 0x80 else 0)
+    table = data[13:table_end]
+
+    # skip any extensions to the image descriptor
+    position = table_end
+    while data[position] == 0x21:
+        position += 2
+        while data[position]:
+            position += data[position] + 1
+        position += 1
+
+    # leave off the trailer
+    return table, data[position:-1]
+
+
+def save_gif(
+        path: str,
+        images: List[Image.Image],
+        duration: float,
+        loop: int = 0,
+        optimize: bool = True
+) -> None:
+    """
+    save images as an animated gif in one pass
+
+    with optimize, each frame after the first is cropped to the box that changed,
+    and pixels in that box that didn't change are made transparent
+    so that they compress to runs of one index
+
+    identical frames are merged into the frame before them
+
+    :param path: path to save the gif to
+    :param images: frames of the animation, the same size
+    :param duration: ms each frame is shown for
+    :param loop: number of times to loop, 0 for forever
+    :param optimize: crop and make unchanged pixels transparent
+    """
+    width, height = images[0].size
+    # gif delays are in hundredths of a second
+    delay = max(round(duration / 10), 1)
+
+    previous = None
+    frames = []
+
+    for image in images:
+        indices, palette = palette_frame(image)
+
+        if optimize:
+            transparency = transparent_index(indices, palette)
+            box, cropped = delta(previous, indices, palette, transparency)
+            previous = palette[indices]
+        else:
+            transparency = None
+            box, cropped = (0, 0, width, height), indices
+
+        if box is None:
+            # show the previous frame for longer instead
+            frames[-1][0] += delay
+            continue
+
+        if transparency == len(palette):
+            palette = np.concatenate([palette, np.zeros((1, 3), dtype=palette.dtype)])
+
+        table, data = encode(cropped, palette)
+
+        # the first frame has nothing under it to show through
+        frames.append([delay, box, transparency if frames else None, table, data])
+
+    global_table = frames[0][3]
+
+    with open(path, 'wb') as gif_file:
+        gif_file.write(b'GIF89a')
+        # logical screen descriptor with a global color table of 8 bit colors
+        gif_file.write(struct.pack(
+            '<HHBBB', width, height, 0xf0 | _table_bits(global_table), 0, 0
+        ))
+        gif_file.write(global_table)
+
+        if len(frames) > 1:
+            # netscape looping extension
+            gif_file.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', loop) + b'\x00')
+
+        for delay, (left, top, right, bottom), transparency, table, data in frames:
+            # graphic control extension
+            gif_file.write(struct.pack(
+                '<BBBBHBB',
+                0x21, 0xf9, 4,
+                (DISPOSAL_NONE << 2) | (transparency is not None),
+                delay,
+                transparency or 0,
+                0
+            ))
+
+            descriptor = bytearray(data[:10])
+            descriptor[1:9] = struct.pack('<HHHH', left, top, right - left, bottom - top)
+
+            # frames with a different palette than the first carry their own
+            if table == global_table:
+                descriptor[9] = 0
+                gif_file.write(descriptor)
+            else:
+                descriptor[9] = 0x80 | _table_bits(table)
+                gif_file.write(descriptor)
+                gif_file.write(table)
+
+            gif_file.write(data[10:])
+
+        gif_file.write(b'\x3b')
+
+
+def _table_bits(table: bytes) -> int:
+    """
+    size field of a color table, for 2 ** (size + 1) colors
+    """
+    return (len(table) // 3).bit_length() - 2
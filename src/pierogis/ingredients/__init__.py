@@ -4,7 +4,9 @@ all Ingredient types live here
 
 from .crop import Crop
 from .dish import Dish
+from .dither import Dither
 from .flip import Flip
+from .graph import RecipeGraph
 from .ingredient import Ingredient
 from .mmpx import MMPX
 from .pierogi import Pierogi
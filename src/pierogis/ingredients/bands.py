@@ -0,0 +1,74 @@
+"""
+cook one large frame in bands on a pool of threads
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+
+BAND_LINES = 64
+"""fewest lines of pixels in a band"""
+
+
+def band_axis(ingredient: 'Ingredient', pixels: np.ndarray) -> Optional[Tuple[int, int]]:
+    """
+    (axis, halo) to cut bands of pixels across, None if the ingredient needs the whole frame
+
+    bands of columns (axis 0) are preferred, since they are contiguous in memory
+
+    :param ingredient: ingredient (or recipe) that will cook the bands
+    :param pixels: (width, height, 3) frame
+    """
+    for axis in (0, 1):
+        halo = ingredient.band_halo(axis)
+
+        if halo is not None and pixels.shape[axis] >= 2 * BAND_LINES:
+            return axis, halo
+
+    return None
+
+
+def lines(pixels: np.ndarray, axis: int, start: int, end: int) -> np.ndarray:
+    """
+    view of the lines of pixels from start to end along an axis
+    """
+    return pixels[(slice(None),) * axis + (slice(start, end),)]
+
+
+def cook_bands(ingredient: 'Ingredient', pixels: np.ndarray, threads: int) -> np.ndarray:
+    """
+    cook a frame in bands with a thread for each,
+    each band with enough of the pixels around it to cook the same as the whole frame
+
+    the whole recipe is cooked on a band at a time,
+    so its pixels stay in cache between ingredients
+
+    frames whose ingredients need the whole frame are cooked in one piece
+
+    :param ingredient: ingredient (or recipe) to cook
+    :param pixels: (width, height, 3) frame
+    :param threads: number of bands to cook at the same time
+    """
+    axis_halo = band_axis(ingredient, pixels) if threads > 1 else None
+
+    if axis_halo is None:
+        return ingredient.cook(pixels)
+
+    axis, halo = axis_halo
+    length = pixels.shape[axis]
+
+    bands = min(threads, length // BAND_LINES)
+    boundaries = [length * band // bands for band in range(bands + 1)]
+
+    def cook_band(start: int, end: int) -> np.ndarray:
+        halo_start = max(start - halo, 0)
+        halo_end = min(end + halo, length)
+
+        cooked_band = ingredient.cook(lines(pixels, axis, halo_start, halo_end))
+
+        return lines(cooked_band, axis, start - halo_start, end - halo_start)
+
+    with ThreadPoolExecutor(bands) as executor:
+        cooked_bands = list(executor.map(cook_band, boundaries[:-1], boundaries[1:]))
+
+    return np.concatenate(cooked_bands, axis=axis)
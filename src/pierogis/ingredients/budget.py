@@ -0,0 +1,78 @@
+"""
+scale the work of cooking a frame to fit a time budget
+"""
+import threading
+from typing import Dict, Hashable
+
+
+class Budget:
+    """
+    how long a unit of an ingredient's work takes, measured from the frames it has cooked,
+    to choose how much of its work fits in a time budget
+
+    what a unit of work is (like iterations times pixels) is up to the ingredient
+    """
+
+    SMOOTHING = .5
+    """weight of the latest measurement in the running estimate"""
+
+    def __init__(self, smoothing: float = SMOOTHING):
+        """
+        :param smoothing: weight of the latest measurement in the running estimate
+        """
+        self.smoothing = smoothing
+        self._seconds_per_work: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._seconds_per_work)
+
+    def fraction(self, key: Hashable, work: float, seconds: float) -> float:
+        """
+        fraction of some work that is expected to take seconds, at most 1
+
+        1 if no work has been measured for key yet
+
+        :param key: what the work is measured by, like the ingredient type
+        :param work: units of work at full effort
+        :param seconds: time budget
+        """
+        with self._lock:
+            seconds_per_work = self._seconds_per_work.get(key)
+
+        if seconds_per_work is None or seconds_per_work * work <= 0:
+            return 1.
+
+        return min(1., seconds / (seconds_per_work * work))
+
+    def record(self, key: Hashable, work: float, elapsed: float) -> None:
+        """
+        record how long some work took
+
+        :param key: what the work is measured by
+        :param work: units of work done
+        :param elapsed: seconds it took
+        """
+        if work <= 0:
+            return
+
+        seconds_per_work = elapsed / work
+
+        with self._lock:
+            previous = self._seconds_per_work.get(key)
+
+            if previous is not None:
+                seconds_per_work = self.smoothing * seconds_per_work + (1 - self.smoothing) * previous
+
+            self._seconds_per_work[key] = seconds_per_work
+
+    def clear(self) -> None:
+        """
+        forget every measurement
+        """
+        with self._lock:
+            self._seconds_per_work.clear()
+
+
+budget = Budget()
+"""budget measurements shared by everything in this process"""
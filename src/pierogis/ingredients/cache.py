@@ -0,0 +1,185 @@
+"""
+caches of loaded pixel arrays and of computations on a frame
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+import numpy as np
+
+
+class PixelCache:
+    """
+    least recently used cache of pixel arrays, bounded by their total size
+
+    cached arrays are shared by every Pierogi that loads the same key,
+    so they are made read-only
+    """
+
+    MAX_BYTES = 512 * 1024 ** 2
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        """
+        :param max_bytes: total size of arrays to keep
+        """
+        self.max_bytes = max_bytes
+        self._arrays = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        """
+        get a cached array and mark it as recently used
+
+        :param key: key the array was put with
+        """
+        with self._lock:
+            pixels = self._arrays.get(key)
+
+            if pixels is not None:
+                self._arrays.move_to_end(key)
+
+            return pixels
+
+    def put(self, key: Hashable, pixels: np.ndarray) -> np.ndarray:
+        """
+        cache an array, evicting the least recently used arrays to make room
+
+        arrays larger than max_bytes are returned without being cached
+
+        :param key: key to get the array with
+        :param pixels: array to cache
+
+        :return: the read-only cached array
+        """
+        pixels = pixels.view()
+        pixels.setflags(write=False)
+
+        if pixels.nbytes > self.max_bytes:
+            return pixels
+
+        with self._lock:
+            if key in self._arrays:
+                self._bytes -= self._arrays.pop(key).nbytes
+
+            self._arrays[key] = pixels
+            self._bytes += pixels.nbytes
+
+            while self._bytes > self.max_bytes:
+                _, evicted = self._arrays.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+        return pixels
+
+    def load(self, key: Hashable, loader: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        get a cached array, or use a loader and cache its array
+
+        :param key: key of the array
+        :param loader: function that produces the array if it isn't cached
+        """
+        pixels = self.get(key)
+
+        if pixels is None:
+            pixels = self.put(key, loader())
+
+        return pixels
+
+    def clear(self) -> None:
+        """
+        remove all cached arrays
+        """
+        with self._lock:
+            self._arrays.clear()
+            self._bytes = 0
+
+
+pixel_cache = PixelCache()
+"""cache shared by everything in this process"""
+
+
+class FrameCache:
+    """
+    computations on the pixels of one frame,
+    shared by the ingredients of a recipe while it cooks that frame
+
+    results are kept by the identity of the pixels array they were computed from,
+    so pixels must not be modified in place while they are cached
+
+    safe to share between threads, like the nodes of a RecipeGraph,
+    though two threads asking for the same result at once may both compute it
+    """
+
+    def __init__(self):
+        self._lumas = {}
+        self._masks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def compute_luma(pixels: np.ndarray) -> np.ndarray:
+        """
+        uint8 brightness of each pixel
+
+        brightness = (r * 77 + g * 150 + b * 29) >> 8,
+        a fixed point version of r * 0.299 + g * 0.587 + b * 0.114
+
+        :param pixels: (width, height, 3) pixels
+        """
+        red = pixels[..., 0].astype(np.dtype('uint16'))
+        green = pixels[..., 1].astype(np.dtype('uint16'))
+        blue = pixels[..., 2].astype(np.dtype('uint16'))
+
+        return ((red * 77 + green * 150 + blue * 29) >> 8).astype(np.dtype('uint8'))
+
+    def luma(self, pixels: np.ndarray) -> np.ndarray:
+        """
+        brightness of pixels, computed once per pixels array
+
+        :param pixels: (width, height, 3) pixels
+        """
+        with self._lock:
+            entry = self._lumas.get(id(pixels))
+
+        if entry is None or entry[0] is not pixels:
+            entry = (pixels, self.compute_luma(pixels))
+
+            with self._lock:
+                self._lumas[id(pixels)] = entry
+
+        return entry[1]
+
+    def mask(self, seasoning: 'Ingredient', pixels: np.ndarray) -> np.ndarray:
+        """
+        cook a seasoning on pixels, once per seasoning and pixels array
+
+        :param seasoning: the seasoning to cook
+        :param pixels: pixels to cook the seasoning on
+        """
+        key = (id(seasoning), id(pixels))
+
+        with self._lock:
+            entry = self._masks.get(key)
+
+        if entry is None or entry[0] is not pixels:
+            # cooked outside the lock, seasonings use the cache too
+            entry = (pixels, seasoning.cook_frame(pixels, self))
+
+            with self._lock:
+                self._masks[key] = entry
+
+        return entry[1]
+
+    def release(self, pixels: np.ndarray) -> None:
+        """
+        forget results computed from pixels that won't be used again
+
+        :param pixels: pixels to forget
+        """
+        with self._lock:
+            self._lumas.pop(id(pixels), None)
+
+            for key in [key for key in self._masks if key[1] == id(pixels)]:
+                del self._masks[key]
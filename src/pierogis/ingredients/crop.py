@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Tuple, Union
 
 import numpy as np
 
@@ -46,10 +46,14 @@ class Crop(Ingredient):
         self.aspect = aspect
         self.origin = origin
 
-    def cook(self, pixels: np.ndarray) -> np.ndarray:
-        width = pixels.shape[0]
-        height = pixels.shape[1]
+    def get_box(self, width: int, height: int) -> Tuple[int, int, int, int]:
+        """
+        get the (left, bottom, right, top) bounds that
+        pixels of a width and height would be cropped to
 
+        :param width: width of the pixels to crop
+        :param height: height of the pixels to crop
+        """
         rectangle = Rectangle(
             width=self.width, height=self.height,
             x=self.x, y=self.y,
@@ -58,9 +62,16 @@ class Crop(Ingredient):
 
         bottom_left, top_right = rectangle.get_corner_coordinates(width, height)
 
-        cooked_pixels = pixels[
-                        bottom_left.x: top_right.x,
-                        bottom_left.y: top_right.y
-                        ]
+        return bottom_left.x, bottom_left.y, top_right.x, top_right.y
+
+    def cook(self, pixels: np.ndarray) -> np.ndarray:
+        left, bottom, right, top = self.get_box(pixels.shape[0], pixels.shape[1])
+
+        cooked_pixels = pixels[left:right, bottom:top]
 
         return cooked_pixels
+
+    def cook_batch(self, frames: np.ndarray) -> np.ndarray:
+        left, bottom, right, top = self.get_box(frames.shape[1], frames.shape[2])
+
+        return frames[:, left:right, bottom:top]
@@ -1,8 +1,13 @@
+import os
+
 import numpy as np
 
+from .bands import cook_bands
+from .increments import cook_increment
 from .ingredient import Ingredient
 from .pierogi import Pierogi
 from .recipe import Recipe
+from .tiles import cook_tiles
 
 
 class Dish(Ingredient):
@@ -10,6 +15,9 @@ class Dish(Ingredient):
     cook a pierogi with a recipe
     """
 
+    PREVIEW_SCALE = .25
+    """scale of a preview"""
+
     _pierogi: Pierogi = None
 
     def prep(
@@ -34,16 +42,89 @@ class Dish(Ingredient):
     def cook(self, pixels: np.ndarray) -> np.ndarray:
         return self.recipe.cook(self.pierogi.pixels)
 
-    def serve(self) -> 'Dish':
+    def serve(self, threads: int = 1) -> 'Dish':
         """
         cook the recipe and set the output to this object's pixel array
+
+        :param threads: cook bands of the frame on this many threads,
+            if the recipe doesn't need the whole frame at once
         """
 
+        if isinstance(self.recipe, Recipe):
+            # recipes ending in a quantize can keep the palette indices
+            indexed = self.recipe.cook_indexed(self.pierogi.pixels)
+
+            if indexed is not None:
+                return Dish(pierogi=self.indexed_pierogi(*indexed))
+
         # cook with these pixels as first input
-        cooked_pixels = self.recipe.cook(self.pierogi.pixels)
+        cooked_pixels = cook_bands(self.recipe, self.pierogi.pixels, threads)
         # ensure that the cooked pixels do not overflow 0-255
         clipped_pixels = np.clip(cooked_pixels, 0, 255)
         # # set the objects own pixels to the result of cooking
         cooked_pierogi = Pierogi(pixels=clipped_pixels)
 
         return Dish(pierogi=cooked_pierogi)
+
+    def preview(self, scale: float = PREVIEW_SCALE) -> 'Dish':
+        """
+        serve a rough version of the dish quickly,
+        at a smaller size and with the preview of the recipe
+
+        :param scale: scale of the preview
+        """
+        width = max(1, round(self.pierogi.width * scale))
+        height = max(1, round(self.pierogi.height * scale))
+
+        pierogi = Pierogi(pixels=Pierogi.crop_resize(self.pierogi.pixels, size=(width, height)))
+
+        return Dish(pierogi=pierogi, recipe=self.recipe.preview()).serve()
+
+    def serve_incremental(self, previous: 'Dish' = None, previous_cooked: 'Dish' = None) -> 'Dish':
+        """
+        cook the recipe by recooking only what changed from the previous frame
+        and reusing the previous frame's cooked output everywhere else
+
+        :param previous: dish of the previous frame, cooked with the same recipe
+        :param previous_cooked: what that dish served
+        """
+        if previous is None or previous_cooked is None:
+            return self.serve()
+
+        if isinstance(self.recipe, Recipe) and self.recipe.ends_indexed():
+            return self.serve()
+
+        cooked_pixels = cook_increment(
+            self.recipe, self.pierogi.pixels, previous.pierogi.pixels, previous_cooked.pierogi.pixels
+        )
+
+        return Dish(pierogi=Pierogi(pixels=np.clip(cooked_pixels, 0, 255)))
+
+    def serve_to(self, path: str, threads: int = 1, compress_level: int = None) -> None:
+        """
+        cook the recipe and save the output to a path
+
+        .npy outputs of recipes that don't need the whole frame at once
+        are cooked and written a tile at a time,
+        so the whole cooked frame is never held in memory
+
+        :param path: path to save the output to
+        :param threads: cook bands of the frame (or of each tile) on this many threads
+        :param compress_level: zlib level for png outputs
+        """
+        if os.path.splitext(path)[1] == '.npy' and cook_tiles(self.recipe, self.pierogi.pixels, path, threads):
+            return
+
+        self.serve(threads).pierogi.save(path, compress_level=compress_level)
+
+    @staticmethod
+    def indexed_pierogi(indices: np.ndarray, palette: np.ndarray) -> Pierogi:
+        """
+        a Pierogi of palette indices, or of colors if the palette is too large for an index image
+        """
+        palette = palette.astype(np.dtype('uint8'))
+
+        if len(palette) <= 256:
+            return Pierogi(indices=indices.astype(np.dtype('uint8')), palette=palette)
+
+        return Pierogi(pixels=palette[indices])
@@ -0,0 +1,190 @@
+import numpy as np
+
+from .quantize import Quantize
+
+
+class Dither(Quantize):
+    """
+    dither to a palette with an ordered (bayer)
+    or error diffusion (floyd-steinberg, atkinson) pattern
+
+    a much cheaper alternative to SpatialQuantize,
+    with the palette provided up front
+    """
+
+    # error spreads over the whole frame, and the bayer matrix is tiled from its corner
+    dependence = 'frame'
+
+    METHODS = ('floyd-steinberg', 'atkinson', 'bayer')
+    METHOD = 'floyd-steinberg'
+    COLORS = ['000000', 'ffffff']
+    LEVEL = 1
+    MATRIX_SIZE = 4
+
+    KERNELS = {
+        # (columns ahead, rows down, weight)
+        'floyd-steinberg': (
+            (1, 0, 7 / 16),
+            (-1, 1, 3 / 16),
+            (0, 1, 5 / 16),
+            (1, 1, 1 / 16),
+        ),
+        # only 6/8 of the error is spread
+        'atkinson': (
+            (1, 0, 1 / 8),
+            (2, 0, 1 / 8),
+            (-1, 1, 1 / 8),
+            (0, 1, 1 / 8),
+            (1, 1, 1 / 8),
+            (0, 2, 1 / 8),
+        ),
+    }
+    """error spread to neighboring pixels by each error diffusion method"""
+
+    method: str
+    """dithering pattern to use"""
+    level: float
+    """relative amount of dithering"""
+    matrix_size: int
+    """size of the bayer threshold matrix"""
+
+    def prep(
+            self,
+            colors=None,
+            method: str = METHOD,
+            level: float = LEVEL,
+            matrix_size: int = MATRIX_SIZE,
+            **kwargs
+    ):
+        """
+        :param colors: palette to dither to, black and white if not provided
+        :param method: 'floyd-steinberg', 'atkinson', or 'bayer'
+        :param level: relative amount of dithering (0 is no dithering)
+        :param matrix_size: size of the bayer threshold matrix (power of 2)
+        """
+        if colors is None:
+            colors = self.COLORS
+
+        super().prep(colors=colors, **kwargs)
+
+        if method not in self.METHODS:
+            raise ValueError("method must be one of {}".format(', '.join(self.METHODS)))
+
+        self.method = method
+        self.level = level
+        self.matrix_size = matrix_size
+
+    def cook_batch(self, frames: np.ndarray):
+        """
+        dither a stack of frames, in rust with a thread per frame if it is available
+        """
+        # rotating and unrotating because rows are expected from top to bottom
+        rotated_frames = np.ascontiguousarray(np.rot90(frames, axes=(1, 2)), dtype=np.dtype('uint8'))
+
+        try:
+            cooked_frames = self.cook_rs(rotated_frames)
+        except ImportError:
+            cooked_frames = self.cook_np(rotated_frames)
+
+        return np.rot90(cooked_frames, axes=(2, 1))
+
+    def cook_batch_indexed(self, frames: np.ndarray):
+        """
+        dither a stack of frames, then look up the palette index of each pixel
+        """
+        return self.index_pixels(self.cook_batch(frames), self.palette), self.palette
+
+    def cook_rs(self, frames: np.ndarray):
+        from ..algorithms import dither
+
+        return dither(
+            frames,
+            np.ascontiguousarray(self.palette),
+            self.method,
+            self.level,
+            self.matrix_size
+        )
+
+    def cook_np(self, frames: np.ndarray):
+        """
+        perform the same operation as cook_rs in numpy and python
+
+        :param frames: (frames, height, width, 3) stack with rows from top to bottom
+        """
+        if self.method == 'bayer':
+            return self.ordered(frames)
+
+        return np.stack([self.diffuse(frame) for frame in frames])
+
+    @staticmethod
+    def bayer_matrix(size: int) -> np.ndarray:
+        """
+        bayer threshold matrix of a power of 2 size, scaled to (-.5, .5)
+        """
+        matrix = np.zeros((1, 1), dtype=np.dtype(int))
+
+        while matrix.shape[0] < size:
+            matrix = np.block([
+                [4 * matrix, 4 * matrix + 2],
+                [4 * matrix + 3, 4 * matrix + 1]
+            ])
+
+        return (matrix + .5) / matrix.size - .5
+
+    def ordered(self, frames: np.ndarray) -> np.ndarray:
+        """
+        offset each pixel by its cell of a tiled bayer matrix
+        then snap it to the nearest palette color
+        """
+        height, width = frames.shape[1:3]
+
+        matrix = self.bayer_matrix(self.matrix_size)
+        matrix_size = matrix.shape[0]
+
+        # the spread is the distance between colors of an even palette
+        spread = self.level * 255 / np.cbrt(len(self.palette))
+
+        offsets = np.tile(
+            matrix, (-(-height // matrix_size), -(-width // matrix_size))
+        )[:height, :width] * spread
+
+        values = frames.astype(np.dtype(float)) + offsets[..., np.newaxis]
+
+        nearest_palette_index = self.nearest_palette_index(values.reshape(-1, 3))
+
+        return self.palette[nearest_palette_index].reshape(frames.shape)
+
+    def diffuse(self, frame: np.ndarray) -> np.ndarray:
+        """
+        snap each pixel to the nearest palette color,
+        spreading the difference to the pixels after it
+
+        rows are scanned in alternating directions (serpentine)
+        """
+        height, width = frame.shape[:2]
+        kernel = self.KERNELS[self.method]
+        palette = self.palette.astype(np.dtype(float))
+
+        errors = np.zeros(frame.shape)
+        cooked_frame = np.empty_like(frame)
+
+        for y in range(height):
+            reverse = y % 2 == 1
+            columns = range(width - 1, -1, -1) if reverse else range(width)
+
+            for x in columns:
+                value = np.clip(frame[y, x] + errors[y, x], 0, 255)
+
+                color_index = np.argmin(np.sum((value - palette) ** 2, axis=1))
+                error = (value - palette[color_index]) * self.level
+
+                cooked_frame[y, x] = self.palette[color_index]
+
+                for columns_ahead, rows_down, weight in kernel:
+                    next_x = x - columns_ahead if reverse else x + columns_ahead
+                    next_y = y + rows_down
+
+                    if 0 <= next_x < width and next_y < height:
+                        errors[next_y, next_x] += error * weight
+
+        return cooked_frame
@@ -8,6 +8,8 @@ class Flip(Ingredient):
     flip pixels about an axis
     """
 
+    dependence = 'lines'
+
     def prep(self, axis: int = 0, **kwargs):
         """
         :param axis: 0 to flip vertically, 1 to flip horizontally
@@ -15,6 +17,13 @@ class Flip(Ingredient):
 
         self.axis = axis
 
+    @property
+    def line_axis(self) -> int:
+        """
+        pixels only move along the flipped axis
+        """
+        return self.axis
+
     def cook(self, pixels: np.ndarray):
         """
         flip the pixels
@@ -22,3 +31,9 @@ class Flip(Ingredient):
         flipped_pixels = np.flip(pixels, axis=self.axis)
 
         return flipped_pixels
+
+    def cook_batch(self, frames: np.ndarray):
+        """
+        flip every frame of a stack
+        """
+        return np.flip(frames, axis=self.axis + 1)
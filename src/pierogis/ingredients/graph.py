@@ -0,0 +1,282 @@
+"""
+cook ingredients as a graph of named outputs, with independent branches in parallel
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import FrameCache
+from .ingredient import Ingredient
+from .recipe import Recipe
+
+BASE = 'base'
+"""name of the pixels a graph is cooked on"""
+
+
+class Node:
+    """
+    an ingredient in a RecipeGraph, and the names of the outputs it uses
+    """
+
+    def __init__(self, ingredient: Ingredient, pixels: str = BASE, masks: List[str] = None, under: str = None):
+        """
+        :param ingredient: ingredient that cooks this node's output,
+            layered over its pixels with its own seasonings, mask, and opacity
+        :param pixels: name of the output the ingredient cooks
+        :param masks: names of outputs that are white where the cooked pixels are used
+        :param under: name of the output used where the masks aren't white, the pixels if not given
+        """
+        if masks is None:
+            masks = []
+
+        self.ingredient = ingredient
+        self.pixels = pixels
+        self.masks = masks
+        self.under = under
+
+    @property
+    def inputs(self) -> List[str]:
+        """
+        names of every output this node uses
+        """
+        inputs = [self.pixels, *self.masks]
+
+        if self.under is not None:
+            inputs.append(self.under)
+
+        return inputs
+
+
+class RecipeGraph(Ingredient):
+    """
+    ingredient used to coordinate cooking of ingredients that don't run in a sequence
+
+    each node cooks a named output from other outputs,
+    so masks and branches cooked from the same pixels are cooked once and shared,
+    and nodes that don't depend on each other are cooked at the same time on a thread pool
+
+    an output is dropped as soon as the last node using it is done
+    """
+
+    THREADS = os.cpu_count()
+
+    nodes: Dict[str, Node]
+    """nodes by the name of their output"""
+    output: str
+    """name of the output that is cooked"""
+    inputs: Dict[str, 'Pierogi']
+    """pierogis whose pixels are outputs that aren't cooked"""
+    threads: int
+    """nodes cooked at the same time"""
+
+    def prep(
+            self,
+            nodes: Dict[str, Node] = None,
+            output: str = None,
+            inputs: Dict[str, 'Pierogi'] = None,
+            threads: int = THREADS,
+            **kwargs
+    ) -> None:
+        """
+        :param nodes: nodes by the name of their output
+        :param output: name of the output that is cooked, the last node if not given
+        :param inputs: pierogis whose pixels are used as outputs that aren't cooked
+        :param threads: nodes cooked at the same time
+        """
+        if nodes is None:
+            nodes = {}
+        if inputs is None:
+            inputs = {}
+        if output is None and len(nodes) > 0:
+            output = list(nodes)[-1]
+
+        self.nodes = nodes
+        self.output = output
+        self.inputs = inputs
+        self.threads = max(1, threads or 1)
+
+        self.order()
+
+    @property
+    def ingredients(self) -> List[Ingredient]:
+        """
+        ingredient of each node
+        """
+        return [node.ingredient for node in self.nodes.values()]
+
+    def order(self) -> List[str]:
+        """
+        names of the nodes that the output depends on, each after the nodes it uses
+
+        :raises ValueError: if an output isn't known or the nodes use each other in a cycle
+        """
+        ordered = []
+        visiting = set()
+
+        def visit(name: str):
+            if name == BASE or name in self.inputs or name in ordered:
+                return
+            if name not in self.nodes:
+                raise ValueError("unknown output '{}'".format(name))
+            if name in visiting:
+                raise ValueError("output '{}' depends on itself".format(name))
+
+            visiting.add(name)
+
+            for input_name in self.nodes[name].inputs:
+                visit(input_name)
+
+            visiting.remove(name)
+            ordered.append(name)
+
+        if self.output is not None:
+            visit(self.output)
+
+        return ordered
+
+    def cook_node(
+            self,
+            node: Node,
+            pixels: np.ndarray,
+            masks: List[np.ndarray],
+            under_pixels: Optional[np.ndarray],
+            frame_cache: FrameCache
+    ) -> np.ndarray:
+        """
+        cook the ingredient of a node and layer it with the node's masks
+
+        :param pixels: the output the ingredient cooks
+        :param masks: the outputs of the node's masks
+        :param under_pixels: the output used where the masks aren't white
+        """
+        cooked_pixels = Recipe(ingredients=[node.ingredient]).cook(pixels, frame_cache)
+
+        if len(masks) == 0:
+            return cooked_pixels
+
+        if under_pixels is None:
+            under_pixels = pixels
+
+        binary_array = np.all(np.asarray(masks) == self._white_pixel, axis=(0, 3))
+
+        # resize under array to cooked array
+        layered_pixels = np.resize(under_pixels, cooked_pixels.shape).astype('uint8')
+
+        # layer cooked pixels over the under pixels for true pixels (white in every mask)
+        layered_pixels[binary_array] = cooked_pixels[binary_array]
+
+        return layered_pixels
+
+    def cook(self, pixels: np.ndarray, frame_cache: FrameCache = None) -> np.ndarray:
+        """
+        cook each node once every output it uses is cooked,
+        with nodes that are ready at the same time cooked in parallel
+
+        :param frame_cache: share computations on the frame between nodes,
+            a new one is used if not provided
+        """
+        if self.output is None:
+            return pixels
+
+        if frame_cache is None:
+            frame_cache = FrameCache()
+
+        ordered = self.order()
+
+        # number of nodes still to use each output, the output of the graph is kept
+        consumers = {self.output: 1}
+        for name in ordered:
+            for input_name in self.nodes[name].inputs:
+                consumers[input_name] = consumers.get(input_name, 0) + 1
+
+        outputs = {BASE: pixels}
+
+        def output(name: str) -> np.ndarray:
+            if name not in outputs:
+                outputs[name] = self.inputs[name].pixels
+
+            return outputs[name]
+
+        waiting = {name: set(self.nodes[name].inputs) & set(ordered) for name in ordered}
+        running: Dict[Future, str] = {}
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            while waiting or running:
+                ready = [name for name, inputs in waiting.items() if len(inputs) == 0]
+
+                for name in ready:
+                    del waiting[name]
+                    node = self.nodes[name]
+
+                    future = executor.submit(
+                        self.cook_node,
+                        node,
+                        output(node.pixels),
+                        [output(mask) for mask in node.masks],
+                        None if node.under is None else output(node.under),
+                        frame_cache
+                    )
+                    running[future] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name = running.pop(future)
+                    outputs[name] = future.result()
+
+                    for input_name in self.nodes[name].inputs:
+                        consumers[input_name] -= 1
+
+                        # the last node using this output is done with it
+                        if consumers[input_name] == 0 and input_name in outputs:
+                            if input_name != BASE:
+                                frame_cache.release(outputs[input_name])
+                            del outputs[input_name]
+
+                    for inputs in waiting.values():
+                        inputs.discard(name)
+
+        return np.clip(output(self.output), 0, 255)
+
+    def cook_frame(self, pixels: np.ndarray, frame_cache: FrameCache) -> np.ndarray:
+        return self.cook(pixels, frame_cache)
+
+    def cook_indexed(
+            self, pixels: np.ndarray, frame_cache: FrameCache = None
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        a graph is always cooked to pixels
+        """
+        return None
+
+    def cook_batch_indexed(self, frames: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        a graph is always cooked to pixels
+        """
+        return None
+
+    def ends_indexed(self) -> bool:
+        return False
+
+    def preview(self) -> 'RecipeGraph':
+        """
+        a graph of the preview of each node's ingredient
+        """
+        nodes = {
+            name: Node(node.ingredient.preview(), pixels=node.pixels, masks=node.masks, under=node.under)
+            for name, node in self.nodes.items()
+        }
+
+        graph = RecipeGraph(
+            nodes=nodes,
+            output=self.output,
+            inputs=self.inputs,
+            threads=self.threads,
+            opacity=self.opacity,
+            mask=self.mask
+        )
+        graph.seasonings = self.seasonings
+
+        return graph
@@ -0,0 +1,88 @@
+"""
+recook only the tiles of a frame that changed from the frame before it
+"""
+import numpy as np
+
+from .regions import MAX_BOXES, REGION_FRACTION, bounding_box, box_pixels, cook_boxes, mask_boxes, region_around
+
+DIRTY_TILE = 32
+"""side of the square tiles that frames are compared in"""
+
+
+def dirty_tiles(pixels: np.ndarray, previous_pixels: np.ndarray, tile: int = DIRTY_TILE) -> np.ndarray:
+    """
+    which tiles of a frame have a pixel that changed from the previous frame
+
+    :param pixels: (width, height, 3) frame
+    :param previous_pixels: (width, height, 3) frame before it
+    :param tile: side of a tile
+
+    :return: (width / tile, height / tile) bool array, rounded up
+    """
+    changed = np.any(pixels != previous_pixels, axis=2)
+
+    width, height = changed.shape
+    columns = -(-width // tile)
+    rows = -(-height // tile)
+
+    padded = np.zeros((columns * tile, rows * tile), dtype=np.dtype(bool))
+    padded[:width, :height] = changed
+
+    return padded.reshape(columns, tile, rows, tile).any(axis=(1, 3))
+
+
+def cook_increment(
+        ingredient: 'Ingredient',
+        pixels: np.ndarray,
+        previous_pixels: np.ndarray,
+        previous_cooked_pixels: np.ndarray,
+        tile: int = DIRTY_TILE
+) -> np.ndarray:
+    """
+    cook a frame by recooking the tiles that changed from the previous frame,
+    and the pixels around them that depend on them, over the previous cooked frame
+
+    ingredients that need the whole frame (or a frame of a different shape) are cooked whole
+
+    :param ingredient: ingredient (or recipe) that cooked the previous frame
+    :param pixels: (width, height, 3) frame
+    :param previous_pixels: (width, height, 3) frame before it
+    :param previous_cooked_pixels: previous_pixels cooked by ingredient
+    :param tile: side of the tiles that are compared
+    """
+    halos = ingredient.band_halo(0), ingredient.band_halo(1)
+
+    if (
+            halos == (None, None)
+            or previous_pixels.shape != pixels.shape
+            or previous_cooked_pixels.shape != pixels.shape
+    ):
+        return ingredient.cook(pixels)
+
+    boxes = [
+        (
+            slice(box[0].start * tile, min(box[0].stop * tile, pixels.shape[0])),
+            slice(box[1].start * tile, min(box[1].stop * tile, pixels.shape[1])),
+        )
+        for box in mask_boxes(dirty_tiles(pixels, previous_pixels, tile))
+    ]
+
+    if len(boxes) == 0:
+        return previous_cooked_pixels.copy()
+
+    if halos[0] is None or len(boxes) > MAX_BOXES:
+        boxes = [bounding_box(boxes)]
+
+    # a changed pixel changes the cooked pixels within a halo of it,
+    # which are cooked from the pixels within a halo of them
+    boxes = [region_around(box, halos, pixels.shape) for box in boxes]
+    regions = [region_around(box, halos, pixels.shape) for box in boxes]
+
+    if box_pixels(regions) > REGION_FRACTION * pixels.shape[0] * pixels.shape[1]:
+        return ingredient.cook(pixels)
+
+    cooked_pixels = previous_cooked_pixels.copy()
+
+    cook_boxes(ingredient, pixels, cooked_pixels, boxes, regions)
+
+    return cooked_pixels
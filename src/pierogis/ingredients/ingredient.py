@@ -2,8 +2,13 @@
 definition of ingredient base class
 """
 
+from typing import Dict, Hashable, Optional
+
 import numpy as np
 
+from .cache import FrameCache, pixel_cache
+from .tuning import autotuner
+
 
 class Ingredient:
     """
@@ -26,6 +31,41 @@ class Ingredient:
 
     _default_pixel = _white_pixel
 
+    shape_only = False
+    """
+    if True, cook output depends only on the shape of the input pixels,
+    so it is computed once per shape and shared (read-only) between frames
+    """
+
+    BACKENDS: Dict[str, str] = {}
+    """
+    names of methods that cook the same output from the same pixels, by backend name,
+    for cook_tuned to choose between
+    """
+
+    backend: Optional[str] = None
+    """backend that last cooked, set by cook_tuned"""
+
+    dependence = 'frame'
+    """
+    which input pixels each output pixel depends on,
+    so that bands of a frame can be cooked separately:
+
+    'pointwise' for only the pixel in the same place,
+    'lines' for pixels in the same line along line_axis,
+    'halo' for pixels within halo of it,
+    'frame' for any pixel (or if the output is a different shape)
+    """
+    line_axis: Optional[int] = None
+    """axis of the lines pixels depend on with 'lines' dependence"""
+    halo = 0
+    """pixels on either side that each output pixel depends on with 'halo' dependence"""
+
+    budgeted = False
+    """whether the ingredient cuts down its work to fit seconds"""
+    seconds: Optional[float] = None
+    """time budget to cook a frame in, for ingredients that cut down their work to fit one"""
+
     def __init__(self, opacity: int = 100, mask: np.ndarray = None, **kwargs):
         """
         :param opacity: cook will overlay this % on input pixels
@@ -53,12 +93,113 @@ class Ingredient:
         """
         return pixels
 
-    def mask_pixels(self, pixels):
+    def cook_tuned(self, pixels: np.ndarray, *args) -> np.ndarray:
+        """
+        cook with whichever of BACKENDS is fastest for the shape and dtype of pixels
+
+        the backends are timed the first time a shape and dtype are cooked
+
+        :param pixels: pixels to cook
+        :param args: extra arguments to the backend methods
+        """
+        return autotuner.cook(self, pixels, *args)
+
+    def cook_batch(self, frames: np.ndarray) -> np.ndarray:
+        """
+        cook a (frames, width, height, 3) stack of frames
+
+        ingredients that can cook every frame in one call override this,
+        by default each frame is cooked separately and restacked
+
+        :param frames: stack of frames with the same shape
+        """
+        return np.stack([self.cook(pixels) for pixels in frames])
+
+    def cook_frame(self, pixels: np.ndarray, frame_cache: FrameCache) -> np.ndarray:
+        """
+        cook with computations on this frame shared through a FrameCache
+
+        ingredients that can use the cache override this,
+        by default it is the same as cook,
+        or a shared result for shape only ingredients
+        """
+        if self.shape_only:
+            shape_key = self.shape_key()
+
+            if shape_key is not None:
+                return pixel_cache.load((shape_key, pixels.shape), lambda: self.cook(pixels))
+
+        return self.cook(pixels)
+
+    def preview(self) -> 'Ingredient':
+        """
+        a cheaper ingredient that cooks a rough version of the same output, for previews
+
+        most ingredients are already cheap, so by default it is this ingredient
+        """
+        return self
+
+    def shape_key(self) -> Optional[Hashable]:
+        """
+        hashable description of the parameters of a shape only ingredient,
+        equal for ingredients that cook the same output from the same shape
+
+        None means the output isn't shared
+        """
+        return None
+
+    def band_halo(self, axis: int) -> Optional[int]:
+        """
+        pixels that a band of a frame, cut across an axis,
+        needs on either side along that axis to cook the same as in the whole frame
+
+        None if bands cut across that axis can't be cooked separately
+
+        :param axis: 0 for bands of columns, 1 for bands of rows
+        """
+        if self.mask is not None:
+            return None
+
+        halo = self.region_halo(axis)
+
+        if halo is None:
+            return None
+
+        for seasoning in self.seasonings:
+            seasoning_halo = seasoning.band_halo(axis)
+
+            if seasoning_halo is None:
+                return None
+
+            halo = max(halo, seasoning_halo)
+
+        return halo
+
+    def region_halo(self, axis: int) -> Optional[int]:
+        """
+        pixels that a region of a frame needs on either side along an axis
+        to cook the same as in the whole frame, not counting the mask and seasonings
+
+        None if a region has to cover the whole frame along that axis
+
+        :param axis: 0 or 1
+        """
+        if self.dependence == 'pointwise':
+            return 0
+        elif self.dependence == 'lines' and self.line_axis is not None and self.line_axis != axis:
+            return 0
+        elif self.dependence == 'halo':
+            return self.halo
+
+        return None
+
+    def mask_pixels(self, pixels, frame_cache: FrameCache = None):
         """
         create a black and white mask from pixels
         and the seasonings attached to this ingredient
 
         :param pixels: pixels to create a mask from
+        :param frame_cache: cook seasonings through this cache
         """
         white_pixels = np.resize(self._white_pixel, pixels.shape)
 
@@ -69,7 +210,10 @@ class Ingredient:
         masks = [base_mask]
 
         for seasoning in self.seasonings:
-            masks.append(seasoning.cook(pixels))
+            if frame_cache is None:
+                masks.append(seasoning.cook(pixels))
+            else:
+                masks.append(frame_cache.mask(seasoning, pixels))
 
         binary_array = np.all(np.asarray(masks) == 255, axis=0)
 
@@ -5,23 +5,34 @@ from .ingredient import Ingredient
 
 class MMPX(Ingredient):
     """
-    use the MMPX algorithm implemented in rust to scale 2x
+    use the MMPX algorithm implemented in rust to scale 2x (or 4x, 8x, ...)
 
     produces interesting style preserving effects for "paletted" pierogis
     """
 
-    def cook(self, pixels: np.ndarray):
+    FACTOR = 2
+
+    factor: int
+    """power of 2 to scale by, with repeated 2x passes"""
+
+    def prep(self, factor: int = FACTOR, **kwargs) -> None:
         """
-        use the binding to the rscolorq package in rust
-        to perform an optimization in quantizing and dithering
+        :param factor: power of 2 to scale by (2, 4, 8, ...)
         """
+        if factor < 2 or factor & (factor - 1):
+            raise ValueError("factor must be a power of 2 of at least 2")
 
-        from ..algorithms import mmpx
-        a = np.full((*pixels.shape[:2], 1), 255)
+        self.factor = factor
 
-        # rotating and unrotating because different orientation is expected
-        cooked_pixels = mmpx(
-            np.ascontiguousarray(np.append(pixels, a, 2), dtype=np.dtype('uint8')),
-        )[:, :, :3]
+    def cook(self, pixels: np.ndarray):
+        """
+        use the binding to the mmpx package in rust,
+        which scales rgb pixels in parallel tiles of rows
+        and repeats 2x passes up to factor without returning to python
+        """
+        from ..algorithms import mmpx
 
-        return cooked_pixels
+        return mmpx(
+            np.ascontiguousarray(pixels, dtype=np.dtype('uint8')),
+            self.factor
+        )
@@ -1,14 +1,29 @@
 """
 define an image wrapper ingredient
 """
+import math
+import os
 from pathlib import Path
-from typing import Callable, Union
+from typing import Callable, Optional, Tuple, Union
 
 import imageio
+import imageio_ffmpeg
 import numpy as np
 from PIL import Image
 
+from .cache import PixelCache
 from .ingredient import Ingredient
+from ..probe import probe
+
+FFMPEG_FILTERS = {
+    Image.NEAREST: 'neighbor',
+    Image.BOX: 'area',
+    Image.BILINEAR: 'bilinear',
+    Image.HAMMING: 'bilinear',
+    Image.BICUBIC: 'bicubic',
+    Image.LANCZOS: 'lanczos',
+}
+"""ffmpeg scale flags closest to each PIL resample filter"""
 
 
 class Pierogi(Ingredient):
@@ -33,20 +48,63 @@ class Pierogi(Ingredient):
 
     _pixels: np.ndarray = None
     """underlying numpy pixels array"""
+    _shape_loader: Callable[[], Tuple[int, int]] = None
+    _indices: np.ndarray = None
+    """palette index of each pixel, if indexed"""
+    _palette: np.ndarray = None
+    """(n, 3) colors that indices refer to, if indexed"""
+    _indexed_loader: Callable[[], Tuple[np.ndarray, np.ndarray]] = None
 
     @property
     def image(self) -> Image.Image:
         """
         turn the numpy array into a PIL Image
+
+        indexed pierogis become palette (P mode) images
         """
+        if self.indexed:
+            image = Image.fromarray(np.ascontiguousarray(np.rot90(self.indices)), 'P')
+            image.putpalette(self.palette.astype(np.dtype('uint8')).tobytes())
+            return image
+
         image = Image.fromarray(np.rot90(self.pixels), 'RGB')
         return image
 
+    @property
+    def indexed(self) -> bool:
+        """
+        if True, pixels are palette colors looked up from indices
+        """
+        return self._indices is not None or self._indexed_loader is not None
+
+    @property
+    def indices(self) -> np.ndarray:
+        """
+        (width, height) uint8 palette index of each pixel, if indexed
+        """
+        if self._indices is None and self._indexed_loader is not None:
+            self._indices, self._palette = self._indexed_loader()
+
+        return self._indices
+
+    @property
+    def palette(self) -> np.ndarray:
+        """
+        (n, 3) colors that indices refer to, if indexed
+        """
+        if self._palette is None and self._indexed_loader is not None:
+            self._indices, self._palette = self._indexed_loader()
+
+        return self._palette
+
     @property
     def width(self) -> int:
         """
         1st dimension of the underlying pixel array
         """
+        if self._pixels is None and self._shape_loader is not None:
+            return self._shape_loader()[0]
+
         return self.pixels.shape[0]
 
     @property
@@ -54,12 +112,19 @@ class Pierogi(Ingredient):
         """
         2nd dimension of the underlying pixel array
         """
+        if self._pixels is None and self._shape_loader is not None:
+            return self._shape_loader()[1]
+
         return self.pixels.shape[1]
 
     def prep(
             self,
             pixels: np.ndarray = None,
             loader: Callable[[], np.ndarray] = None,
+            shape_loader: Callable[[], Tuple[int, int]] = None,
+            indices: np.ndarray = None,
+            palette: np.ndarray = None,
+            indexed_loader: Callable[[], Tuple[np.ndarray, np.ndarray]] = None,
             **kwargs
     ) -> None:
         """
@@ -67,32 +132,276 @@ class Pierogi(Ingredient):
 
         :param pixels: numpy array
         :param loader: function that produces a pixels array
+        :param shape_loader: function that produces the (width, height)
+            the loader will, without loading pixels
+        :param indices: (width, height) uint8 palette indices, provided with palette
+        :param palette: (n, 3) colors (up to 256) that indices refer to
+        :param indexed_loader: function that produces indices and palette
         """
 
-        if pixels is not None:
+        if indices is not None and palette is not None:
+            self._indices = indices
+            self._palette = palette
+            self._loader = lambda: palette[indices]
+
+        elif indexed_loader is not None:
+            self._indexed_loader = indexed_loader
+            self._loader = lambda: self.palette[self.indices]
+            self._shape_loader = shape_loader
+
+        elif pixels is not None:
             self._pixels = pixels
             self._loader = lambda: pixels
 
         elif loader is not None:
             self._loader = loader
+            self._shape_loader = shape_loader
 
         else:
             raise Exception("one of pixels or loader must be provided")
 
     @classmethod
-    def from_path(cls, path: str, frame_index: int = 0) -> 'Pierogi':
+    def from_path(
+            cls,
+            path: str,
+            frame_index: int = 0,
+            box: Tuple[int, int, int, int] = None,
+            size: Tuple[int, int] = None,
+            resample: int = RESIZE_RESAMPLE,
+            cache: PixelCache = None
+    ) -> 'Pierogi':
         """
         :param path: file path to load from
         :param frame_index: if path is a multiframe format (video),
             use this specified frame
+        :param box: (left, bottom, right, top) to crop to while loading
+        :param size: (width, height) to resize to while loading, after cropping
+        :param resample: resample filter for resizing
+        :param cache: share loaded pixels through this cache,
+            keyed by the file's path and modified time and the load parameters.
+            cached pixels are read-only
+
+        .npy files are memory mapped and expected to hold a pixels array
+        as written by Pierogi.save
+
+        when cropping or resizing, jpegs are decoded at a reduced scale
+        and videos are cropped and scaled by ffmpeg,
+        so the full size frame is never loaded
         """
 
-        def loader():
+        def decode():
+            if os.path.splitext(path)[1] == '.npy':
+                return cls.crop_resize(np.load(path, mmap_mode='r'), box, size, resample)
+
+            source = probe(path)
+
+            if source.is_video:
+                return cls._load_video(path, frame_index, box, size, resample)
+
+            if source.format == 'JPEG' and (box is not None or size is not None):
+                return cls._load_draft(path, box, size, resample)
+
+            if frame_index == 0:
+                mapped_pixels = cls._map_raw(path)
+
+                if mapped_pixels is not None:
+                    return cls.crop_resize(mapped_pixels, box, size, resample)
+
             reader = imageio.get_reader(path)
             reader.set_image_index(frame_index)
-            return np.rot90(np.array(reader.get_next_data(), dtype='uint8')[:, :, :3], axes=(1, 0))
+            pixels = np.rot90(np.array(reader.get_next_data(), dtype='uint8')[:, :, :3], axes=(1, 0))
+            return cls.crop_resize(pixels, box, size, resample)
 
-        return cls(loader=loader)
+        def loader():
+            if cache is None:
+                return decode()
+
+            key = (os.path.abspath(path), os.stat(path).st_mtime_ns, frame_index, box, size, resample)
+
+            return cache.load(key, decode)
+
+        def shape_loader():
+            if size is not None:
+                return size
+            elif box is not None:
+                return box[2] - box[0], box[3] - box[1]
+
+            return probe(path).size
+
+        if (
+                box is None and size is None and frame_index == 0 and cache is None
+                and os.path.splitext(path)[1] == '.png' and os.path.isfile(path)
+                and probe(path).mode == 'P'
+        ):
+            # keep palette pngs (like indexed cooked frames) indexed
+            return cls(indexed_loader=lambda: cls._load_indexed(path), shape_loader=shape_loader)
+
+        return cls(loader=loader, shape_loader=shape_loader)
+
+    @staticmethod
+    def _map_raw(path: str) -> Optional[np.ndarray]:
+        """
+        memory map the pixels of an uncompressed rgb image (like ppm, bmp, or an uncompressed tiff),
+        so that they are only read from the file as they are used
+
+        None if the image isn't stored as one uncompressed block of rgb or bgr rows
+        """
+        with Image.open(path) as image:
+            if image.mode != 'RGB' or len(image.tile) != 1:
+                return None
+
+            codec_name, extents, offset, args = image.tile[0]
+            width, height = image.size
+
+        if not isinstance(args, tuple):
+            args = (args,)
+
+        raw_mode = args[0]
+        stride = args[1] if len(args) > 1 and args[1] else width * 3
+        orientation = args[2] if len(args) > 2 else 1
+
+        if codec_name != 'raw' or extents != (0, 0, width, height) or raw_mode not in ('RGB', 'BGR'):
+            return None
+
+        rows = np.memmap(path, dtype='uint8', mode='r', offset=offset, shape=(height, stride))
+        rows = rows[:, :width * 3].reshape(height, width, 3)
+
+        if raw_mode == 'BGR':
+            rows = rows[..., ::-1]
+
+        if orientation < 0:
+            rows = rows[::-1]
+
+        return np.rot90(rows, axes=(1, 0))
+
+    @staticmethod
+    def _load_indexed(path: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        read the palette indices and palette of a palette (P mode) image
+        """
+        with Image.open(path) as image:
+            indices = np.rot90(np.array(image, dtype='uint8'), axes=(1, 0))
+            palette = np.array(image.getpalette(), dtype='uint8').reshape(-1, 3)
+
+        return indices, palette
+
+    @classmethod
+    def crop_resize(
+            cls,
+            pixels: np.ndarray,
+            box: Tuple[int, int, int, int] = None,
+            size: Tuple[int, int] = None,
+            resample: int = RESIZE_RESAMPLE
+    ) -> np.ndarray:
+        """
+        crop then resize already loaded pixels,
+        the same way Crop and Resize would cook them
+
+        :param pixels: pixels to crop and resize
+        :param box: (left, bottom, right, top) to crop to
+        :param size: (width, height) to resize to
+        :param resample: resample filter for resizing
+        """
+        if box is not None:
+            left, bottom, right, top = box
+            pixels = pixels[left:right, bottom:top]
+
+        if size is not None:
+            pierogi = cls(pixels=pixels)
+            pierogi.resize(*size, resample)
+            pixels = pierogi.pixels
+
+        return pixels
+
+    @classmethod
+    def _load_draft(
+            cls,
+            path: str,
+            box: Tuple[int, int, int, int],
+            size: Tuple[int, int],
+            resample: int
+    ) -> np.ndarray:
+        """
+        decode a jpeg at the smallest scale that is still at least as large as needed
+        """
+        with Image.open(path) as image:
+            full_width, full_height = image.size
+
+            if box is None:
+                box = (0, 0, full_width, full_height)
+
+            left, bottom, right, top = box
+
+            if size is not None:
+                # scale the full image so the box would still cover size
+                image.draft(
+                    'RGB', (
+                        math.ceil(full_width * size[0] / (right - left)),
+                        math.ceil(full_height * size[1] / (top - bottom))
+                    )
+                )
+
+            x_scale = image.size[0] / full_width
+            y_scale = image.size[1] / full_height
+
+            image = image.convert('RGB')
+
+        # pierogi coordinates start from the bottom
+        image = image.crop((
+            round(left * x_scale), round((full_height - top) * y_scale),
+            round(right * x_scale), round((full_height - bottom) * y_scale)
+        ))
+
+        if size is not None and image.size != size:
+            image = image.resize(size, resample)
+
+        return np.rot90(np.array(image, dtype='uint8'), axes=(1, 0))
+
+    @classmethod
+    def _load_video(
+            cls,
+            path: str,
+            frame_index: int,
+            box: Tuple[int, int, int, int],
+            size: Tuple[int, int],
+            resample: int
+    ) -> np.ndarray:
+        """
+        decode one video frame, seeking straight to it with its timestamp
+        and cropping and scaling with ffmpeg
+        """
+        source = probe(path)
+
+        input_params = []
+        if frame_index > 0:
+            input_params = ['-ss', '{:.6f}'.format(source.seek_time(frame_index))]
+
+        filters = []
+
+        if box is not None:
+            left, bottom, right, top = box
+            filters.append(
+                'crop={}:{}:{}:{}:exact=1'.format(right - left, top - bottom, left, source.height - top)
+            )
+
+        if size is not None:
+            filters.append(
+                'scale={}:{}:flags={}'.format(*size, FFMPEG_FILTERS.get(resample, 'bicubic'))
+            )
+
+        output_params = None
+        if len(filters) > 0:
+            output_params = ['-vf', ','.join(filters)]
+
+        frames = imageio_ffmpeg.read_frames(path, input_params=input_params, output_params=output_params)
+
+        try:
+            width, height = next(frames)['size']
+            frame = np.frombuffer(next(frames), dtype='uint8').reshape(height, width, 3)
+        finally:
+            frames.close()
+
+        return np.rot90(frame, axes=(1, 0))
 
     @classmethod
     def from_shape(cls, shape: tuple) -> 'Pierogi':
@@ -141,14 +450,27 @@ class Pierogi(Ingredient):
         """
         self.image.show()
 
-    def save(self, path: Union[str, Path], optimize: bool = False) -> None:
+    def save(self, path: Union[str, Path], optimize: bool = False, compress_level: int = None) -> None:
         """
         save the image to the given path
+
+        a .npy path saves the pixels array uncompressed
+
+        :param optimize: passed to PIL to optimize image outputs
+        :param compress_level: zlib level (0-9) for png outputs, PIL default if None
         """
 
         output_filename = path
 
-        self.image.save(output_filename, optimize=optimize)
+        if os.path.splitext(output_filename)[1] == '.npy':
+            with open(output_filename, 'wb') as output_file:
+                np.save(output_file, self.pixels)
+
+        elif compress_level is not None:
+            self.image.save(output_filename, optimize=optimize, compress_level=compress_level)
+
+        else:
+            self.image.save(output_filename, optimize=optimize)
 
     def resize(self, width: int, height: int, resample: int = RESIZE_RESAMPLE):
         """
@@ -169,6 +491,7 @@ class Pierogi(Ingredient):
         """
 
         if height != self.height and width != self.width:
+            self._drop_indices()
             self._pixels = np.array(
                 Image.fromarray(
                     self.pixels
@@ -195,6 +518,17 @@ class Pierogi(Ingredient):
         """
 
         if angle != 0:
+            self._drop_indices()
             self._pixels = np.array(
                 Image.fromarray(self.pixels).rotate(-angle, resample=resample, expand=True, fillcolor=0)
             )
+
+    def _drop_indices(self) -> None:
+        """
+        load pixels and stop treating them as indexed before they are changed
+        """
+        if self.indexed:
+            self._pixels = self.pixels
+            self._indices = None
+            self._palette = None
+            self._indexed_loader = None
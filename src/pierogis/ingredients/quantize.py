@@ -1,71 +1,304 @@
+import functools
+import math
+import time
+from typing import Tuple
+
 import numpy as np
 from PIL import ImageColor
 
+from .budget import budget
 from .ingredient import Ingredient
 
 
+@functools.lru_cache(maxsize=64)
+def parse_colors(colors: tuple) -> np.ndarray:
+    """
+    rgb array of a palette of hex color strings,
+    parsed once per palette in this process
+
+    :param colors: hex strings, with or without #
+    """
+    rgb_colors = []
+    for color in colors:
+        if type(color) is str:
+            if color[0] != '#':
+                color = '#' + color
+            rgb_colors.append(ImageColor.getcolor(color, "RGB"))
+
+    rgb_colors = np.asarray(rgb_colors)
+    rgb_colors.setflags(write=False)
+
+    return rgb_colors
+
+
+def extract_palette(pixels: np.ndarray, palette_size: int, iterations: int = 4) -> np.ndarray:
+    """
+    extract a palette of colors from pixels,
+    in rust with the histogram and k-means in parallel if it is available
+
+    a 5 bit per channel histogram of the pixels is split with median cut
+    (splitting the box with the most error at its mean),
+    then the colors are refined with k-means on the histogram
+
+    :param pixels: array of pixels with r, g, b in the last axis
+    :param palette_size: number of colors to extract
+    :param iterations: k-means iterations
+
+    :return: (palette_size, 3) uint8 colors,
+        fewer if the pixels don't have that many distinct colors
+    """
+    pixels = np.ascontiguousarray(pixels.reshape(-1, 3), dtype=np.dtype('uint8'))
+
+    try:
+        from ..algorithms import palette
+
+        return palette(pixels, palette_size, iterations)
+    except ImportError:
+        return extract_palette_np(pixels, palette_size, iterations)
+
+
+def extract_palette_np(pixels: np.ndarray, palette_size: int, iterations: int) -> np.ndarray:
+    """
+    perform the same operation as extract_palette, but only in numpy
+
+    :param pixels: (n, 3) uint8 pixels
+    """
+    # histogram of 5 bit r, g, b
+    bins = (
+            (pixels[:, 0].astype(np.dtype(int)) >> 3) << 10
+            | (pixels[:, 1].astype(np.dtype(int)) >> 3) << 5
+            | (pixels[:, 2].astype(np.dtype(int)) >> 3)
+    )
+
+    counts = np.bincount(bins, minlength=32 ** 3)
+    occupied = counts > 0
+
+    counts = counts[occupied].astype(np.dtype(float))
+    colors = np.stack([
+        np.bincount(bins, weights=pixels[:, channel], minlength=32 ** 3)[occupied]
+        for channel in range(3)
+    ], axis=1) / counts[:, np.newaxis]
+
+    if len(counts) == 0 or palette_size == 0:
+        return np.zeros((0, 3), dtype=np.dtype('uint8'))
+
+    def mean(box):
+        return np.sum(colors[box] * counts[box, np.newaxis], axis=0) / np.sum(counts[box])
+
+    # median cut on the indices of the histogram entries
+    boxes = [np.arange(len(counts))]
+
+    while len(boxes) < palette_size:
+        # split the box with the most error in a channel
+        split = None
+        widest_error = -1
+
+        for index, box in enumerate(boxes):
+            if len(box) < 2:
+                continue
+
+            errors = np.sum((colors[box] - mean(box)) ** 2 * counts[box, np.newaxis], axis=0)
+            channel = int(np.argmax(errors))
+
+            if errors[channel] > widest_error:
+                widest_error = errors[channel]
+                split = (index, channel)
+
+        if split is None:
+            break
+
+        index, channel = split
+        box = boxes.pop(index)
+        box = box[np.argsort(colors[box, channel], kind='stable')]
+
+        # split at the mean, which separates clusters better than the median
+        above = colors[box, channel] > mean(box)[channel]
+        position = int(np.argmax(above)) if np.any(above) else len(box) - 1
+        position = min(max(position, 1), len(box) - 1)
+
+        boxes.insert(index, box[position:])
+        boxes.insert(index, box[:position])
+
+    palette = np.stack([mean(box) for box in boxes])
+
+    # k-means
+    for _ in range(iterations):
+        distances = np.sum((colors[:, np.newaxis] - palette[np.newaxis]) ** 2, axis=2)
+        assignments = np.argmin(distances, axis=1)
+
+        totals = np.bincount(assignments, weights=counts, minlength=len(palette))
+        sums = np.stack([
+            np.bincount(assignments, weights=colors[:, channel] * counts, minlength=len(palette))
+            for channel in range(3)
+        ], axis=1)
+
+        # colors without any entries are left where they are
+        assigned = totals > 0
+        palette[assigned] = sums[assigned] / totals[assigned, np.newaxis]
+
+    return np.floor(palette + .5).astype(np.dtype('uint8'))
+
+
 class Quantize(Ingredient):
     """
     quantize reduces the color palette of the input pixels to a smaller set.
     """
 
+    PALETTE_SIZE = 8
+    KMEANS_ITERATIONS = 4
+
+    shared_palette = True
+    """if True, cook_batch_indexed quantizes every frame of a batch to one palette"""
+
     def prep(self,
-             colors=None, **kwargs):
+             colors=None, palette_size: int = PALETTE_SIZE, **kwargs):
         """
         parameters for spatial color quantization
 
         :param colors: colors to use. can be a list of str
             or pixel array likes
+        :param palette_size: number of colors to extract from the pixels
+            if colors are not provided
         """
 
         if colors is None:
             colors = np.asarray([[]])
         elif type(colors) is list:
-            rgb_colors = []
-            for color in colors:
-                if type(color) is str:
-                    if color[0] != '#':
-                        color = '#' + color
-                    rgb_colors.append(ImageColor.getcolor(color, "RGB"))
-
-            colors = np.asarray(rgb_colors)
+            colors = parse_colors(tuple(color for color in colors if type(color) is str))
 
         else:
             colors = np.array(colors)
 
         self.palette = colors.astype(np.dtype('uint8'))
         """palette to use"""
+        self.palette_size = palette_size
+        """number of colors to extract if palette is empty"""
+
+    def get_palette(self, frames: np.ndarray) -> np.ndarray:
+        """
+        the palette, or one extracted from the frames if no colors were provided
+
+        :param frames: pixels to extract a palette from
+        """
+        if self.palette.size == 0:
+            return extract_palette(frames, self.palette_size, self.KMEANS_ITERATIONS)
+
+        return self.palette
+
+    @property
+    def dependence(self) -> str:
+        """
+        with colors provided each pixel is snapped on its own,
+        otherwise the palette comes from the whole frame
+        """
+        return 'pointwise' if self.palette.size > 0 else 'frame'
 
     def cook(self, pixels: np.ndarray):
         """
         get the closest rgb color in the palette to each pixel rgb
         "snap" to the colors in the palette
         """
-        # pixels -> (width, height, 1, 3)
-        # palette -> (1, 1, n, 3)
-        # subtract -> (width, height, n, 3)
+        return self.cook_batch(pixels[np.newaxis])[0]
 
-        # the difference between pixel r, g, b (3) and color
-        # for each pixel (width, height),
-        # for each color in the palette (n, 3)
-        differences = (
-                np.expand_dims(pixels, axis=2)
-                - np.expand_dims(self.palette, axis=(0, 1))
+    def cook_batch(self, frames: np.ndarray):
+        """
+        quantize a stack of frames through a lookup table,
+        so the closest palette color is found once for each distinct color
+        """
+        indices, palette = self.cook_batch_indexed(frames)
+
+        return palette[indices]
+
+    def cook_indexed(self, pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        quantize to palette indices instead of colors,
+        so outputs can be written as palette images without quantizing again
+
+        :return: (width, height) palette index of each pixel and (n, 3) palette
+        """
+        indices, palette = self.cook_batch_indexed(pixels[np.newaxis])
+
+        return indices[0], palette
+
+    def cook_batch_indexed(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        quantize a stack of frames to palette indices, with one palette for the stack
+
+        :return: (frames, width, height) palette indices and (n, 3) palette
+        """
+        frames = frames.astype(np.dtype('uint8'), copy=False).astype(np.dtype('uint32'))
+
+        # pack r, g, b into one integer per pixel
+        keys = (frames[..., 0] << 16) | (frames[..., 1] << 8) | frames[..., 2]
+
+        colors, inverse = np.unique(keys, return_inverse=True)
+
+        # unpack the distinct colors -> (n colors, 3)
+        distinct_pixels = np.stack(
+            [(colors >> 16) & 255, (colors >> 8) & 255, colors & 255], axis=-1
         )
 
-        # sum up the last axis (r + g + b)
-        # and sqrt that sum
-        # -> (width, height, n)
-        distances = np.sqrt(np.sum(differences ** 2, axis=3))
+        palette = self.get_palette(frames)
+
+        lookup = self.nearest_palette_index(distinct_pixels, palette).astype(self.index_dtype(palette))
+
+        return lookup[inverse.reshape(keys.shape)], palette
+
+    @staticmethod
+    def index_dtype(palette: np.ndarray) -> np.dtype:
+        """
+        uint8 indices for palettes that fit in a palette image, larger otherwise
+        """
+        if len(palette) <= 256:
+            return np.dtype('uint8')
+
+        return np.dtype('uint16')
+
+    @classmethod
+    def index_pixels(cls, pixels: np.ndarray, palette: np.ndarray) -> np.ndarray:
+        """
+        palette index of pixels that are already palette colors
+
+        :param pixels: pixels whose colors are all in palette
+        :param palette: (n, 3) colors
+        """
+        def pack(colors):
+            colors = colors.astype(np.dtype('uint32'))
+            return (colors[..., 0] << 16) | (colors[..., 1] << 8) | colors[..., 2]
+
+        palette_keys = pack(palette)
+        # first index of each color in the palette
+        sorter = np.argsort(palette_keys, kind='stable')
 
-        # get the minimum among the n color
-        # smallest value in each n group last dimension (smallest sqrt sum)
-        # -> (width, height, 1)
-        nearest_palette_index = np.argmin(distances, axis=2)
+        positions = np.searchsorted(palette_keys[sorter], pack(pixels))
 
-        # replace the min index identified with the corresponding color
-        # -> (width, height, 3)
-        return self.palette[nearest_palette_index]
+        return sorter[np.minimum(positions, len(palette) - 1)].astype(cls.index_dtype(palette))
+
+    def nearest_palette_index(self, pixels: np.ndarray, palette: np.ndarray = None) -> np.ndarray:
+        """
+        index of the closest palette color to each of a (n, 3) array of pixels
+
+        :param palette: colors to choose from, self.palette if not provided
+        """
+        if palette is None:
+            palette = self.palette
+
+        pixels = pixels.astype(np.dtype(float))
+
+        nearest_distances = np.full(len(pixels), np.inf)
+        nearest_palette_index = np.zeros(len(pixels), dtype=np.dtype(int))
+
+        # one color at a time keeps memory to a few copies of pixels
+        for palette_index, color in enumerate(palette.astype(np.dtype(float))):
+            # sum of squared differences of r, g, b
+            # (the smallest sum of squares is also the smallest distance)
+            distances = np.sum((pixels - color) ** 2, axis=1)
+
+            closer = distances < nearest_distances
+            nearest_distances[closer] = distances[closer]
+            nearest_palette_index[closer] = palette_index
+
+        return nearest_palette_index
 
 
 class SpatialQuantize(Quantize):
@@ -82,6 +315,8 @@ class SpatialQuantize(Quantize):
     FINAL_TEMP = .001
     FILTER_SIZE = 3
     DITHERING_LEVEL = .8
+    MIN_SCHEDULE = .1
+    """shortest annealing schedule to cut down to for a time budget, as a fraction of the full one"""
 
     palette_size: int
     """number of colors"""
@@ -99,15 +334,25 @@ class SpatialQuantize(Quantize):
     """relative amount of dithering (.5-1.5)"""
     seed: int
     """seed for rng"""
+    seconds: float
+    """time budget to quantize a frame in, None for no budget"""
+
+    budgeted = True
 
     def prep(
             self, palette_size=PALETTE_SIZE,
             iterations=ITERATIONS, repeats=REPEATS,
             initial_temp=INITIAL_TEMP, final_temp=FINAL_TEMP,
-            dithering_level=DITHERING_LEVEL, seed=0, **kwargs
+            dithering_level=DITHERING_LEVEL, seed=0,
+            extract: bool = False, seconds: float = None, **kwargs
     ):
         """
-
+        :param extract: if no colors are provided,
+            extract a palette from the pixels with median cut
+            instead of optimizing one with annealing
+        :param seconds: time budget to quantize a frame in;
+            repeats, iterations, and the annealing schedule are cut down to fit it,
+            based on how long previous frames took
         """
         super().prep(**kwargs)
 
@@ -126,27 +371,108 @@ class SpatialQuantize(Quantize):
         """relative amount of dithering (.5-1.5)"""
         self.seed = seed
         """seed for rng"""
+        self.extract = extract
+        """extract the palette instead of optimizing it"""
+        self.seconds = seconds
+        """time budget to quantize a frame in, None for no budget"""
+
+    # the rust quantization is per frame, with a palette optimized for each
+    cook_batch = Ingredient.cook_batch
+    shared_palette = False
+    # the annealing and dithering spread over the whole frame
+    dependence = 'frame'
+
+    def preview(self) -> Quantize:
+        """
+        snap to the nearest colors of the palette (or of one extracted with median cut)
+        instead of optimizing and dithering with annealing
+        """
+        quantize = Quantize(
+            colors=self.palette if self.palette.size > 0 else None,
+            palette_size=self.palette_size,
+            opacity=self.opacity,
+            mask=self.mask
+        )
+        quantize.seasonings = self.seasonings
+
+        return quantize
 
     def cook(self, pixels: np.ndarray):
         """
         use the binding to the rscolorq package in rust
         to perform an optimization in quantizing and dithering
         """
+        indices, palette = self.cook_indexed(pixels)
 
-        from ..algorithms import quantize
+        return palette[indices]
+
+    def cook_indexed(self, pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        quantize with rscolorq, returning its palette indices and palette
+        """
+        from ..algorithms import quantize_indexed
+
+        palette = self.palette
+        if self.extract and palette.size == 0:
+            palette = extract_palette(pixels, self.palette_size, self.KMEANS_ITERATIONS)
+
+        iterations, repeats, final_temp = self.effort(pixels)
+
+        start = time.perf_counter()
 
         # rotating and unrotating because different orientation is expected
-        cooked_pixels = np.rot90(quantize(
+        indices, cooked_palette = quantize_indexed(
             np.ascontiguousarray(np.rot90(pixels), dtype=np.dtype('uint8')),
-            self.palette,
+            palette,
             palette_size=self.palette_size,
-            iters_per_level=self.iterations,
-            repeats_per_temp=self.repeats,
+            iters_per_level=iterations,
+            repeats_per_temp=repeats,
             initial_temp=self.initial_temp,
-            final_temp=self.final_temp,
+            final_temp=final_temp,
             filter_size=self.filter_size,
             dithering_level=self.dithering_level,
             seed=self.seed
-        ), axes=(1, 0))
+        )
+
+        if self.seconds is not None:
+            budget.record(
+                type(self), self.work(pixels, iterations, repeats, final_temp), time.perf_counter() - start
+            )
+
+        return np.rot90(indices, axes=(1, 0)), cooked_palette
+
+    def work(self, pixels: np.ndarray, iterations: int, repeats: int, final_temp: float) -> float:
+        """
+        units of work to quantize pixels with some settings,
+        the number of pixels times iterations, repeats, and annealing temperatures
+        (which go down by a constant factor, so their number is proportional to the log of the range)
+        """
+        temperatures = max(1., math.log(self.initial_temp / final_temp))
+
+        return pixels.shape[0] * pixels.shape[1] * iterations * repeats * temperatures
+
+    def effort(self, pixels: np.ndarray) -> Tuple[int, int, float]:
+        """
+        iterations, repeats, and final temperature to quantize pixels with
+
+        with a time budget, repeats are cut first, then iterations,
+        then the annealing schedule is ended at a higher temperature
+        """
+        if self.seconds is None:
+            return self.iterations, self.repeats, self.final_temp
+
+        fraction = budget.fraction(
+            type(self), self.work(pixels, self.iterations, self.repeats, self.final_temp), self.seconds
+        )
+
+        # rounding can leave more than the whole of the next setting, which is never raised
+        repeats = min(self.repeats, max(1, round(self.repeats * fraction)))
+        fraction = min(1., fraction / (repeats / self.repeats))
+
+        iterations = min(self.iterations, max(1, round(self.iterations * fraction)))
+        fraction = min(1., fraction / (iterations / self.iterations))
+
+        schedule = min(max(fraction, self.MIN_SCHEDULE), 1.)
+        final_temp = self.initial_temp * (self.final_temp / self.initial_temp) ** schedule
 
-        return cooked_pixels
+        return iterations, repeats, final_temp
@@ -1,6 +1,11 @@
+from typing import Optional, Tuple
+
 import numpy as np
 
+from .cache import FrameCache
 from .ingredient import Ingredient
+from .quantize import Quantize
+from .regions import cook_regions, region_halos
 
 
 class Recipe(Ingredient):
@@ -23,18 +28,73 @@ class Recipe(Ingredient):
         else:
             raise TypeError("kwarg 'ingredients' must be of type list")
 
-    def cook(self, pixels: np.ndarray):
+    def band_halo(self, axis: int) -> Optional[int]:
+        """
+        a band cooked through every ingredient needs the halos of all of them,
+        since each ingredient cooks the output of the one before it
+        """
+        if self.mask is not None or self.seasonings:
+            return None
+
+        return self.region_halo(axis)
+
+    def region_halo(self, axis: int) -> Optional[int]:
+        """
+        the halos of every ingredient, like a band
+        """
+        halo = 0
+
+        for ingredient in self.ingredients:
+            ingredient_halo = ingredient.band_halo(axis)
+
+            if ingredient_halo is None:
+                return None
+
+            halo += ingredient_halo
+
+        return halo
+
+    def cook(self, pixels: np.ndarray, frame_cache: FrameCache = None):
         """
         sequentially cooks each ingredient
         uses the pixels resulting from the previous cook
+
+        :param frame_cache: share computations on the frame between ingredients,
+            a new one is used if not provided
         """
+        if frame_cache is None:
+            frame_cache = FrameCache()
+
         # input array used to select the
         under_pixels = pixels
 
         for ingredient in self.ingredients:
-            # cook the lower layer
-            cooked_pixels = ingredient.cook(under_pixels)
-            mask = ingredient.mask_pixels(cooked_pixels)
+            if not ingredient.seasonings and ingredient.mask is None and ingredient.opacity == 100:
+                # cook the lower layer
+                cooked_pixels = ingredient.cook_frame(under_pixels, frame_cache)
+
+                # nothing to layer, the cooked pixels cover the under pixels
+                next_pixels = cooked_pixels.astype('uint8', copy=False)
+
+                if under_pixels is not pixels and under_pixels is not next_pixels:
+                    frame_cache.release(under_pixels)
+
+                under_pixels = next_pixels
+                continue
+
+            halos = region_halos(ingredient)
+
+            if halos is None:
+                # cook the lower layer
+                cooked_pixels = ingredient.cook_frame(under_pixels, frame_cache)
+                mask = ingredient.mask_pixels(cooked_pixels, frame_cache)
+
+            else:
+                # the mask only depends on the shape, so it is known before cooking
+                # and only the regions it selects are cooked
+                mask = ingredient.mask_pixels(under_pixels, frame_cache)
+                cooked_pixels = cook_regions(ingredient, under_pixels, mask, halos, frame_cache)
+
             binary_array = np.all(mask == self._white_pixel, axis=2)
 
             # resize under array to cooked array
@@ -53,6 +113,9 @@ class Recipe(Ingredient):
                             +
                             resized_pixels.astype(np.dtype(float))
                             * (100 - ingredient.opacity)) / 100
+            if under_pixels is not pixels:
+                frame_cache.release(under_pixels)
+
             # reset for loop
             under_pixels = mixed_pixels.astype('uint8')
 
@@ -61,6 +124,84 @@ class Recipe(Ingredient):
 
         return clipped_pixels
 
+    def cook_batch(self, frames: np.ndarray):
+        """
+        cook a stack of frames through each ingredient's cook_batch
+
+        if any ingredient is layered with a mask, seasonings, or partial opacity,
+        each frame is cooked separately with cook instead
+        """
+        for ingredient in self.ingredients:
+            if ingredient.seasonings or ingredient.mask is not None or ingredient.opacity != 100:
+                return np.stack([self.cook(pixels) for pixels in frames])
+
+        cooked_frames = frames
+
+        for ingredient in self.ingredients:
+            cooked_frames = ingredient.cook_batch(cooked_frames).astype('uint8', copy=False)
+
+        return np.clip(cooked_frames, 0, 255)
+
+    def cook_indexed(
+            self, pixels: np.ndarray, frame_cache: FrameCache = None
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        cook to palette indices and a palette if the last ingredient is a Quantize
+        that covers the pixels under it (no seasonings, mask, or partial opacity)
+
+        :return: (width, height) indices and (n, 3) palette, or None if the recipe can't
+        """
+        if not self.ends_indexed():
+            return None
+
+        under_pixels = Recipe(ingredients=self.ingredients[:-1]).cook(pixels, frame_cache)
+
+        return self.ingredients[-1].cook_indexed(under_pixels)
+
+    def cook_batch_indexed(self, frames: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        cook a stack of frames to palette indices and one palette,
+        if the last ingredient is a Quantize that uses one palette for a batch
+
+        :return: (frames, width, height) indices and (n, 3) palette, or None if the recipe can't
+        """
+        if not self.ends_indexed() or not self.ingredients[-1].shared_palette:
+            return None
+
+        under_frames = Recipe(ingredients=self.ingredients[:-1]).cook_batch(frames)
+
+        return self.ingredients[-1].cook_batch_indexed(under_frames)
+
+    def ends_indexed(self) -> bool:
+        """
+        whether the recipe cooks to palette indices with cook_indexed
+        """
+        if len(self.ingredients) == 0:
+            return False
+
+        ingredient = self.ingredients[-1]
+
+        return (
+                isinstance(ingredient, Quantize) and not ingredient.seasonings
+                and ingredient.mask is None and ingredient.opacity == 100
+        )
+
+    def cook_frame(self, pixels: np.ndarray, frame_cache: FrameCache):
+        return self.cook(pixels, frame_cache)
+
+    def preview(self) -> 'Recipe':
+        """
+        a recipe of the preview of each ingredient
+        """
+        recipe = Recipe(
+            ingredients=[ingredient.preview() for ingredient in self.ingredients],
+            opacity=self.opacity,
+            mask=self.mask
+        )
+        recipe.seasonings = self.seasonings
+
+        return recipe
+
     def add(self, ingredient: Ingredient):
         """
         Add an ingredient
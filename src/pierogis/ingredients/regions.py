@@ -0,0 +1,176 @@
+"""
+cook an ingredient only over the regions its mask selects
+"""
+import copy
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .cache import FrameCache
+
+MAX_BOXES = 16
+"""most boxes to cook separately, masks with more runs of lines are cooked in one box"""
+REGION_FRACTION = .75
+"""boxes covering more of the frame than this are cooked as the whole frame"""
+
+
+def region_halos(ingredient: 'Ingredient') -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    pixels a region needs on either side along each axis (None for the whole axis),
+    or None if the ingredient can't be cooked in regions
+
+    the mask has to be known before cooking,
+    so it can only come from the ingredient's mask and seasonings that depend only on shape
+
+    :param ingredient: ingredient with a mask or seasonings
+    """
+    if not all(seasoning.shape_only for seasoning in ingredient.seasonings):
+        return None
+
+    halos = ingredient.region_halo(0), ingredient.region_halo(1)
+
+    if halos == (None, None):
+        return None
+
+    return halos
+
+
+def mask_boxes(binary_array: np.ndarray) -> List[Tuple[slice, slice]]:
+    """
+    boxes covering the true pixels of a (width, height) mask,
+    one for each run of connected lines along axis 0 with a true pixel in them
+
+    :param binary_array: (width, height) bool mask
+    """
+    filled = np.any(binary_array, axis=1)
+
+    edges = np.diff(filled.astype(np.dtype('int8')), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    boxes = []
+
+    for start, end in zip(starts, ends):
+        columns = np.flatnonzero(np.any(binary_array[start:end], axis=0))
+        boxes.append((slice(start, end), slice(columns[0], columns[-1] + 1)))
+
+    return boxes
+
+
+def bounding_box(boxes: List[Tuple[slice, slice]]) -> Tuple[slice, slice]:
+    """
+    one box covering every box
+    """
+    return (
+        slice(min(box[0].start for box in boxes), max(box[0].stop for box in boxes)),
+        slice(min(box[1].start for box in boxes), max(box[1].stop for box in boxes)),
+    )
+
+
+def region_around(
+        box: Tuple[slice, slice], halos: Tuple[Optional[int], Optional[int]], shape: tuple
+) -> Tuple[slice, slice]:
+    """
+    a box with halos more pixels on either side along each axis,
+    or the whole axis where a halo is None
+
+    :param box: box of pixels
+    :param halos: pixels to add along each axis
+    :param shape: shape of the frame the box is in
+    """
+    region = []
+
+    for axis, halo in enumerate(halos):
+        length = shape[axis]
+
+        if halo is None:
+            region.append(slice(0, length))
+        else:
+            region.append(slice(max(box[axis].start - halo, 0), min(box[axis].stop + halo, length)))
+
+    return region[0], region[1]
+
+
+def box_pixels(boxes: List[Tuple[slice, slice]]) -> int:
+    """
+    number of pixels in some boxes, counting overlaps again
+    """
+    return sum((box[0].stop - box[0].start) * (box[1].stop - box[1].start) for box in boxes)
+
+
+def cook_boxes(
+        ingredient: 'Ingredient',
+        pixels: np.ndarray,
+        cooked_pixels: np.ndarray,
+        boxes: List[Tuple[slice, slice]],
+        regions: List[Tuple[slice, slice]]
+) -> None:
+    """
+    cook the region around each box and write the box of it into cooked_pixels
+
+    :param ingredient: ingredient to cook
+    :param pixels: (width, height, 3) frame
+    :param cooked_pixels: (width, height, 3) frame to write the cooked boxes into
+    :param boxes: boxes to write
+    :param regions: region of pixels around each box to cook
+    """
+    for box, region in zip(boxes, regions):
+        cooked_region = ingredient.cook_frame(pixels[region], FrameCache())
+
+        cooked_pixels[box] = cooked_region[tuple(
+            slice(box[axis].start - region[axis].start, box[axis].stop - region[axis].start)
+            for axis in (0, 1)
+        )]
+
+
+def cook_regions(
+        ingredient: 'Ingredient',
+        pixels: np.ndarray,
+        mask: np.ndarray,
+        halos: Tuple[Optional[int], Optional[int]],
+        frame_cache: FrameCache = None
+) -> np.ndarray:
+    """
+    cook an ingredient over boxes around the white pixels of its mask,
+    each box with the pixels around it the ingredient needs to cook the same as the whole frame
+
+    pixels outside the boxes are returned uncooked,
+    since they are covered by the uncooked pixels when the output is layered anyway
+
+    :param ingredient: ingredient to cook
+    :param pixels: (width, height, 3) frame
+    :param mask: (width, height, 3) black and white mask of the ingredient
+    :param halos: from region_halos
+    :param frame_cache: used if the whole frame is cooked
+    """
+    binary_array = np.all(mask == 255, axis=2)
+    boxes = mask_boxes(binary_array)
+
+    if len(boxes) == 0:
+        return pixels
+
+    if halos[0] is None or len(boxes) > MAX_BOXES:
+        # boxes covering whole lines along axis 0 would overlap
+        boxes = [bounding_box(boxes)]
+
+    regions = [region_around(box, halos, pixels.shape) for box in boxes]
+
+    if box_pixels(regions) > REGION_FRACTION * pixels.shape[0] * pixels.shape[1]:
+        if frame_cache is None:
+            frame_cache = FrameCache()
+
+        return ingredient.cook_frame(pixels, frame_cache)
+
+    # the region is cooked with its piece of the mask instead of seasonings,
+    # which would be cooked on the region's shape
+    region_ingredient = copy.copy(ingredient)
+    region_ingredient.seasonings = []
+
+    cooked_pixels = pixels.copy()
+
+    for box, region in zip(boxes, regions):
+        region_ingredient.mask = mask[region]
+
+        cook_boxes(region_ingredient, pixels, cooked_pixels, [box], [region])
+
+    return cooked_pixels
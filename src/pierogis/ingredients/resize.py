@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Tuple, Union
 
 import numpy as np
 from PIL import Image
@@ -56,12 +56,13 @@ class Resize(Ingredient):
             resample = self.FILTERS[resample]
         self.resample = resample
 
-    def cook(self, pixels: np.ndarray):
-        pierogi = Pierogi(pixels=pixels)
-
-        width = pixels.shape[0]
-        height = pixels.shape[1]
+    def get_size(self, width: int, height: int) -> Tuple[int, int]:
+        """
+        get the size that pixels of a width and height would be resized to
 
+        :param width: width of the pixels to resize
+        :param height: height of the pixels to resize
+        """
         if self.width is not None and self.height is not None:
             width = self.width
             height = self.height
@@ -78,6 +79,47 @@ class Resize(Ingredient):
         width *= self.scale
         height *= self.scale
 
-        pierogi.resize(int(width), int(height), self.resample)
+        return int(width), int(height)
+
+    def cook(self, pixels: np.ndarray):
+        pierogi = Pierogi(pixels=pixels)
+
+        pierogi.resize(*self.get_size(pixels.shape[0], pixels.shape[1]), self.resample)
 
         return pierogi.pixels
+
+    @staticmethod
+    def nearest_indices(length: int, resized_length: int) -> np.ndarray:
+        """
+        source index of each position along an axis resized with nearest neighbor,
+        stepping through source positions the same way PIL does
+
+        :param length: length of the axis
+        :param resized_length: length to resize the axis to
+        """
+        step = length / resized_length
+
+        positions = np.full(resized_length, step)
+        positions[0] = step * .5
+
+        return np.minimum(np.cumsum(positions).astype(int), length - 1)
+
+    def cook_batch(self, frames: np.ndarray):
+        """
+        nearest neighbor resizes a stack of frames by indexing,
+        other filters resize each frame with PIL
+        """
+        if self.resample != Image.NEAREST:
+            return super().cook_batch(frames)
+
+        width, height = frames.shape[1:3]
+        resized_width, resized_height = self.get_size(width, height)
+
+        # Pierogi.resize leaves pixels alone unless both dimensions change
+        if resized_width == width or resized_height == height:
+            return frames
+
+        x_indices = self.nearest_indices(width, resized_width)
+        y_indices = self.nearest_indices(height, resized_height)
+
+        return frames[:, x_indices][:, :, y_indices]
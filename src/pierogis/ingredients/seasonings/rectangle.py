@@ -17,6 +17,8 @@ class Rectangle(Seasoning):
 
     ORIGIN: Direction = Direction.SW
 
+    shape_only = True
+
     def prep(
             self,
             width: Union[int, float] = None, height: Union[int, float] = None,
@@ -44,6 +46,12 @@ class Rectangle(Seasoning):
             origin = Direction(origin)
         self.origin = origin
 
+    def shape_key(self):
+        return (
+            type(self), self.width, self.height, self.x, self.y, self.aspect, self.origin,
+            tuple(self.include_pixel), tuple(self.exclude_pixel)
+        )
+
     def cook(self, pixels: np.ndarray):
         # create an array of all excludes
 
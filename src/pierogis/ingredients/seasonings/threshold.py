@@ -4,6 +4,7 @@ threshold ingredient(s)
 import numpy as np
 
 from .seasoning import Seasoning
+from ..cache import FrameCache
 
 
 class Threshold(Seasoning):
@@ -12,7 +13,8 @@ class Threshold(Seasoning):
     in the :param target pixel array and sets corresponding colors based on
     if it is "included" or not
 
-    brightness = r * 0.299 + g * 0.587 + b * 0.114
+    brightness = (r * 77 + g * 150 + b * 29) >> 8
+    (fixed point r * 0.299 + g * 0.587 + b * 0.114)
     """
 
     LOWER_THRESHOLD = 60
@@ -22,6 +24,13 @@ class Threshold(Seasoning):
     upper_threshold: int
     inner: bool
     """if True, pixels between lower and upper are included"""
+    dependence = 'pointwise'
+
+    BACKENDS = {
+        'numpy': 'cook_np',
+        'rust': 'cook_rs_serial',
+        'rust-parallel': 'cook_rs',
+    }
 
     def prep(
             self,
@@ -59,61 +68,171 @@ class Threshold(Seasoning):
         self.upper_threshold = upper_threshold
         self.inner = inner
 
-    def cook(self, pixels: np.ndarray):
+    def cook(self, pixels: np.ndarray, out: np.ndarray = None):
+        """
+        parallel computation in rust is 10x speedup for large frames,
+        but small frames are faster in one thread or in numpy,
+        so the fastest backend is timed and used
+
+        :param pixels: (..., 3) pixels, a frame or a stack of frames
+        :param out: uint8 array the shape of pixels to write to, allocated if not provided
+
+        :return: out
+        """
+        if out is None:
+            out = np.empty(pixels.shape, dtype=np.dtype('uint8'))
+
+        return self.cook_tuned(pixels, out)
+
+    def cook_batch(self, frames: np.ndarray, out: np.ndarray = None):
         """
-        parallel computation in rust is 10x speedup
+        threshold a stack of frames in one call
         """
-        input_pixels = pixels.copy()
+        return self.cook(frames, out)
+
+    def cook_mask(self, pixels: np.ndarray, out: np.ndarray = None):
+        """
+        whether each pixel is included, without filling in include and exclude pixels
+
+        :param pixels: (..., 3) pixels, a frame or a stack of frames
+        :param out: bool array the shape of pixels without channels to write to,
+            allocated if not provided
+
+        :return: out
+        """
+        if out is None:
+            out = np.empty(pixels.shape[:-1], dtype=np.dtype(bool))
 
         try:
-            cooked_pixels = self.cook_rs(input_pixels)
-        except:
-            cooked_pixels = self.cook_np(input_pixels)
-
-        return cooked_pixels
-
-    def cook_np(self, pixels: np.ndarray):
-        # perform the same operation as Threshold.cook, but only in numpy
-        include_pixels = np.resize(self.include_pixel, pixels.shape)
-        exclude_pixels = np.resize(self.exclude_pixel, pixels.shape)
-
-        # use exclude_pixels as the base
-        cooked_pixels = exclude_pixels
-        # get intensities from average of rgb
-        intensities_array = np.sum(
-            pixels * np.asarray([0.299, 0.587, 0.114]), axis=2
-        )
+            from ...algorithms import threshold_mask
+
+            lower_threshold, upper_threshold, inner = self._integer_thresholds()
+
+            threshold_mask(
+                np.ascontiguousarray(pixels, dtype=np.dtype('uint8')), out,
+                lower_threshold, upper_threshold,
+                inner
+            )
+            self.backend = 'rust'
+
+        except ImportError:
+            out[...] = self.included(FrameCache.compute_luma(pixels))
+            self.backend = 'numpy'
+
+        return out
+
+    def cook_frame(self, pixels: np.ndarray, frame_cache: FrameCache):
+        """
+        use the brightness of the frame from the cache
+        """
+        return self.cook_luma(frame_cache.luma(pixels))
+
+    def cook_np(self, pixels: np.ndarray, out: np.ndarray = None):
+        """
+        perform the same operation as cook_rs in numpy
+        """
+        return self.cook_luma(FrameCache.compute_luma(pixels), out)
+
+    def included(self, intensities_array: np.ndarray) -> np.ndarray:
+        """
+        whether each brightness value is included
+        """
         if self.inner:
             # if intensity >= lower and <= upper, include
-            boolean_array = np.logical_and(
+            return np.logical_and(
                 intensities_array <= self.upper_threshold,
                 intensities_array >= self.lower_threshold
             )
         else:
             # if intensity <= lower or >= upper, include
-            boolean_array = np.logical_or(
+            return np.logical_or(
                 intensities_array >= self.upper_threshold,
                 intensities_array <= self.lower_threshold
             )
 
+    def cook_luma(self, intensities_array: np.ndarray, out: np.ndarray = None):
+        """
+        threshold an array of brightness values,
+        (width, height) for a frame or (frames, width, height) for a stack
+
+        :param out: uint8 array to write to, allocated if not provided
+        """
+        boolean_array = self.included(intensities_array)
+
+        if out is None:
+            out = np.empty((*boolean_array.shape, 3), dtype=np.dtype('uint8'))
+
         # set True values in boolean_array to include_pixel
-        cooked_pixels[boolean_array] = include_pixels[boolean_array]
+        out[...] = self.exclude_pixel
+        np.copyto(out, self.include_pixel.astype(np.dtype('uint8')), where=boolean_array[..., np.newaxis])
 
-        return cooked_pixels
+        return out
 
-    def cook_rs(self, pixels: np.ndarray):
+    def cook_rs(self, pixels: np.ndarray, out: np.ndarray = None, parallel: bool = True):
+        """
+        threshold with integer brightness in rust
+
+        :param parallel: cook chunks of pixels in parallel
+        """
         from ...algorithms import threshold
 
-        include_pixel = self.include_pixel.astype(np.dtype('uint8'))
-        exclude_pixel = self.exclude_pixel.astype(np.dtype('uint8'))
+        if out is None:
+            out = np.empty(pixels.shape, dtype=np.dtype('uint8'))
+
+        lower_threshold, upper_threshold, inner = self._integer_thresholds()
 
-        # cook using the rust function
-        cooked_pixels = threshold(
-            pixels.astype(np.dtype('uint8')),
-            self.lower_threshold, self.upper_threshold,
-            include_pixel,
-            exclude_pixel,
-            self.inner
+        # the output is written while the input is read in chunks
+        if np.may_share_memory(pixels, out):
+            pixels = pixels.copy()
+
+        threshold(
+            np.ascontiguousarray(pixels, dtype=np.dtype('uint8')), out,
+            lower_threshold, upper_threshold,
+            self.include_pixel.astype(np.dtype('uint8')),
+            self.exclude_pixel.astype(np.dtype('uint8')),
+            inner,
+            parallel
         )
 
-        return cooked_pixels
+        return out
+
+    def cook_rs_serial(self, pixels: np.ndarray, out: np.ndarray = None):
+        """
+        threshold in rust in one thread
+        """
+        return self.cook_rs(pixels, out, parallel=False)
+
+    def _integer_thresholds(self):
+        """
+        (lower, upper, inner) thresholds as uint8 values for the rust kernel
+        that include the same integer brightnesses as the thresholds
+
+        bounds outside of 0-255 can't be clipped into range without including 0 or 255,
+        so a side of an outer threshold that includes nothing is dropped by turning it inner,
+        and thresholds that include nothing are an empty inner range
+        """
+        nothing = (255, 0, True)
+
+        if self.inner:
+            lower_threshold = np.ceil(self.lower_threshold)
+            upper_threshold = np.floor(self.upper_threshold)
+
+            if lower_threshold > upper_threshold or lower_threshold > 255 or upper_threshold < 0:
+                return nothing
+
+            return int(max(lower_threshold, 0)), int(min(upper_threshold, 255)), True
+
+        lower_threshold = np.floor(self.lower_threshold)
+        upper_threshold = np.ceil(self.upper_threshold)
+
+        if lower_threshold < 0 and upper_threshold > 255:
+            return nothing
+        elif lower_threshold < 0:
+            # only brightnesses above the upper threshold
+            return int(max(upper_threshold, 0)), 255, True
+        elif upper_threshold > 255:
+            # only brightnesses below the lower threshold
+            return 0, int(min(lower_threshold, 255)), True
+
+        # a side past the other end of the range includes everything, which clipping keeps
+        return int(min(lower_threshold, 255)), int(max(upper_threshold, 0)), False
@@ -1,5 +1,8 @@
+from typing import Optional
+
 import numpy as np
 
+from .cache import FrameCache, pixel_cache
 from .crop import Crop
 from .ingredient import Ingredient
 from .rotate import Rotate
@@ -16,6 +19,8 @@ class Sort(Ingredient):
     or have it preloaded using a season method
     """
 
+    dependence = 'lines'
+
     delimiter: np.ndarray
     """pixel used as the sort subgroup delimiter"""
     rotate: Rotate
@@ -36,22 +41,61 @@ class Sort(Ingredient):
 
         self.rotate = rotate
 
+    @property
+    def line_axis(self) -> Optional[int]:
+        """
+        pixels are sorted within columns, or rows after an odd number of right angle turns
+
+        None if the rotation isn't a right angle
+        """
+        angle = self.rotate.turns * self.rotate.angle
+
+        if angle % 90 != 0:
+            return None
+
+        return 1 if angle // 90 % 2 == 0 else 0
+
     def cook(self, pixels: np.ndarray):
         """
         cook sorts from bottom to top after rotation, then unrotates.
         sort within each sequence group of contiguous white pixels
         in the mask (may be all white)
         """
+        return self.cook_frame(pixels, FrameCache())
+
+    def cook_frame(self, pixels: np.ndarray, frame_cache: FrameCache):
+        """
+        the brightness and seasoning masks of the frame
+        are shared with other ingredients through the cache
+        """
         # rotate self.mask and pixels to correspond to self.angle
         rotate = self.rotate
 
-        mask = self.mask_pixels(pixels)
+        if not self.seasonings and self.mask is None:
+            # the whole frame is sorted, so the rotated mask only depends on shape
+            def load_boolean_array():
+                return np.all(rotate.cook(self.mask_pixels(pixels)) == self._white_pixel, axis=2)
+
+            key = (
+                type(self), rotate.turns, rotate.angle, rotate.clockwise, rotate.resample, pixels.shape
+            )
+            boolean_array = pixel_cache.load(key, load_boolean_array)
+
+        else:
+            mask = self.mask_pixels(pixels, frame_cache)
+            rotated_mask = rotate.cook(mask)
+
+            # false indicates that the pixel should not be sorted
+            boolean_array = np.all(rotated_mask == self._white_pixel, axis=2)
 
-        rotated_mask = rotate.cook(mask)
         rotated_pixels = rotate.cook(pixels)
 
-        # false indicates that the pixel should not be sorted
-        boolean_array = np.all(rotated_mask == self._white_pixel, axis=2)
+        # without a rotation this is the same brightness a Threshold seasoning used
+        intensities = frame_cache.luma(rotated_pixels)
+
+        # without a rotation this is the input itself, which may be read only
+        if rotated_pixels is pixels:
+            rotated_pixels = rotated_pixels.copy()
 
         sorted_pixels = rotated_pixels
         # loop through one axis
@@ -64,19 +108,17 @@ class Sort(Ingredient):
             masked_indices_axis = np.nonzero(np.invert(boolean_axis))[0]
             # split up the axis into sub groups at indices where mask is black (false)
             sort_groups = np.split(axis, masked_indices_axis)
+            intensity_groups = np.split(intensities[i], masked_indices_axis)
 
             sorted_groups = []
             # loop through the groups
-            for group in sort_groups:
+            for group, group_intensities in zip(sort_groups, intensity_groups):
                 # np.sort(group)
                 # if the subgroup to be sorted contains 0 or 1 pixels, ignore
                 if group.size > 3:
-                    # intensity as the sorting criterion
-                    intensities = np.sum(
-                        group * np.asarray([0.299, 0.587, 0.114]), axis=1
-                    )
                     # get "sort order" indices of the intensities of this group
-                    indices = np.argsort(intensities)
+                    # (stable, since equal brightness is common)
+                    indices = np.argsort(group_intensities, kind='stable')
                     # sort the group by these indices
                     group = group[indices]
                 sorted_groups.append(group)
@@ -0,0 +1,81 @@
+"""
+cook frames too large for memory a tile of lines at a time
+"""
+import numpy as np
+
+from .bands import band_axis, cook_bands, lines
+
+TILE_BYTES = 64 * 1024 ** 2
+"""size of the input lines cooked at once"""
+
+
+def tile_lines(pixels: np.ndarray, axis: int, tile_bytes: int = TILE_BYTES) -> int:
+    """
+    number of lines along an axis that fit in tile_bytes
+
+    :param pixels: (width, height, 3) frame
+    :param axis: axis the tiles are cut across
+    :param tile_bytes: size of a tile
+    """
+    line_bytes = pixels.nbytes // max(pixels.shape[axis], 1)
+
+    return max(1, tile_bytes // max(line_bytes, 1))
+
+
+def cook_tiles(
+        ingredient: 'Ingredient',
+        pixels: np.ndarray,
+        path: str,
+        threads: int = 1,
+        tile_bytes: int = TILE_BYTES
+) -> bool:
+    """
+    cook a frame a tile of lines at a time,
+    writing each cooked tile into a memory mapped .npy file as soon as it is done
+
+    with memory mapped pixels (.npy or uncompressed images),
+    only a tile of the input, its cooked temporaries, and a tile of the output
+    are resident at a time
+
+    :param ingredient: ingredient (or recipe) to cook
+    :param pixels: (width, height, 3) frame, usually memory mapped
+    :param path: .npy path to write the cooked frame to
+    :param threads: cook bands of each tile on this many threads
+    :param tile_bytes: size of the input lines cooked at once
+
+    :return: False without writing anything if the ingredient needs the whole frame
+    """
+    axis_halo = band_axis(ingredient, pixels)
+
+    if axis_halo is None:
+        return False
+
+    axis, halo = axis_halo
+    length = pixels.shape[axis]
+    lines_per_tile = tile_lines(pixels, axis, tile_bytes)
+
+    cooked_pixels = np.lib.format.open_memmap(path, mode='w+', dtype=np.dtype('uint8'), shape=pixels.shape)
+
+    try:
+        for start in range(0, length, lines_per_tile):
+            end = min(start + lines_per_tile, length)
+
+            halo_start = max(start - halo, 0)
+            halo_end = min(end + halo, length)
+
+            # read the tile from the file
+            tile = np.array(lines(pixels, axis, halo_start, halo_end))
+
+            cooked_tile = cook_bands(ingredient, tile, threads)
+
+            lines(cooked_pixels, axis, start, end)[...] = np.clip(
+                lines(cooked_tile, axis, start - halo_start, end - halo_start), 0, 255
+            )
+
+            # write the tile back so its pages can be dropped
+            cooked_pixels.flush()
+
+    finally:
+        del cooked_pixels
+
+    return True
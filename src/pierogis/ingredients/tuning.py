@@ -0,0 +1,143 @@
+"""
+choose between backends of an ingredient by timing them
+"""
+import threading
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+class Autotuner:
+    """
+    times each backend of an ingredient the first time it cooks pixels of a shape and dtype,
+    then keeps cooking pixels of that shape and dtype with the fastest one
+
+    which backend is fastest changes with frame size,
+    parallel backends have a startup cost per call that small frames don't make up for
+
+    large frames are timed on a crop of their leading corner,
+    then cooked once with the fastest backend
+    """
+
+    REPEATS = 3
+    """times each backend is run when timing it, the fastest run counts"""
+    TIMING_LINES = 512
+    """backends are timed on at most this many lines along each axis of a frame"""
+
+    def __init__(self, repeats: int = REPEATS, timing_lines: int = TIMING_LINES):
+        """
+        :param repeats: times each backend is run when timing it
+        :param timing_lines: lines along each axis of the crop backends are timed on
+        """
+        self.repeats = repeats
+        self.timing_lines = timing_lines
+        self._choices: Dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._choices)
+
+    @staticmethod
+    def key(ingredient: 'Ingredient', pixels: np.ndarray) -> Hashable:
+        """
+        what a backend choice is kept by
+        """
+        return type(ingredient), pixels.shape, pixels.dtype.str
+
+    def choice(self, ingredient: 'Ingredient', pixels: np.ndarray):
+        """
+        backend chosen for an ingredient and pixels like these, None if none has been yet
+        """
+        with self._lock:
+            return self._choices.get(self.key(ingredient, pixels))
+
+    def timing_crop(self, pixels: np.ndarray) -> Optional[Tuple[slice, ...]]:
+        """
+        slices of the leading corner of pixels that backends are timed on,
+        None if pixels are small enough to time whole
+
+        every axis but the channels is cropped
+
+        :param pixels: (..., 3) pixels, a frame or a stack of frames
+        """
+        if all(length <= self.timing_lines for length in pixels.shape[:-1]):
+            return None
+
+        return tuple(slice(0, self.timing_lines) for _ in pixels.shape[:-1])
+
+    def cook(self, ingredient: 'Ingredient', pixels: np.ndarray, *args):
+        """
+        cook with the chosen backend of an ingredient, timing its backends to choose one if needed
+
+        backends that raise ImportError (an extension that isn't built) are skipped
+
+        array arguments shaped like pixels (like an output array) are cropped with them for timing
+
+        :param ingredient: ingredient with BACKENDS
+        :param pixels: pixels to cook
+        :param args: extra arguments to the backend methods
+        """
+        backend = self.choice(ingredient, pixels)
+
+        if backend is not None:
+            ingredient.backend = backend
+            return getattr(ingredient, ingredient.BACKENDS[backend])(pixels, *args)
+
+        crop = self.timing_crop(pixels)
+
+        if crop is None:
+            timing_pixels = pixels
+            timing_args = args
+        else:
+            timing_pixels = np.ascontiguousarray(pixels[crop])
+            timing_args = [
+                np.ascontiguousarray(arg[crop])
+                if isinstance(arg, np.ndarray) and arg.shape[:len(crop)] == pixels.shape[:len(crop)]
+                else arg
+                for arg in args
+            ]
+
+        fastest_time = None
+        cooked_pixels = None
+        error = None
+
+        for backend, method_name in ingredient.BACKENDS.items():
+            method = getattr(ingredient, method_name)
+
+            try:
+                for _ in range(self.repeats):
+                    start = time.perf_counter()
+                    backend_cooked_pixels = method(timing_pixels, *timing_args)
+                    elapsed = time.perf_counter() - start
+
+                    if fastest_time is None or elapsed < fastest_time:
+                        fastest_time = elapsed
+                        cooked_pixels = backend_cooked_pixels
+                        ingredient.backend = backend
+
+            except ImportError as import_error:
+                error = import_error
+
+        if fastest_time is None:
+            raise error
+
+        with self._lock:
+            self._choices[self.key(ingredient, pixels)] = ingredient.backend
+
+        if crop is not None:
+            # only the crop was cooked
+            cooked_pixels = getattr(ingredient, ingredient.BACKENDS[ingredient.backend])(pixels, *args)
+
+        return cooked_pixels
+
+    def clear(self) -> None:
+        """
+        forget every choice
+        """
+        with self._lock:
+            self._choices.clear()
+
+
+autotuner = Autotuner()
+"""autotuner shared by everything in this process"""
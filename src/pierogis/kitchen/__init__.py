@@ -1,5 +1,7 @@
 from .chef import Chef
+from .journal import Journal
 from .kitchen import Kitchen
 from .order import Order
+from .pantry import Pantry
 from .server import Server
 from .ticket import Ticket
@@ -1,11 +1,17 @@
+import os
 from abc import abstractmethod
-from typing import Dict, List, Protocol
+from typing import Dict, List, Optional, Protocol, Tuple
+
+import numpy as np
 
 from .menu import Filling
 from .ticket import Ticket, PierogiDesc, IngredientDesc
 from ..ingredients import (
-    Ingredient, Dish, Pierogi, Recipe
+    Crop, Ingredient, Dish, Pierogi, Recipe, RecipeGraph, Resize
 )
+from ..ingredients.graph import BASE, Node
+from ..ingredients.cache import pixel_cache
+from ..probe import probe
 
 
 class Cooker(Protocol):
@@ -16,10 +22,37 @@ class Cooker(Protocol):
     @abstractmethod
     def cook_dish(
             self,
-            dish: Dish
+            dish: Dish,
+            threads: int = 1
     ) -> Dish:
         pass
 
+    @abstractmethod
+    def cook_dish_to(
+            self,
+            dish: Dish,
+            path: str,
+            threads: int = 1,
+            compress_level: int = None
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def cook_dish_incremental(
+            self,
+            dish: Dish,
+            previous: Dish = None,
+            previous_cooked: Dish = None
+    ) -> Dish:
+        pass
+
+    @abstractmethod
+    def cook_dishes(
+            self,
+            dishes: List[Dish]
+    ) -> List[Dish]:
+        pass
+
 
 class Chef(Cooker):
     """gets dishes from tickets and cooks"""
@@ -28,16 +61,25 @@ class Chef(Cooker):
     def create_pierogi_objects(
             cls,
             pierogi_descs: Dict[str, PierogiDesc],
-            files: Dict[str, str]
+            files: Dict[str, str],
+            base: str = None
     ) -> Dict[str, Pierogi]:
         """
         exchange a set of PierogiDesc keyed by a name
         with Pierogi loaded from file links
+
+        pierogis other than the base are usually the same file for every ticket
+        (like an overlay or mask), so they are loaded through the process-wide pixel cache
+
+        :param base: key of the pierogi being cooked
         """
         pierogi_objects = {}
 
         for pierogi_key, pierogi_desc in pierogi_descs.items():
-            pierogi_obj = pierogi_desc.create(files)
+            if pierogi_key == base:
+                pierogi_obj = pierogi_desc.create(files)
+            else:
+                pierogi_obj = pierogi_desc.create(files, cache=pixel_cache)
 
             pierogi_objects[pierogi_key] = pierogi_obj
 
@@ -148,6 +190,195 @@ class Chef(Cooker):
 
         return recipe
 
+    @classmethod
+    def create_graph_object(
+            cls,
+            ingredients: Dict[str, Ingredient],
+            recipe_order: List[str],
+            links: Dict[str, dict],
+            pierogis: Dict[str, Pierogi],
+            base: str
+    ) -> RecipeGraph:
+        """
+        create a recipe graph whose nodes are named by ingredient uuid
+
+        an ingredient without a link cooks the output of the one before it in the recipe,
+        and the last ingredient in the recipe cooks the output of the graph
+
+        :param ingredients: map of uuid key to ingredient object value
+        :param recipe_order: order of ingredients by uuid
+        :param links: map of ingredient uuid to the outputs it uses
+        :param pierogis: map of uuid key to pierogi, usable as outputs
+        :param base: uuid of the pierogi the graph is cooked on
+        """
+
+        def name(key: str) -> str:
+            return BASE if key == base else key
+
+        nodes = {}
+        previous = BASE
+
+        for ingredient_key in recipe_order:
+            link = links.get(ingredient_key, {})
+
+            nodes[ingredient_key] = Node(
+                ingredients[ingredient_key],
+                pixels=name(link.get('pixels', previous)),
+                masks=[name(mask) for mask in link.get('masks', [])],
+                under=None if link.get('under') is None else name(link['under'])
+            )
+
+            previous = ingredient_key
+
+        inputs = {key: pierogi for key, pierogi in pierogis.items() if key != base}
+
+        return RecipeGraph(nodes=nodes, inputs=inputs)
+
+    @classmethod
+    def plan_loading(
+            cls,
+            recipe: Recipe,
+            width: int,
+            height: int
+    ) -> Tuple[int, Optional[Tuple[int, int, int, int]], Optional[Tuple[int, int]], int]:
+        """
+        find the leading crops and resize of a recipe
+        that can be done while loading its base pierogi instead
+
+        crops are only planned before a resize, and only one resize is planned.
+        ingredients with seasonings, a mask, or partial opacity are never planned
+
+        :param recipe: recipe that will cook the pierogi
+        :param width: width of the pierogi before cooking
+        :param height: height of the pierogi before cooking
+
+        :return: number of leading ingredients planned,
+            (left, bottom, right, top) box to crop to,
+            (width, height) size to resize to,
+            and resample filter
+        """
+        steps = 0
+        box = None
+        size = None
+        resample = Pierogi.RESIZE_RESAMPLE
+
+        for ingredient in recipe.ingredients:
+            if ingredient.seasonings or ingredient.mask is not None or ingredient.opacity != 100:
+                break
+
+            if isinstance(ingredient, Crop):
+                if size is not None:
+                    break
+
+                left, bottom, right, top = ingredient.get_box(width, height)
+
+                if not (0 <= left < right <= width and 0 <= bottom < top <= height):
+                    break
+
+                if box is not None:
+                    left, bottom, right, top = (
+                        box[0] + left, box[1] + bottom, box[0] + right, box[1] + top
+                    )
+
+                box = (left, bottom, right, top)
+                width = right - left
+                height = top - bottom
+
+            elif isinstance(ingredient, Resize):
+                if size is not None:
+                    break
+
+                resized_width, resized_height = ingredient.get_size(width, height)
+
+                if resized_width <= 0 or resized_height <= 0:
+                    break
+
+                # Pierogi.resize leaves pixels alone unless both dimensions change
+                if resized_width != width and resized_height != height:
+                    size = (resized_width, resized_height)
+                    resample = ingredient.resample
+                    width, height = size
+
+            else:
+                break
+
+            steps += 1
+
+        return steps, box, size, resample
+
+    @classmethod
+    def push_down(
+            cls,
+            ticket: Ticket,
+            pierogis: Dict[str, Pierogi],
+            recipe: Recipe
+    ) -> None:
+        """
+        move leading crops and resize of a recipe into the loading of its base pierogi
+        so the full size frame is never loaded
+
+        previews are also scaled down by the ticket's preview scale while loading
+
+        ingredients created with the base pierogi keep the one loaded at full size
+
+        :param ticket: ticket being assembled
+        :param pierogis: map of uuid keys to created Pierogi, base is replaced
+        :param recipe: recipe to remove the planned ingredients from,
+            a graph only has its base and inputs scaled for previews
+        """
+        base_desc = ticket.pierogis[ticket.base]
+        base_path = ticket.files[base_desc.files_key]
+
+        if not os.path.isfile(base_path):
+            return
+
+        width, height = probe(base_path).size
+
+        if isinstance(recipe, Recipe):
+            steps, box, size, resample = cls.plan_loading(
+                recipe, width, height
+            )
+        else:
+            # the ingredients of a graph don't all cook the base pierogi
+            steps, box, size, resample = 0, None, None, Pierogi.RESIZE_RESAMPLE
+
+        if ticket.preview_scale is not None:
+            if size is None:
+                if box is not None:
+                    width, height = box[2] - box[0], box[3] - box[1]
+
+                size = (width, height)
+
+            size = (
+                max(1, round(size[0] * ticket.preview_scale)),
+                max(1, round(size[1] * ticket.preview_scale))
+            )
+
+        if steps > 0 or size is not None:
+            pierogis[ticket.base] = base_desc.create(
+                ticket.files, box=box, size=size, resample=resample
+            )
+
+            if steps > 0:
+                recipe.ingredients = recipe.ingredients[steps:]
+
+        if ticket.preview_scale is not None and isinstance(recipe, RecipeGraph):
+            # pierogis cooked and layered along with the base are scaled the same way
+            for pierogi_key in recipe.inputs:
+                pierogi_desc = ticket.pierogis[pierogi_key]
+                pierogi_path = ticket.files[pierogi_desc.files_key]
+
+                if not os.path.isfile(pierogi_path):
+                    continue
+
+                width, height = probe(pierogi_path).size
+                size = (
+                    max(1, round(width * ticket.preview_scale)),
+                    max(1, round(height * ticket.preview_scale))
+                )
+
+                recipe.inputs[pierogi_key] = pierogi_desc.create(ticket.files, size=size)
+
     @classmethod
     def assemble_ticket(cls, ticket: Ticket, menu: Dict[str, Filling]) -> Dish:
         """
@@ -162,7 +393,8 @@ class Chef(Cooker):
 
         pierogis = cls.create_pierogi_objects(
             pierogi_descs,
-            files
+            files,
+            base
         )
 
         ingredients = cls.create_ingredient_objects(
@@ -176,9 +408,37 @@ class Chef(Cooker):
             seasoning_links
         )
 
-        recipe_object = cls.create_recipe_object(
-            ingredients,
-            recipe
+        if ticket.links:
+            recipe_object = cls.create_graph_object(
+                ingredients,
+                recipe,
+                ticket.links,
+                pierogis,
+                base
+            )
+        else:
+            recipe_object = cls.create_recipe_object(
+                ingredients,
+                recipe
+            )
+
+        if ticket.preview_scale is not None:
+            recipe_object = recipe_object.preview()
+
+        if ticket.seconds is not None:
+            budgeted = [ingredient for ingredient in recipe_object.ingredients if ingredient.budgeted]
+
+            # the ingredients that can cut down their work share the ticket's budget
+            for ingredient in budgeted:
+                seconds = ticket.seconds / len(budgeted)
+
+                if ingredient.seconds is None or ingredient.seconds > seconds:
+                    ingredient.seconds = seconds
+
+        cls.push_down(
+            ticket,
+            pierogis,
+            recipe_object
         )
 
         return Dish(
@@ -189,9 +449,70 @@ class Chef(Cooker):
     @classmethod
     def cook_dish(
             cls,
-            dish: Dish
+            dish: Dish,
+            threads: int = 1
     ) -> Dish:
         """
+        :param threads: cook bands of the dish's frame on this many threads
+        """
+        return dish.serve(threads=threads)
 
+    @classmethod
+    def cook_dish_to(
+            cls,
+            dish: Dish,
+            path: str,
+            threads: int = 1,
+            compress_level: int = None
+    ) -> None:
+        """
+        cook a dish straight into a file, a tile at a time if it can be
+
+        :param path: path to save the cooked dish to
+        :param threads: cook bands of the dish's frame on this many threads
+        :param compress_level: zlib level for png outputs
+        """
+        dish.serve_to(path, threads=threads, compress_level=compress_level)
+
+    @classmethod
+    def cook_dish_incremental(
+            cls,
+            dish: Dish,
+            previous: Dish = None,
+            previous_cooked: Dish = None
+    ) -> Dish:
         """
-        return dish.serve()
+        cook a dish by recooking only what changed from the previous frame's dish
+
+        :param previous: dish of the previous frame, with the same recipe
+        :param previous_cooked: what cooking the previous dish returned
+        """
+        return dish.serve_incremental(previous, previous_cooked)
+
+    @classmethod
+    def cook_dishes(
+            cls,
+            dishes: List[Dish]
+    ) -> List[Dish]:
+        """
+        cook dishes with the same recipe and pierogi shape in one batch
+
+        the pixels of every dish are stacked
+        and cooked with the first dish's recipe
+
+        :param dishes: dishes cooking the same recipe on same shaped pierogis
+        """
+        frames = np.stack([dish.pierogi.pixels for dish in dishes])
+        recipe = dishes[0].recipe
+
+        # recipes ending in a quantize can keep the palette indices
+        indexed = recipe.cook_batch_indexed(frames)
+
+        if indexed is not None:
+            indices, palette = indexed
+
+            return [Dish(pierogi=Dish.indexed_pierogi(frame_indices, palette)) for frame_indices in indices]
+
+        cooked_frames = recipe.cook_batch(frames)
+
+        return [Dish(pierogi=Pierogi(pixels=cooked_pixels)) for cooked_pixels in cooked_frames]
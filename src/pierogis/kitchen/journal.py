@@ -0,0 +1,103 @@
+"""
+append-only record of cooked frames for resuming orders
+"""
+import hashlib
+import json
+import os
+from typing import Dict
+
+from .ticket import Ticket
+
+
+class Journal:
+    """
+    append-only record of the tickets cooked for an order
+
+    each line is a json entry with the frame index, output path,
+    hash of the recipe it was cooked with, and a checksum of the output file.
+    the last entry for an output path wins.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: file to append entries to
+        """
+        self.path = path
+
+    @staticmethod
+    def checksum(path: str) -> str:
+        """
+        md5 hex digest of a file's contents
+
+        :param path: file to checksum
+        """
+        file_hash = hashlib.md5()
+
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                file_hash.update(chunk)
+
+        return file_hash.hexdigest()
+
+    def record(self, frame_index: int, output_path: str, recipe_hash: str) -> None:
+        """
+        append an entry for a cooked output file
+
+        :param frame_index: index of the frame in its order
+        :param output_path: path the cooked frame was written to
+        :param recipe_hash: Ticket.recipe_hash of the ticket cooked
+        """
+        entry = {
+            'frame_index': frame_index,
+            'output_path': output_path,
+            'recipe_hash': recipe_hash,
+            'checksum': self.checksum(output_path)
+        }
+
+        line = (json.dumps(entry) + '\n').encode()
+
+        # one small write with O_APPEND won't interleave with other processes
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def entries(self) -> Dict[str, dict]:
+        """
+        read the latest entry for each output path
+
+        lines that were only partially written are ignored
+        """
+        entries = {}
+
+        if os.path.isfile(self.path):
+            with open(self.path) as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+
+                    entries[entry['output_path']] = entry
+
+        return entries
+
+    @classmethod
+    def is_cooked(cls, ticket: Ticket, entries: Dict[str, dict]) -> bool:
+        """
+        check that a ticket's output exists, is complete,
+        and was cooked with the same recipe
+
+        :param ticket: ticket with output_path set
+        :param entries: entries read from a journal
+        """
+        entry = entries.get(ticket.output_path)
+
+        if entry is None or not os.path.isfile(ticket.output_path):
+            return False
+
+        if entry['recipe_hash'] != ticket.recipe_hash:
+            return False
+
+        return entry['checksum'] == cls.checksum(ticket.output_path)
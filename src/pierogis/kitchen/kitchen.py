@@ -6,17 +6,19 @@ import sys
 import tempfile
 import time
 from collections import defaultdict
-from typing import Callable, List, Dict
+from typing import Callable, List, Dict, Optional
 
-import imageio
+import numpy as np
 
 from . import menu
 from .chef import Cooker
+from .journal import Journal
 from .menu import Filling
 from .order import Order
 from .ticket import Ticket
 from ..course import Course
 from ..ingredients import Pierogi, Dish
+from ..probe import probe
 
 
 def initializer():
@@ -30,6 +32,15 @@ class Kitchen:
 
     _pool: mp.Pool
 
+    BATCH_PIXELS = 256 * 256
+    """frames with this many pixels or fewer are cooked in batches"""
+    BATCH_BYTES = 16 * 1024 ** 2
+    """size of the frames stacked in a batch"""
+    BATCH_FRAMES = 32
+    """number of frames stacked in a batch"""
+    TILE_PIXELS = 8192 * 8192
+    """frames with more pixels than this are cooked into .npy outputs a tile at a time"""
+
     def _start_pool(self, processes: int):
         self.pool = mp.Pool(processes, initializer=initializer)
 
@@ -59,6 +70,7 @@ class Kitchen:
         if raw_dir is None:
             raw_dir = tempfile.mkdtemp(suffix='raw')
         self.raw_dir = raw_dir
+        self._presaved_paths = []
 
     def __getstate__(self):
         self_dict = self.__dict__.copy()
@@ -72,20 +84,182 @@ class Kitchen:
     def cook_ticket(
             cls,
             cooker: Cooker,
-            ticket: Ticket
+            ticket: Ticket,
+            journal: Journal = None,
+            compress_level: int = None,
+            threads: int = 1
     ) -> None:
-        """cook a ticket with a thread pool"""
+        """
+        cook a ticket and save it to its output path
+
+        the output is written to a temp file and renamed into place,
+        so a ticket's output_path is never a partially written file
+
+        :param journal: record the cooked output here if provided
+        :param compress_level: zlib level for png outputs
+        :param threads: cook bands of the ticket's frame on this many threads
+        """
+        # get the hash before assembling swaps descriptions for objects
+        recipe_hash = ticket.recipe_hash
+
         dish = cooker.assemble_ticket(ticket, cls.menu)
-        cooked_dish = cooker.cook_dish(dish)
-        cooked_dish.pierogi.save(ticket.output_path)
 
-    def _presave_ticket(self, frame, ticket: Ticket):
+        if (
+                os.path.splitext(ticket.output_path)[1] == '.npy'
+                and dish.pierogi.width * dish.pierogi.height > cls.TILE_PIXELS
+        ):
+            # too large to hold the whole cooked frame, so cook straight into the output file
+            temp_path = cls._temp_path(ticket)
+            cooker.cook_dish_to(dish, temp_path, threads, compress_level)
+            os.replace(temp_path, ticket.output_path)
+
+            if journal is not None:
+                journal.record(ticket.frame_index, ticket.output_path, recipe_hash)
+
+            return
+
+        cooked_dish = cooker.cook_dish(dish, threads)
+
+        cls._serve_ticket(cooked_dish, ticket, recipe_hash, journal, compress_level)
+
+    @classmethod
+    def cook_tickets(
+            cls,
+            cooker: Cooker,
+            tickets: List[Ticket],
+            journal: Journal = None,
+            compress_level: int = None
+    ) -> None:
+        """
+        cook tickets in batches and save each to its output path
+
+        tickets with the same recipe hash and base pierogi shape
+        are cooked together with Cooker.cook_dishes
+
+        :param journal: record the cooked outputs here if provided
+        :param compress_level: zlib level for png outputs
+        """
+        batches = defaultdict(list)
+
+        for ticket in tickets:
+            # get the hash before assembling swaps descriptions for objects
+            recipe_hash = ticket.recipe_hash
+
+            dish = cooker.assemble_ticket(ticket, cls.menu)
+
+            batches[(recipe_hash, dish.pierogi.pixels.shape)].append((ticket, dish))
+
+        for (recipe_hash, _), batch in batches.items():
+            cooked_dishes = cooker.cook_dishes([dish for _, dish in batch])
+
+            for (ticket, _), cooked_dish in zip(batch, cooked_dishes):
+                cls._serve_ticket(cooked_dish, ticket, recipe_hash, journal, compress_level)
+
+    @classmethod
+    def cook_tickets_incremental(
+            cls,
+            cooker: Cooker,
+            tickets: List[Ticket],
+            journal: Journal = None,
+            compress_level: int = None
+    ) -> None:
+        """
+        cook a run of consecutive tickets in order,
+        recooking only the parts of each frame that changed from the frame before it
+
+        :param journal: record the cooked outputs here if provided
+        :param compress_level: zlib level for png outputs
+        """
+        previous_hash = None
+        previous = None
+        previous_cooked = None
+
+        for ticket in tickets:
+            # get the hash before assembling swaps descriptions for objects
+            recipe_hash = ticket.recipe_hash
+
+            dish = cooker.assemble_ticket(ticket, cls.menu)
+
+            if recipe_hash != previous_hash:
+                # the previous output was cooked with a different recipe
+                previous = None
+                previous_cooked = None
+
+            cooked_dish = cooker.cook_dish_incremental(dish, previous, previous_cooked)
+
+            cls._serve_ticket(cooked_dish, ticket, recipe_hash, journal, compress_level)
+
+            previous_hash = recipe_hash
+            previous = dish
+            previous_cooked = cooked_dish
+
+    @staticmethod
+    def _serve_ticket(
+            cooked_dish: Dish,
+            ticket: Ticket,
+            recipe_hash: str,
+            journal: Journal = None,
+            compress_level: int = None
+    ) -> None:
+        """save a ticket's cooked dish to its output path and journal it"""
+        temp_path = Kitchen._temp_path(ticket)
+
+        cooked_dish.pierogi.save(temp_path, compress_level=compress_level)
+        os.replace(temp_path, ticket.output_path)
+
+        if journal is not None:
+            journal.record(ticket.frame_index, ticket.output_path, recipe_hash)
+
+    @staticmethod
+    def _temp_path(ticket: Ticket) -> str:
+        """hidden path next to a ticket's output path to write it to before renaming"""
+        output_dir, output_filename = os.path.split(ticket.output_path)
+
+        return os.path.join(output_dir, '.' + output_filename)
+
+    def _batch_size(self, order: Order) -> int:
+        """
+        number of frames to cook in one batch
+
+        frames of BATCH_PIXELS or fewer are small enough
+        that the per call overhead of cooking one frame dominates,
+        so they are cooked in batches of up to BATCH_BYTES and BATCH_FRAMES
+        """
+        if not os.path.isfile(order.input_path):
+            return 1
+
+        width, height = probe(order.input_path).size
+
+        if width * height > self.BATCH_PIXELS:
+            return 1
+
+        return max(1, min(self.BATCH_FRAMES, self.BATCH_BYTES // (width * height * 3)))
+
+    @staticmethod
+    def _read_frame(order: Order, ticket: Ticket) -> np.ndarray:
+        """read the base frame of a ticket from the order's input"""
+        frame_index = ticket.pierogis[ticket.base].frame_index
+
+        if order.pantry is not None:
+            return order.pantry.frames(order.input_path)[frame_index]
+
+        return order.reader.get_data(frame_index)
+
+    def _presave_ticket(self, frame: np.ndarray, ticket: Ticket, compress_level: int = None):
+        """
+        save a ticket's base frame in the raw dir for cooking from
+
+        the frame is saved in the same format as the ticket's output
+        """
         if not os.path.isdir(self.raw_dir):
             os.makedirs(self.raw_dir)
 
         input_filename = os.path.join(self.raw_dir, os.path.basename(ticket.output_path))
-        writer = imageio.get_writer(input_filename)
-        writer.append_data(frame)
+        Pierogi(
+            pixels=np.rot90(frame[:, :, :3], axes=(1, 0))
+        ).save(input_filename, compress_level=compress_level)
+
+        self._presaved_paths.append(input_filename)
 
         pierogi_desc = ticket.pierogis[ticket.base]
         ticket.files[pierogi_desc.files_key] = input_filename
@@ -108,21 +282,20 @@ class Kitchen:
             # sync cooking
             start = time.perf_counter()
             for ticket in next_tickets:
-                self.cook_ticket(self.cooker, ticket)
+                self.cook_ticket(self.cooker, ticket, order.journal, order.compress_level)
             seq_rate = seq_pilot_frames / (time.perf_counter() - start)
 
             if order.presave is None:
                 next_frame_index = frame_index + 2
                 next_tickets = tickets[frame_index:next_frame_index]
-                order.reader.set_image_index(next_tickets[0].pierogis[next_tickets[0].base].frame_index)
                 frame_index = next_frame_index
                 # sync cooking with presave frames
                 presave_start = time.perf_counter()
 
                 for ticket in next_tickets:
-                    frame = order.reader.get_next_data()
-                    self._presave_ticket(frame, ticket)
-                    self.cook_ticket(self.cooker, ticket)
+                    frame = self._read_frame(order, ticket)
+                    self._presave_ticket(frame, ticket, order.compress_level)
+                    self.cook_ticket(self.cooker, ticket, order.journal, order.compress_level)
 
                 presave_rate = seq_pilot_frames / (time.perf_counter() - presave_start)
 
@@ -149,14 +322,14 @@ class Kitchen:
                     par_presave_start = time.perf_counter()
 
                     for ticket in next_tickets:
-                        frame = order.reader.get_next_data()
-                        self._presave_ticket(frame, ticket)
+                        frame = self._read_frame(order, ticket)
+                        self._presave_ticket(frame, ticket, order.compress_level)
 
                         def error_callback(exception: Exception):
                             order.failures.put((exception, ticket))
 
                         results.append(self.pool.apply_async(
-                            self.cook_ticket, (self.cooker, ticket), error_callback=error_callback
+                            self.cook_ticket, (self.cooker, ticket, order.journal, order.compress_level), error_callback=error_callback
                         ))
 
                     for result in results:
@@ -183,7 +356,7 @@ class Kitchen:
                             order.failures.put((exception, ticket))
 
                         results.append(self.pool.apply_async(
-                            self.cook_ticket, (self.cooker, ticket), error_callback=error_callback
+                            self.cook_ticket, (self.cooker, ticket, order.journal, order.compress_level), error_callback=error_callback
                         ))
 
                     for result in results:
@@ -211,6 +384,17 @@ class Kitchen:
         if not os.path.isdir(cooked_dir):
             os.makedirs(cooked_dir)
 
+        journal_name = order.order_name
+        if journal_name is None:
+            journal_name = os.path.basename(order.input_path)
+
+        order.journal = Journal(os.path.join(cooked_dir, '.' + journal_name + '.journal'))
+
+        if order.resume:
+            journal_entries = order.journal.entries()
+        else:
+            journal_entries = {}
+
         suborders = defaultdict(list)
 
         for ticket in order.tickets:
@@ -235,16 +419,19 @@ class Kitchen:
                     '{suborder_base}{frame_suffix}{extension}'.format(
                         suborder_base=os.path.splitext(suborder_name)[0],
                         frame_suffix=frame_suffix,
-                        extension='.png'
+                        extension='.' + order.frame_format
                     )
                 )
 
+                ticket.output_path = output_path
+                ticket.frame_index = frame_index
+
                 if os.path.isfile(output_path):
                     input_is_output = os.path.samefile(ticket.input_path, output_path)
 
-                    # this is really rough and can be solved by a system
-                    # for manipulating courses/animations as a whole
-                    if order.resume:
+                    # only skip outputs the journal shows are complete
+                    # and cooked with this same recipe
+                    if order.resume and Journal.is_cooked(ticket, journal_entries):
                         ticket.skip = True
                     elif input_is_output:
                         if not os.path.isdir(self.raw_dir):
@@ -258,63 +445,189 @@ class Kitchen:
                     else:
                         os.remove(output_path)
 
-                ticket.output_path = output_path
                 frame_index += 1
 
     def queue_order(
             self, order: Order, report_status: Callable
     ):
+        if order.progressive and order.incremental:
+            # incremental runs diff each frame with the one before it in frame order
+            raise ValueError("progressive orders can't be cooked incrementally")
+
+        start = time.perf_counter()
+
         self._set_output_paths(order)
 
         report_status(order, status='preprocessing')
 
         if not os.path.isfile(order.input_path):
             order.presave = False
+            order.pantry = None
+
+        if order.pantry is not None:
+            # decode the input once so tickets can read frames from the pantry
+            order.pantry.stock(order.input_path)
+
+            for ticket in order.tickets:
+                ticket.pierogis[ticket.base].pantry = order.pantry
 
         next_tickets = self._auto_pilot(order)
 
+        if order.progressive:
+            next_tickets = self._progressive_tickets(order, next_tickets)
+
+        if order.time_budget is not None and len(next_tickets) > 0:
+            # the time left is shared by the tickets left, on each process cooking them
+            workers = (order.processes or os.cpu_count()) if order.cook_async else 1
+            time_left = max(order.time_budget - (time.perf_counter() - start), 0)
+
+            for ticket in next_tickets:
+                ticket.seconds = time_left * workers / len(next_tickets)
+
         report_status(order, status='cooking')
 
-        for ticket in next_tickets:
+        if order.incremental:
+            # each process cooks a run of consecutive frames, so it has the frame before each one
+            runs = max(1, order.processes or os.cpu_count()) if order.cook_async else 1
+            batch_size = max(1, -(-len(next_tickets) // runs))
+        else:
+            batch_size = self._batch_size(order)
+
+        for batch_start in range(0, len(next_tickets), batch_size):
+            batch = next_tickets[batch_start:batch_start + batch_size]
+
             if order.presave:
-                next_frame_index = next_tickets[0].pierogis[next_tickets[0].base].frame_index
-                if next_frame_index > 0:
-                    order.reader.set_frame_index(next_frame_index)
+                for ticket in batch:
+                    frame = self._read_frame(order, ticket)
+                    self._presave_ticket(frame, ticket, order.compress_level)
+
+            if order.incremental:
+                func = self.cook_tickets_incremental
+                args = (self.cooker, batch, order.journal, order.compress_level)
+            elif len(batch) > 1:
+                func = self.cook_tickets
+                args = (self.cooker, batch, order.journal, order.compress_level)
+            else:
+                # a lone frame has the processes to itself, so it is cooked in bands
+                threads = (order.processes or os.cpu_count()) if len(next_tickets) == 1 else 1
 
-                frame = order.reader.get_next_data()
-                self._presave_ticket(frame, ticket)
+                func = self.cook_ticket
+                args = (self.cooker, batch[0], order.journal, order.compress_level, threads)
 
             if order.cook_async:
                 if self.pool is None:
                     self._start_pool(order.processes)
 
-                def error_callback(exception: Exception):
-                    order.failures.put((exception, ticket))
+                def error_callback(exception: Exception, batch=batch):
+                    for ticket in batch:
+                        order.failures.put((exception, ticket))
 
                 self.pool.apply_async(
-                    func=self.cook_ticket,
-                    args=(self.cooker, ticket),
+                    func=func,
+                    args=args,
                     error_callback=error_callback
                 )
 
             else:
-                self.cook_ticket(self.cooker, ticket)
+                func(*args)
 
         if self.pool is not None:
             self.pool.close()
             self.pool.join()
 
+        self._clean_raw_dir()
+
+    def _clean_raw_dir(self):
+        """remove frames presaved for cooking from the raw dir"""
+        for presaved_path in self._presaved_paths:
+            if os.path.isfile(presaved_path):
+                os.remove(presaved_path)
+
+        self._presaved_paths = []
+
+    @staticmethod
+    def progressive_level(index: int, stride: int) -> int:
+        """
+        largest power of 2 up to stride that divides a frame index,
+        frames of higher levels are cooked first in progressive order
+        """
+        while stride > 1 and index % stride != 0:
+            stride //= 2
+
+        return stride
+
+    def _progressive_tickets(self, order: Order, tickets: List[Ticket]) -> List[Ticket]:
+        """
+        order tickets so every PROGRESSIVE_STRIDE-th frame is cooked first,
+        then every half as many frames, and so on
+        """
+        positions = {id(ticket): position for position, ticket in enumerate(order.tickets)}
+
+        return sorted(
+            tickets,
+            key=lambda ticket: -self.progressive_level(positions[id(ticket)], order.PROGRESSIVE_STRIDE)
+        )
+
+    @staticmethod
+    def cooked_stride(order: Order) -> Optional[int]:
+        """
+        smallest power of 2 stride (up to PROGRESSIVE_STRIDE) whose frames are all cooked,
+        1 if every frame is cooked, or None if not even the first frame is
+
+        frames only count as cooked if the order's journal shows they were cooked with its recipe,
+        outputs left by other runs don't
+        """
+        if order.journal is None:
+            return None
+
+        entries = order.journal.entries()
+        cooked = {}
+
+        def is_cooked(frame_index: int) -> bool:
+            if frame_index not in cooked:
+                ticket = order.tickets[frame_index]
+                cooked[frame_index] = ticket.output_path is not None and Journal.is_cooked(ticket, entries)
+
+            return cooked[frame_index]
+
+        stride = 1
+
+        while stride <= order.PROGRESSIVE_STRIDE:
+            if all(is_cooked(frame_index) for frame_index in range(0, len(order.tickets), stride)):
+                return stride
+
+            stride *= 2
+
+        return None
+
     def plate(
             self,
-            order: Order
+            order: Order,
+            partial: bool = False
     ) -> str:
-        """"""
+        """
+        plate the cooked frames of an order to its output path
+
+        :param partial: plate the evenly spaced frames that have been cooked so far,
+            at a lower frame rate, as an order cooked in progressive order goes
+        """
         dishes = []
 
         if len(order.tickets) == 0:
             raise Exception("Order has no tickets")
 
-        for ticket in order.tickets:
+        stride = 1
+        tickets = order.tickets
+
+        if partial:
+            stride = self.cooked_stride(order)
+
+            if stride is None:
+                raise Exception("Order has no evenly spaced cooked frames")
+
+            tickets = order.tickets[::stride]
+
+        for ticket in tickets:
             frame_path = ticket.output_path
 
             dish = Dish(pierogi=Pierogi.from_path(path=frame_path))
@@ -327,11 +640,20 @@ class Kitchen:
         optimize = order.optimize
         frame_duration = order.duration
 
+        # fewer frames last as long as all of them
+        if fps is not None:
+            fps /= stride
+        if frame_duration is not None:
+            frame_duration *= stride
+
         course.save(
             order.output_path,
             optimize=optimize,
             duration=frame_duration,
-            fps=fps
+            fps=fps,
+            segments=order.segments,
+            # a segment is made of whole batches of cooked frames
+            align=self._batch_size(order)
         )
 
         return order.output_path
@@ -1,4 +1,5 @@
 from .custom_filling import CustomFilling
+from .dither_filling import DitherFilling
 from .filling import Filling
 from .quantize_filling import QuantizeFilling
 from .resize_filling import ResizeFilling
@@ -17,4 +18,5 @@ menu = {
     RotateFilling.type_name: RotateFilling,
     CropFilling.type_name: CropFilling,
     MMPXFilling.type_name: MMPXFilling,
+    DitherFilling.type_name: DitherFilling,
 }
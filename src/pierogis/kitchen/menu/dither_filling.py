@@ -0,0 +1,33 @@
+from .filling import Filling
+from ...ingredients import Dither
+
+
+class DitherFilling(Filling):
+    type_name = 'dither'
+    type = Dither
+
+    @classmethod
+    def add_parser_arguments(cls, parser):
+        """
+        add palette and dithering pattern to this parser
+        """
+        parser.add_argument(
+            '-c', '--colors',
+            nargs='+', default=Dither.COLORS,
+            help='hex color codes to dither to'
+        )
+        parser.add_argument(
+            '-m', '--method',
+            choices=Dither.METHODS, default=Dither.METHOD,
+            help='dithering pattern to use'
+        )
+        parser.add_argument(
+            '--level',
+            type=float, default=Dither.LEVEL,
+            help='relative amount of dithering'
+        )
+        parser.add_argument(
+            '--matrix-size',
+            type=int, default=Dither.MATRIX_SIZE,
+            help='size of the bayer threshold matrix (power of 2)'
+        )
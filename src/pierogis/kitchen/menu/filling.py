@@ -1,6 +1,7 @@
 import argparse
 from abc import ABC, abstractmethod
 
+from ..pantry import Pantry
 from ..ticket import Ticket, IngredientDesc
 from ...ingredients import Ingredient
 
@@ -69,6 +70,47 @@ class Filling(ABC):
             action='store_true',
             help="resume from already cooked frames in the cooked directory with the same order name"
         )
+        parser.add_argument(
+            '--source-cache',
+            nargs='?',
+            const=Pantry.DIR,
+            help="decode input frames once into this dir and reuse them in later runs"
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            default=None,
+            help="recook only the parts of each frame that changed from the frame before it"
+        )
+        parser.add_argument(
+            '--preview',
+            action='store_true',
+            default=None,
+            help="quickly cook a rough proxy at a smaller size, of every few frames"
+        )
+        parser.add_argument(
+            '--progressive',
+            action='store_true',
+            default=None,
+            help="cook every 16th frame first, then every 8th, and so on; "
+                 "if interrupted, the evenly spaced frames cooked so far are plated"
+        )
+        parser.add_argument(
+            '--time-budget',
+            type=float,
+            help="seconds to cook the order in; ingredients like quantize cut down their work to fit"
+        )
+        parser.add_argument(
+            '--frame-format',
+            choices=['png', 'npy'],
+            help="format for cooked and presaved frames; npy is uncompressed"
+        )
+        parser.add_argument(
+            '--compress-level',
+            type=int,
+            choices=range(10),
+            help="zlib compression level for cooked and presaved png frames"
+        )
 
         # get extra parser arguments from subclasses
         cls.add_parser_arguments(parser)
@@ -5,3 +5,14 @@ from ...ingredients import MMPX
 class MMPXFilling(Filling):
     type_name = 'mmpx'
     type = MMPX
+
+    @classmethod
+    def add_parser_arguments(cls, parser):
+        """
+        add factor to the parser
+        """
+        parser.add_argument(
+            '-f', '--factor',
+            type=int, default=MMPX.FACTOR,
+            help='power of 2 to scale by (2, 4, 8, ...)'
+        )
@@ -25,6 +25,12 @@ class QuantizeFilling(Filling):
             help='number of colors in the palette'
         )
 
+        parser.add_argument(
+            '--extract',
+            action='store_true',
+            help='extract the palette with median cut instead of optimizing it'
+        )
+
         parser.add_argument(
             '--iterations',
             type=int, default=SpatialQuantize.ITERATIONS, dest='iterations',
@@ -50,3 +56,8 @@ class QuantizeFilling(Filling):
             type=float, default=SpatialQuantize.DITHERING_LEVEL,
             help='repeats per annealing temperature'
         )
+        parser.add_argument(
+            '--frame-seconds',
+            type=float, dest='seconds',
+            help='time budget to quantize a frame in; repeats, iterations and temperatures are cut to fit'
+        )
@@ -5,6 +5,8 @@ from typing import List, Union, Tuple
 
 import imageio
 
+from .journal import Journal
+from .pantry import Pantry
 from .ticket import Ticket
 
 
@@ -18,6 +20,28 @@ class Order:
     presave: bool = None
     cook_async: bool = None
     processes: int = None
+    journal: Journal = None
+    pantry: Pantry = None
+    frame_format: str = 'png'
+    """format of cooked and presaved frames (png or npy)"""
+    compress_level: int = 1
+    """zlib level of cooked and presaved png frames"""
+    segments: int = 1
+    """number of video segments to encode at the same time"""
+    incremental: bool = False
+    """recook only the parts of each frame that changed from the frame before it"""
+    preview: bool = False
+    """cook a quick, rough proxy of the order"""
+    PREVIEW_SCALE = .25
+    """scale that frames of a preview are loaded at"""
+    PREVIEW_STRIDE = 4
+    """a preview cooks every this many frames"""
+    progressive: bool = False
+    """cook every PROGRESSIVE_STRIDE-th frame first, then every half as many, and so on"""
+    PROGRESSIVE_STRIDE = 16
+    """frames between the first frames cooked in progressive order"""
+    time_budget: float = None
+    """seconds to cook the order in, shared by its tickets"""
     _reader = None
 
     @property
@@ -52,9 +76,22 @@ class Order:
     def output_path(self) -> str:
         order_name = self.order_name
 
-        if self._output_path is None:
+        if self._output_path is None and self._given_output_path is not None:
+            output_path = self._given_output_path
+
+            if self.preview:
+                # a preview never replaces the full render
+                base, ext = os.path.splitext(output_path)
+                output_path = base + '-preview' + ext
+
+            self._output_path = output_path
+
+        elif self._output_path is None:
             if order_name is None:
                 order_name = os.path.splitext(os.path.basename(self.input_path))[0]
+            if self.preview:
+                order_name += '-preview'
+
             if self.frames == 1:
                 output_path = order_name + '.png'
             elif self.frames == 0:
@@ -94,12 +131,18 @@ class Order:
             processes: int = None,
             resume: bool = None,
             frames_filter: str = None,
+            pantry: Pantry = None,
+            frame_format: str = None,
+            compress_level: int = None,
+            segments: int = None,
+            incremental: bool = None,
     ):
         self._order_name = order_name
         self.input_path = input_path
         self.tickets = []
         self.failures = Queue()
-        self._output_path = output_path
+        self._output_path = None
+        self._given_output_path = output_path
         self._output_dir = output_dir
         self.fps = fps
         self.duration = duration
@@ -112,11 +155,24 @@ class Order:
         self.processes = processes
         self.resume = resume
         self._frames_filter = frames_filter
+        self.pantry = pantry
+
+        if frame_format is not None:
+            self.frame_format = frame_format
+        if compress_level is not None:
+            self.compress_level = compress_level
+        if segments is not None:
+            self.segments = segments
+        if incremental is not None:
+            self.incremental = incremental
 
     def add_ticket(self, ticket: Ticket):
         self.tickets.append(ticket)
 
     def frames_filter(self, i: int, frames: int) -> bool:
+        if self.preview and i % self.PREVIEW_STRIDE != 0:
+            return False
+
         if self._frames_filter is not None:
             return eval(self._frames_filter)
         else:
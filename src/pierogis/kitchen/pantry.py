@@ -0,0 +1,153 @@
+"""
+persistent store of decoded source frames
+"""
+import hashlib
+import json
+import os
+from typing import Callable
+
+import imageio
+import numpy as np
+
+
+class Pantry:
+    """
+    opt-in cache of decoded source frames
+
+    the frames of an input file are decoded once into a raw frame store
+    that later runs memory map instead of decoding again.
+
+    stores are keyed by the input's path, size, and modified time,
+    and the least recently used stores are evicted past max_bytes
+    """
+
+    DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pierogis', 'pantry')
+    MAX_BYTES = 4 * 1024 ** 3
+
+    def __init__(self, cache_dir: str = DIR, max_bytes: int = MAX_BYTES):
+        """
+        :param cache_dir: dir to keep frame stores in
+        :param max_bytes: total size of frame stores to keep
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _key(self, path: str) -> str:
+        stat = os.stat(path)
+        key_text = '{}:{}:{}'.format(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+        return hashlib.sha1(key_text.encode()).hexdigest()
+
+    def _store_paths(self, path: str):
+        store_base = os.path.join(self.cache_dir, self._key(path))
+
+        return store_base + '.raw', store_base + '.json'
+
+    def is_stocked(self, path: str) -> bool:
+        """
+        check if the frames of a file are already in the pantry
+
+        :param path: input file path
+        """
+        return os.path.isfile(self._store_paths(path)[1])
+
+    def stock(self, path: str) -> None:
+        """
+        decode every frame of a file into the pantry if it isn't there already
+
+        :param path: input file path
+        """
+        if self.is_stocked(path):
+            return
+
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        raw_path, meta_path = self._store_paths(path)
+
+        frames = 0
+        frame_shape = None
+
+        temp_raw_path = '{}.{}'.format(raw_path, os.getpid())
+
+        with open(temp_raw_path, 'wb') as raw_file:
+            for frame in imageio.get_reader(path):
+                frame = np.ascontiguousarray(frame[:, :, :3], dtype='uint8')
+
+                if frame_shape is None:
+                    frame_shape = frame.shape
+
+                raw_file.write(frame.tobytes())
+                frames += 1
+
+        os.replace(temp_raw_path, raw_path)
+
+        # the meta file is written last, so its presence means the store is complete
+        temp_meta_path = '{}.{}'.format(meta_path, os.getpid())
+        with open(temp_meta_path, 'w') as meta_file:
+            json.dump({'shape': [frames, *frame_shape], 'path': os.path.abspath(path)}, meta_file)
+        os.replace(temp_meta_path, meta_path)
+
+        self._evict(keep=meta_path)
+
+    def frames(self, path: str) -> np.ndarray:
+        """
+        memory map the stored frames of a file as (frames, rows, columns, 3)
+
+        :param path: input file path
+        """
+        self.stock(path)
+
+        raw_path, meta_path = self._store_paths(path)
+
+        with open(meta_path) as meta_file:
+            shape = tuple(json.load(meta_file)['shape'])
+
+        # mark as recently used
+        os.utime(meta_path)
+
+        return np.memmap(raw_path, dtype='uint8', mode='r', shape=shape)
+
+    def loader(self, path: str, frame_index: int = 0) -> Callable[[], np.ndarray]:
+        """
+        create a Pierogi loader that reads a frame from the pantry
+
+        :param path: input file path
+        :param frame_index: frame of the input to load
+        """
+
+        def loader():
+            return np.rot90(self.frames(path)[frame_index], axes=(1, 0))
+
+        return loader
+
+    def _evict(self, keep: str = None) -> None:
+        """
+        delete least recently used stores until the pantry fits in max_bytes
+        """
+        stores = []
+        total_bytes = 0
+
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.json'):
+                continue
+
+            meta_path = os.path.join(self.cache_dir, filename)
+            raw_path = os.path.splitext(meta_path)[0] + '.raw'
+
+            if not os.path.isfile(raw_path):
+                continue
+
+            size = os.path.getsize(raw_path)
+            total_bytes += size
+            stores.append((os.path.getmtime(meta_path), meta_path, raw_path, size))
+
+        for _, meta_path, raw_path, size in sorted(stores):
+            if total_bytes <= self.max_bytes:
+                break
+            if meta_path == keep:
+                continue
+
+            os.remove(meta_path)
+            os.remove(raw_path)
+            total_bytes -= size
@@ -9,13 +9,14 @@ from pathlib import Path
 from threading import Thread
 from typing import List, Callable, Protocol, Union, Dict
 
-import imageio
 from natsort import natsorted
 
 from .kitchen import Kitchen
 from .menu import Filling
 from .order import Order
+from .pantry import Pantry
 from .ticket import Ticket
+from ..probe import probe
 
 
 class OrderTaker(Protocol):
@@ -107,6 +108,11 @@ class Server(OrderTaker):
             action='store_false',
             help="duration in ms"
         )
+        togo_parser.add_argument(
+            '--segments',
+            type=int,
+            help="number of video segments to encode at the same time"
+        )
 
         return togo_parser
 
@@ -121,11 +127,7 @@ class Server(OrderTaker):
         order_name = order.order_name
 
         if os.path.isfile(input_path):
-            reader = imageio.get_reader(input_path)
-            if hasattr(reader, 'count_frames'):
-                frames = reader.count_frames()
-            else:
-                frames = len(reader)
+            frames = probe(input_path).frames
 
             for frame_index in range(frames):
                 ticket = Ticket()
@@ -140,7 +142,8 @@ class Server(OrderTaker):
                 filename
                 for filename
                 in os.listdir(input_path)
-                if filename != ".DS_Store"
+                # hidden files include .DS_Store and kitchen journals
+                if not filename.startswith('.')
             ]
             frame_index = 0
             frames = len(filenames)
@@ -169,7 +172,7 @@ class Server(OrderTaker):
                 filename
                 for filename
                 in os.listdir(order.input_path)
-                if filename != ".DS_Store"
+                if not filename.startswith('.')
             ]
             frame_index = 0
             frames = len(filenames)
@@ -183,7 +186,7 @@ class Server(OrderTaker):
 
                     frame_index += 1
         else:
-            frames = imageio.get_reader(order.input_path).count_frames()
+            frames = probe(order.input_path).frames
             for frame_index in range(frames):
                 ticket = Ticket()
                 if order.frames_filter(frame_index, frames):
@@ -199,15 +202,47 @@ class Server(OrderTaker):
         cook_async = parsed_vars.pop('async')
         processes = parsed_vars.pop('processes')
         resume = parsed_vars.pop('resume')
+        source_cache = parsed_vars.pop('source_cache')
+        frame_format = parsed_vars.pop('frame_format')
+        compress_level = parsed_vars.pop('compress_level')
+        incremental = parsed_vars.pop('incremental')
+        preview = parsed_vars.pop('preview')
+        progressive = parsed_vars.pop('progressive')
+        time_budget = parsed_vars.pop('time_budget')
 
         order.presave = presave
         order.cook_async = cook_async
         order.processes = processes
         order.resume = resume
 
+        if source_cache is not None:
+            order.pantry = Pantry(source_cache)
+        if frame_format is not None:
+            order.frame_format = frame_format
+        if compress_level is not None:
+            order.compress_level = compress_level
+        if incremental is not None:
+            order.incremental = incremental
+        if preview is not None:
+            order.preview = preview
+        if progressive is not None:
+            order.progressive = progressive
+        if time_budget is not None:
+            order.time_budget = time_budget
+
         # order has tickets attached (for frames)
         self._write_tickets(order, parsed_vars)
 
+        if order.preview:
+            for ticket in order.tickets:
+                ticket.preview_scale = order.PREVIEW_SCALE
+
+            # every few frames last as long as all of them
+            if order.fps is not None:
+                order.fps /= order.PREVIEW_STRIDE
+            if order.duration is not None:
+                order.duration *= order.PREVIEW_STRIDE
+
         frames = len(order.tickets)
         self._report_status(order, total=frames)
 
@@ -248,6 +283,7 @@ class Server(OrderTaker):
         fps = parsed_togo_vars.pop('fps')
         optimize = parsed_togo_vars.pop('optimize')
         frame_duration = parsed_togo_vars.pop('frame_duration')
+        segments = parsed_togo_vars.pop('segments')
 
         order = Order(
             order_name, input_path,
@@ -257,17 +293,26 @@ class Server(OrderTaker):
             duration=frame_duration,
             optimize=optimize,
             frames_filter=frames_filter,
+            segments=segments,
         )
 
         if order.fps is None:
             if os.path.isfile(input_path):
-                order.fps = imageio.get_reader(input_path).get_meta_data().get('fps')
+                order.fps = probe(input_path).fps
 
         # if the order is just togo, don't need the kitchen
         if parsed_vars['filling'] == 'togo':
             self._handle_togo(order)
         else:
-            self._handle_filling(order, parsed_vars, kitchen)
+            try:
+                self._handle_filling(order, parsed_vars, kitchen)
+            except KeyboardInterrupt:
+                if order.progressive and kitchen.cooked_stride(order) is not None:
+                    # the frames cooked so far are evenly spaced
+                    self._report_status(order, status='boxing')
+                    kitchen.plate(order=order, partial=True)
+
+                raise
 
         self._report_status(order, status='boxing')
         kitchen.plate(order=order)
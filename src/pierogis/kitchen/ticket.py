@@ -1,26 +1,51 @@
+import hashlib
+import json
 import os
 import uuid
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
+from .pantry import Pantry
 from ..ingredients import Ingredient
 from ..ingredients import Pierogi
+from ..ingredients.cache import PixelCache
 
 
 class PierogiDesc:
-    def __init__(self, files_key: str, frame_index: int = 0):
+    def __init__(self, files_key: str, frame_index: int = 0, pantry: Pantry = None):
         """
-
+        :param pantry: read frames from this pantry if the file is stocked there
         """
         self.files_key = files_key
         self.frame_index = frame_index
+        self.pantry = pantry
 
-    def create(self, files) -> Pierogi:
+    def create(
+            self,
+            files,
+            box: Tuple[int, int, int, int] = None,
+            size: Tuple[int, int] = None,
+            resample: int = Pierogi.RESIZE_RESAMPLE,
+            cache: PixelCache = None
+    ) -> Pierogi:
         """
-
+        :param box: (left, bottom, right, top) to crop to while loading
+        :param size: (width, height) to resize to while loading
+        :param resample: resample filter for resizing
+        :param cache: share loaded pixels through this cache
         """
         file = files[self.files_key]
 
-        return Pierogi.from_path(path=file, frame_index=self.frame_index)
+        if self.pantry is not None and self.pantry.is_stocked(file):
+            pantry_loader = self.pantry.loader(file, self.frame_index)
+
+            def loader():
+                return Pierogi.crop_resize(pantry_loader(), box, size, resample)
+
+            return Pierogi(loader=loader)
+
+        return Pierogi.from_path(
+            path=file, frame_index=self.frame_index, box=box, size=size, resample=resample, cache=cache
+        )
 
 
 class IngredientDesc:
@@ -52,6 +77,12 @@ class Ticket:
     """describe a dish using a json-like object"""
 
     output_path: str = None
+    frame_index: int = None
+    """index of this ticket's frame in its order"""
+    preview_scale: float = None
+    """if set, cook a rough preview with the base pierogi loaded at this scale"""
+    seconds: float = None
+    """if set, time budget for ingredients that cut down their work to fit one"""
 
     @property
     def input_filename(self):
@@ -65,6 +96,71 @@ class Ticket:
     def input_path(self, value: str):
         self.files[self.pierogis[self.base].files_key] = value
 
+    @property
+    def recipe_hash(self) -> str:
+        """
+        hash of the recipe described by this ticket
+
+        uuid keys are swapped for what they reference,
+        and the base pierogi is left out,
+        so tickets cooking the same recipe on different frames hash the same
+        """
+
+        def describe_value(value):
+            if isinstance(value, list):
+                return [describe_value(item) for item in value]
+            elif isinstance(value, str):
+                if value in self.ingredients:
+                    return describe_ingredient(value)
+                elif value == self.base:
+                    return 'base'
+                elif value in self.pierogis:
+                    pierogi_desc = self.pierogis[value]
+                    return [self.files[pierogi_desc.files_key], pierogi_desc.frame_index]
+
+            return value
+
+        def describe_ingredient(ingredient_key):
+            ingredient_desc = self.ingredients[ingredient_key]
+
+            description = {
+                'type_name': ingredient_desc.type_name,
+                'kwargs': {
+                    key: describe_value(value)
+                    for key, value
+                    in ingredient_desc.kwargs.items()
+                },
+                'seasonings': [
+                    describe_ingredient(seasoning_key)
+                    for seasoning_key, recipient_key
+                    in self.seasoning_links.items()
+                    if recipient_key == ingredient_key
+                ]
+            }
+
+            if ingredient_key in self.links:
+                description['links'] = {
+                    name: describe_value(value)
+                    for name, value
+                    in self.links[ingredient_key].items()
+                }
+
+            return description
+
+        recipe = [describe_ingredient(ingredient_key) for ingredient_key in self.recipe]
+
+        if self.preview_scale is not None:
+            # a preview isn't the output of the recipe
+            recipe.append({'preview_scale': self.preview_scale})
+
+        if self.seconds is not None:
+            # neither is an output cut down to fit a time budget
+            recipe.append({'seconds': self.seconds})
+
+        recipe_text = json.dumps(recipe, sort_keys=True, default=str)
+
+        return hashlib.md5(recipe_text.encode()).hexdigest()
+
     def __init__(
             self,
             pierogis: Dict[str, PierogiDesc] = None,
@@ -73,6 +169,7 @@ class Ticket:
             recipe: List[str] = None,
             base: str = None,
             seasoning_links: Dict[str, str] = None,
+            links: Dict[str, dict] = None,
             output_path: str = None,
             skip: bool = False
     ):
@@ -89,6 +186,8 @@ class Ticket:
             recipe = []
         if seasoning_links is None:
             seasoning_links = {}
+        if links is None:
+            links = {}
 
         self.pierogis = pierogis
         self.files = files
@@ -96,6 +195,7 @@ class Ticket:
         self.recipe = recipe
         self.base = base
         self.seasoning_links = seasoning_links
+        self.links = links
         self.output_path = output_path
         self.skip = skip
 
@@ -149,6 +249,35 @@ class Ticket:
 
         self.seasoning_links[seasoning_key] = ingredient_key
 
+    def add_link(
+            self,
+            ingredient_key: str,
+            pixels: str = None,
+            masks: List[str] = None,
+            under: str = None
+    ) -> None:
+        """
+        link an ingredient in the recipe to the outputs it uses,
+        which makes the recipe a graph instead of a sequence
+
+        outputs are named by the uuid of the ingredient that cooks them or of a pierogi
+
+        :param ingredient_key: uuid of the ingredient to link
+        :param pixels: output the ingredient cooks, the one before it in the recipe if not given
+        :param masks: outputs that are white where the ingredient's cooked pixels are used
+        :param under: output used where the masks aren't white, pixels if not given
+        """
+        link = {}
+
+        if pixels is not None:
+            link['pixels'] = pixels
+        if masks is not None:
+            link['masks'] = masks
+        if under is not None:
+            link['under'] = under
+
+        self.links[ingredient_key] = link
+
 
 class SeasoningLink:
     def __init__(self, seasoning_key, target_key, recipient_key):
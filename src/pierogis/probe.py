@@ -0,0 +1,251 @@
+"""
+read media dimensions, frame rate, and frame count without decoding frames
+"""
+import functools
+import hashlib
+import json
+import os
+import subprocess
+from typing import List, Optional, Tuple
+
+import imageio_ffmpeg
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+
+class Probe:
+    """
+    size, frame rate, and frame count of a media file read from its headers
+
+    for videos, frame timestamps are read from the container packets (not decoded)
+    the first time they are needed and kept in a frame index file in DIR,
+    keyed by the file's path, size, and modified time.
+    the least recently used index files are evicted past MAX_BYTES
+    """
+
+    DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pierogis', 'probe')
+    MAX_BYTES = 16 * 1024 ** 2
+
+    width: int
+    height: int
+    fps: Optional[float]
+    format: Optional[str]
+    """PIL format name of images"""
+    mode: Optional[str]
+    """PIL mode of images"""
+    is_video: bool
+
+    def __init__(self, path: str, cache_dir: str = None, max_bytes: int = None):
+        """
+        :param path: media file to probe
+        :param cache_dir: dir to keep frame index files in, DIR if not given
+        :param max_bytes: total size of frame index files to keep, MAX_BYTES if not given
+        """
+        if cache_dir is None:
+            cache_dir = self.DIR
+        if max_bytes is None:
+            max_bytes = self.MAX_BYTES
+
+        self.path = path
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._pts = None
+        self._time_base = None
+
+        if os.path.splitext(path)[1] == '.npy':
+            self.width, self.height = np.load(path, mmap_mode='r').shape[:2]
+            self.fps = None
+            self.format = None
+            self.mode = None
+            self.is_video = False
+            self._frames = 1
+            return
+
+        try:
+            with Image.open(path) as image:
+                self.width, self.height = image.size
+                self._frames = getattr(image, 'n_frames', 1)
+                self.format = image.format
+                self.mode = image.mode
+
+            self.fps = None
+            self.is_video = False
+
+        except UnidentifiedImageError:
+            # ffmpeg yields the header before any frame is decoded
+            frames = imageio_ffmpeg.read_frames(path)
+            try:
+                meta = next(frames)
+            finally:
+                frames.close()
+
+            self.width, self.height = meta['size']
+            self.fps = meta.get('fps')
+            self.format = None
+            self.mode = None
+            self.is_video = True
+            self._frames = None
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """
+        (width, height) of each frame
+        """
+        return self.width, self.height
+
+    @property
+    def frames(self) -> int:
+        """
+        number of frames in the file
+        """
+        if self._frames is None:
+            self._frames = len(self.pts)
+
+        return self._frames
+
+    @property
+    def pts(self) -> List[int]:
+        """
+        presentation timestamps of each video frame in time_base units
+        """
+        if self._pts is None:
+            self._load_index()
+
+        return self._pts
+
+    @property
+    def time_base(self) -> float:
+        """
+        seconds per pts unit
+        """
+        if self._time_base is None:
+            self._load_index()
+
+        return self._time_base
+
+    def seek_time(self, frame_index: int) -> float:
+        """
+        time in seconds to seek to so that a frame is the first one decoded
+
+        the time is halfway between the frame and the one before it,
+        so rounding can't land on a neighboring frame
+
+        :param frame_index: frame to seek to
+        """
+        pts = self.pts
+
+        if frame_index <= 0:
+            return 0
+
+        return ((pts[frame_index - 1] + pts[frame_index]) / 2 - pts[0]) * self.time_base
+
+    def _index_path(self) -> str:
+        stat = os.stat(self.path)
+        key_text = '{}:{}:{}'.format(os.path.abspath(self.path), stat.st_size, stat.st_mtime_ns)
+
+        return os.path.join(self.cache_dir, hashlib.sha1(key_text.encode()).hexdigest() + '.json')
+
+    def _load_index(self) -> None:
+        """
+        read the frame index file, or create it if it doesn't exist yet
+        """
+        index_path = self._index_path()
+
+        if os.path.isfile(index_path):
+            try:
+                with open(index_path) as index_file:
+                    index = json.load(index_file)
+
+                self._pts = index['pts']
+                self._time_base = index['time_base']
+
+                # mark as recently used
+                os.utime(index_path)
+                return
+            except (ValueError, KeyError):
+                pass
+
+        self._pts, self._time_base = self._read_index(self.path)
+
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+
+            temp_index_path = '{}.{}'.format(index_path, os.getpid())
+            with open(temp_index_path, 'w') as index_file:
+                json.dump({'pts': self._pts, 'time_base': self._time_base}, index_file)
+            os.replace(temp_index_path, index_path)
+
+            self._evict(keep=index_path)
+        except OSError:
+            # the index is only a cache
+            pass
+
+    def _evict(self, keep: str = None) -> None:
+        """
+        delete least recently used index files until they fit in max_bytes
+        """
+        indexes = []
+        total_bytes = 0
+
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.json'):
+                continue
+
+            index_path = os.path.join(self.cache_dir, filename)
+            size = os.path.getsize(index_path)
+            total_bytes += size
+            indexes.append((os.path.getmtime(index_path), index_path, size))
+
+        for _, index_path, size in sorted(indexes):
+            if total_bytes <= self.max_bytes:
+                break
+            if index_path == keep:
+                continue
+
+            os.remove(index_path)
+            total_bytes -= size
+
+    @staticmethod
+    def _read_index(path: str) -> Tuple[List[int], float]:
+        """
+        list the packet timestamps of the first video stream,
+        copying packets instead of decoding them
+        """
+        command = [
+            imageio_ffmpeg.get_ffmpeg_exe(), '-v', 'error',
+            '-i', path,
+            '-map', '0:v:0', '-c', 'copy',
+            '-f', 'framemd5', '-'
+        ]
+
+        output = subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout.decode()
+
+        pts = []
+        time_base = None
+
+        for line in output.splitlines():
+            if line.startswith('#tb'):
+                numerator, denominator = line.split(':')[1].strip().split('/')
+                time_base = int(numerator) / int(denominator)
+            elif line and not line.startswith('#'):
+                # stream, dts, pts, duration, size, hash
+                pts.append(int(line.split(',')[2]))
+
+        return sorted(pts), time_base
+
+
+@functools.lru_cache(maxsize=64)
+def _probe(path: str, size: int, mtime_ns: int) -> Probe:
+    return Probe(path)
+
+
+def probe(path: str) -> Probe:
+    """
+    get a Probe of a file, reused while the file is unchanged
+
+    :param path: media file to probe
+    """
+    stat = os.stat(path)
+
+    return _probe(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
@@ -1,11 +1,16 @@
-use image::{DynamicImage, RgbaImage, RgbImage};
+use image::{DynamicImage, RgbImage};
 use ndarray::parallel::prelude::*;
-use numpy::{Ix1, Ix2, Ix3, PyArray, PyReadonlyArray, ToPyArray};
+use numpy::{Ix1, Ix2, Ix3, Ix4, IxDyn, PyArray, PyReadonlyArray, ToPyArray};
 use pyo3::{PyResult, Python};
+use pyo3::exceptions::PyValueError;
 use pyo3::prelude::{pymodule, PyModule};
 use rayon::prelude::*;
 
+use crate::dither;
+use crate::magnify;
+use crate::palette;
 use crate::quantize;
+use crate::threshold;
 
 #[pymodule]
 fn algorithms(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
@@ -54,71 +59,196 @@ fn algorithms(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
         PyArray::from_vec(py, cooked_array).reshape((width, height, 3))
     }
 
-    #[pyfn(m, "threshold")]
+    /// quantize_indexed(py_array, palette, palette_size, /)
+    /// --
+    ///
+    /// quantize an image using rscolorq, returning palette indices and the palette.
+    #[pyfn(m, "quantize_indexed")]
     #[allow(clippy::too_many_arguments)]
-    fn py_threshold<'py>(
+    fn py_quantize_indexed<'py>(
         py: Python<'py>,
-        pixels_py_array: &PyArray<u8, Ix3>,
+        pixels_py_array: PyReadonlyArray<u8, Ix3>,
+        palette_py_array: PyReadonlyArray<u8, Ix2>,
+        palette_size: u8,
+        iters_per_level: usize,
+        repeats_per_temp: usize,
+        initial_temp: f64,
+        final_temp: f64,
+        filter_size: u8,
+        dithering_level: f64,
+        seed: Option<u64>,
+    ) -> PyResult<(&'py PyArray<u8, Ix2>, &'py PyArray<u8, Ix2>)> {
+        let array = pixels_py_array.as_slice()?;
+        let palette = palette_py_array.as_slice()?;
+
+        let shape = pixels_py_array.shape();
+        let width = shape[0];
+        let height = shape[1];
+
+        let (indices, cooked_palette) = quantize::cook_indexed(
+            &array,
+            width,
+            height,
+            &palette,
+            palette_size,
+            iters_per_level,
+            repeats_per_temp,
+            initial_temp,
+            final_temp,
+            filter_size,
+            dithering_level,
+            seed,
+        );
+
+        let colors = cooked_palette.len() / 3;
+
+        Ok((
+            PyArray::from_vec(py, indices).reshape((width, height))?,
+            PyArray::from_vec(py, cooked_palette).reshape((colors, 3))?,
+        ))
+    }
+
+    /// threshold(pixels, out, lower_threshold, upper_threshold, include_pixel, exclude_pixel, inner, parallel, /)
+    /// --
+    ///
+    /// replace each pixel of a (..., 3) array with include_pixel or exclude_pixel
+    /// based on its brightness, writing to out, optionally in parallel chunks.
+    #[pyfn(m, "threshold")]
+    #[allow(clippy::too_many_arguments)]
+    fn py_threshold(
+        py: Python<'_>,
+        pixels_py_array: PyReadonlyArray<u8, IxDyn>,
+        out_py_array: &PyArray<u8, IxDyn>,
         lower_threshold: u8,
         upper_threshold: u8,
         include_pixel: PyReadonlyArray<u8, Ix1>,
         exclude_pixel: PyReadonlyArray<u8, Ix1>,
         inner: bool,
-    ) -> PyResult<&'py PyArray<u8, Ix3>> {
-        let pixels = unsafe { pixels_py_array.as_slice_mut() }?;
+        parallel: bool,
+    ) -> PyResult<()> {
+        let pixels = pixels_py_array.as_slice()?;
+        let out = unsafe { out_py_array.as_slice_mut() }?;
         let include_pixel = include_pixel.as_slice()?;
         let exclude_pixel = exclude_pixel.as_slice()?;
 
-        // iterate through the flat array in chunks of 3
-        pixels.par_chunks_mut(3).for_each(|pixel_array| {
-            // get the brightness of the pixel
-            let pixel_value = (pixel_array[0] as f64) * 0.299
-                + (pixel_array[1] as f64) * 0.587
-                + (pixel_array[2] as f64) * 0.114;
-
-            // get with the correct pixel based on if it is outside a threshold
-            let included: bool = if inner {
-                (pixel_value <= upper_threshold as f64)
-                    & (pixel_value >= lower_threshold as f64)
-            } else {
-                (pixel_value >= upper_threshold as f64)
-                    | (pixel_value <= lower_threshold as f64)
-            };
-
-            let replacement = match included
-            {
-                true => &include_pixel,
-                false => &exclude_pixel,
-            };
-
-            // replace rgb on the current chunk
-            pixel_array[0] = replacement[0] as u8;
-            pixel_array[1] = replacement[1] as u8;
-            pixel_array[2] = replacement[2] as u8;
-        });
+        if out.len() != pixels.len() {
+            return Err(PyValueError::new_err("out must be the same size as pixels"));
+        }
+
+        let include_pixel = [include_pixel[0], include_pixel[1], include_pixel[2]];
+        let exclude_pixel = [exclude_pixel[0], exclude_pixel[1], exclude_pixel[2]];
+
+        py.allow_threads(|| threshold::threshold(
+            pixels, out, lower_threshold, upper_threshold, include_pixel, exclude_pixel, inner, parallel,
+        ));
+
+        Ok(())
+    }
+
+    /// threshold_mask(pixels, out, lower_threshold, upper_threshold, inner, /)
+    /// --
+    ///
+    /// whether each pixel of a (..., 3) array is included based on its brightness,
+    /// writing to a (...) bool out.
+    #[pyfn(m, "threshold_mask")]
+    fn py_threshold_mask(
+        py: Python<'_>,
+        pixels_py_array: PyReadonlyArray<u8, IxDyn>,
+        out_py_array: &PyArray<bool, IxDyn>,
+        lower_threshold: u8,
+        upper_threshold: u8,
+        inner: bool,
+    ) -> PyResult<()> {
+        let pixels = pixels_py_array.as_slice()?;
+        let out = unsafe { out_py_array.as_slice_mut() }?;
+
+        if out.len() * 3 != pixels.len() {
+            return Err(PyValueError::new_err("out must have one value per pixel"));
+        }
+
+        py.allow_threads(|| threshold::threshold_mask(
+            pixels, out, lower_threshold, upper_threshold, inner,
+        ));
+
+        Ok(())
+    }
+
+    /// dither(py_array, palette, method, level, matrix_size, /)
+    /// --
+    ///
+    /// dither a (frames, height, width, 3) stack of frames to a palette, one frame per thread.
+    #[pyfn(m, "dither")]
+    fn py_dither<'py>(
+        py: Python<'py>,
+        pixels_py_array: &PyArray<u8, Ix4>,
+        palette_py_array: PyReadonlyArray<u8, Ix2>,
+        method: &str,
+        level: f64,
+        matrix_size: usize,
+    ) -> PyResult<&'py PyArray<u8, Ix4>> {
+        let pixels = unsafe { pixels_py_array.as_slice_mut() }?;
+        let palette = palette_py_array.as_slice()?;
+
+        let shape = pixels_py_array.shape();
+        let height = shape[1];
+        let width = shape[2];
+        let frame_size = height * width * 3;
+
+        // the spread of an ordered dither is the distance between colors of an even palette
+        let spread = level * 255.0 / ((palette.len() / 3) as f64).cbrt();
+
+        if frame_size > 0 && !palette.is_empty() {
+            pixels.par_chunks_mut(frame_size).for_each(|frame| match method {
+                "bayer" => dither::ordered(frame, width, palette, matrix_size, spread),
+                "atkinson" => dither::diffuse(frame, width, height, palette, &dither::ATKINSON, level),
+                _ => dither::diffuse(frame, width, height, palette, &dither::FLOYD_STEINBERG, level),
+            });
+        }
 
         pixels.to_pyarray(py).reshape(pixels_py_array.dims())
     }
 
+    /// palette(py_array, palette_size, iterations, /)
+    /// --
+    ///
+    /// extract a palette from (n, 3) pixels with median cut and k-means on a color histogram.
+    #[pyfn(m, "palette")]
+    fn py_palette<'py>(
+        py: Python<'py>,
+        pixels_py_array: PyReadonlyArray<u8, Ix2>,
+        palette_size: usize,
+        iterations: usize,
+    ) -> PyResult<&'py PyArray<u8, Ix2>> {
+        let pixels = pixels_py_array.as_slice()?;
+
+        let palette = palette::extract(pixels, palette_size, iterations);
+        let colors = palette.len() / 3;
+
+        PyArray::from_vec(py, palette).reshape((colors, 3))
+    }
+
+    /// mmpx(pixels, factor, /)
+    /// --
+    ///
+    /// magnify an rgb image by a power of 2 with repeated mmpx 2x passes.
     #[pyfn(m, "mmpx")]
-    #[allow(clippy::too_many_arguments)]
     fn py_mmpx<'py>(
         py: Python<'py>,
-        pixels_py_array: &PyArray<u8, Ix3>,
+        pixels_py_array: PyReadonlyArray<u8, Ix3>,
+        factor: usize,
     ) -> PyResult<&'py PyArray<u8, Ix3>> {
-        let pixels = pixels_py_array.to_vec().unwrap();
         let shape = pixels_py_array.shape();
-        let width = shape[0];
-        let height = shape[1];
+        let rows = shape[0];
+        let columns = shape[1];
 
-        let image = RgbaImage::from_raw(
-            height as u32, width as u32, pixels,
-        ).unwrap();
+        let pixels = pixels_py_array.as_slice()?;
+
+        let (magnified, rows, columns) = py.allow_threads(
+            || magnify::magnify(pixels, rows, columns, factor)
+        );
 
-        mmpx::magnify(&image)
-            .to_pyarray(py)
-            .reshape((width * 2, height * 2, 4))
+        PyArray::from_vec(py, magnified).reshape((rows, columns, 3))
     }
 
     Ok(())
-}
\ No newline at end of file
+}
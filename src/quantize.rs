@@ -16,6 +16,48 @@ pub fn cook(
     dithering_level: f64,
     seed: Option<u64>,
 ) -> Vec<u8> {
+    let (indices, palette) = cook_indexed(
+        pixels_array,
+        width,
+        height,
+        colors,
+        palette_size,
+        iters_per_level,
+        repeats_per_temp,
+        initial_temp,
+        final_temp,
+        filter_size,
+        dithering_level,
+        seed,
+    );
+
+    // Create the final image by color lookup from the palette
+    let mut imgbuf = Vec::with_capacity(width * height * 3);
+
+    indices.iter().for_each(|&c| {
+        let index = c as usize * 3;
+        imgbuf.extend_from_slice(&palette[index..index + 3]);
+    });
+
+    imgbuf
+}
+
+/// quantize, returning the palette index of each pixel and the flat rgb palette
+#[allow(clippy::too_many_arguments)]
+pub fn cook_indexed(
+    pixels_array: &&[u8],
+    width: usize,
+    height: usize,
+    colors: &&[u8],
+    palette_size: u8,
+    iters_per_level: usize,
+    repeats_per_temp: usize,
+    initial_temp: f64,
+    final_temp: f64,
+    filter_size: u8,
+    dithering_level: f64,
+    seed: Option<u64>,
+) -> (Vec<u8>, Vec<u8>) {
     // Build the quantization parameters, verify if accepting user input
     let mut conditions = Params::new();
 
@@ -40,8 +82,7 @@ pub fn cook(
     // verify
     conditions.verify_parameters().unwrap();
 
-    // Create the output buffer and quantized palette index buffer
-    let mut imgbuf = Vec::with_capacity(width * height * 3);
+    // quantized palette index buffer
     // height, width to account for different input orientation (w x h)
     let mut quantized_image = Matrix2d::new(height, width);
 
@@ -81,25 +122,22 @@ pub fn cook(
     // perform the quantization, filling these refs
     rscolorq::spatial_color_quant(&image, &mut quantized_image, &mut palette, &conditions).unwrap();
 
-    // convert the Rgb<f64> palette to Rgb<u8>
+    // convert the Rgb<f64> palette to flat u8 rgb
     let palette = palette
         .iter()
-        .map(|&c| {
+        .flat_map(|&c| {
             let color = 255.0 * c;
-            [
+            vec![
                 color.red.round() as u8,
                 color.green.round() as u8,
                 color.blue.round() as u8,
             ]
         })
-        .collect::<Vec<[u8; 3]>>();
+        .collect::<Vec<u8>>();
 
-    // Create the final image by color lookup from the palette
-    quantized_image.iter().for_each(|&c| {
-        imgbuf.extend_from_slice(&*palette.get(c as usize).unwrap());
-    });
+    let indices = quantized_image.iter().copied().collect::<Vec<u8>>();
 
-    imgbuf
+    (indices, palette)
 }
 
 
@@ -0,0 +1,78 @@
+use rayon::prelude::*;
+
+/// pixels handled by one parallel task
+const CHUNK_PIXELS: usize = 16 * 1024;
+
+/// fixed point brightness (0.299, 0.587, 0.114), the same as the numpy luma
+#[inline(always)]
+fn luma(pixel: &[u8]) -> u8 {
+    ((pixel[0] as u16 * 77 + pixel[1] as u16 * 150 + pixel[2] as u16 * 29) >> 8) as u8
+}
+
+/// 0xff if a brightness is included, otherwise 0
+///
+/// computed without branches so the loops over it can be vectorized
+#[inline(always)]
+fn included(value: u8, lower_threshold: u8, upper_threshold: u8, inner: bool) -> u8 {
+    let in_range = (value <= upper_threshold) & (value >= lower_threshold);
+    let out_of_range = (value >= upper_threshold) | (value <= lower_threshold);
+
+    let included = (inner & in_range) | (!inner & out_of_range);
+
+    (included as u8).wrapping_neg()
+}
+
+/// replace each rgb pixel with include_pixel or exclude_pixel based on its brightness,
+/// writing to out (the same length as pixels)
+///
+/// chunks of pixels are handled in parallel if parallel is true,
+/// which only pays off for frames large enough to cover the cost of splitting the work
+#[allow(clippy::too_many_arguments)]
+pub fn threshold(
+    pixels: &[u8],
+    out: &mut [u8],
+    lower_threshold: u8,
+    upper_threshold: u8,
+    include_pixel: [u8; 3],
+    exclude_pixel: [u8; 3],
+    inner: bool,
+    parallel: bool,
+) {
+    let threshold_chunk = |(out, pixels): (&mut [u8], &[u8])| {
+        for (out_pixel, pixel) in out.chunks_exact_mut(3).zip(pixels.chunks_exact(3)) {
+            let mask = included(luma(pixel), lower_threshold, upper_threshold, inner);
+
+            out_pixel[0] = (include_pixel[0] & mask) | (exclude_pixel[0] & !mask);
+            out_pixel[1] = (include_pixel[1] & mask) | (exclude_pixel[1] & !mask);
+            out_pixel[2] = (include_pixel[2] & mask) | (exclude_pixel[2] & !mask);
+        }
+    };
+
+    if parallel {
+        out.par_chunks_mut(CHUNK_PIXELS * 3)
+            .zip(pixels.par_chunks(CHUNK_PIXELS * 3))
+            .for_each(threshold_chunk);
+    } else {
+        out.chunks_mut(CHUNK_PIXELS * 3)
+            .zip(pixels.chunks(CHUNK_PIXELS * 3))
+            .for_each(threshold_chunk);
+    }
+}
+
+/// whether each rgb pixel is included based on its brightness,
+/// writing to out (a third the length of pixels)
+pub fn threshold_mask(
+    pixels: &[u8],
+    out: &mut [bool],
+    lower_threshold: u8,
+    upper_threshold: u8,
+    inner: bool,
+) {
+    out.par_chunks_mut(CHUNK_PIXELS)
+        .zip(pixels.par_chunks(CHUNK_PIXELS * 3))
+        .for_each(|(out, pixels)| {
+            for (out_value, pixel) in out.iter_mut().zip(pixels.chunks_exact(3)) {
+                *out_value = included(luma(pixel), lower_threshold, upper_threshold, inner) != 0;
+            }
+        });
+}
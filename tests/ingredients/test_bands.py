@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from pierogis.ingredients import Flip, Quantize, Recipe, Resize, Rotate, Sort, Threshold
+from pierogis.ingredients.bands import band_axis, cook_bands
+
+
+@pytest.fixture
+def array():
+    return np.random.default_rng(0).integers(0, 256, (300, 200, 3), dtype=np.dtype('uint8'))
+
+
+def test_band_axis(array):
+    """bands are cut across an axis that every ingredient keeps lines of"""
+    assert band_axis(Recipe(ingredients=[Threshold(), Sort()]), array) == (0, 0)
+    assert band_axis(Sort(rotate=Rotate(turns=1)), array) == (1, 0)
+    assert band_axis(Recipe(ingredients=[Sort(), Sort(rotate=Rotate(turns=1))]), array) is None
+    assert band_axis(Resize(scale=2), array) is None
+
+
+def test_band_axis_quantize(array):
+    """quantizing to given colors is pointwise, extracting a palette needs the frame"""
+    assert band_axis(Quantize(colors=['000000', 'ffffff']), array) == (0, 0)
+    assert band_axis(Quantize(), array) is None
+
+
+@pytest.mark.parametrize('turns', [0, 1])
+def test_cook_bands(array, turns):
+    """cooking in bands matches cooking the whole frame"""
+    recipe = Recipe(ingredients=[
+        Threshold(), Sort(rotate=Rotate(turns=turns)), Flip(axis=1 - turns)
+    ])
+
+    assert np.all(cook_bands(recipe, array, threads=4) == recipe.cook(array))
@@ -0,0 +1,30 @@
+import pytest
+
+from pierogis.ingredients.budget import Budget
+
+
+def test_fraction():
+    """the fraction of work that fits in a budget comes from the work measured"""
+    budget = Budget()
+
+    assert budget.fraction('key', 100, 1) == 1
+
+    budget.record('key', 100, 2)
+
+    assert budget.fraction('key', 100, 1) == pytest.approx(.5)
+    assert budget.fraction('key', 100, 4) == 1
+    assert len(budget) == 1
+
+
+def test_record_smoothing():
+    """measurements are smoothed into a running estimate"""
+    budget = Budget(smoothing=.5)
+
+    budget.record('key', 100, 1)
+    budget.record('key', 100, 3)
+
+    assert budget.fraction('key', 100, 1) == pytest.approx(.5)
+
+    budget.clear()
+
+    assert len(budget) == 0
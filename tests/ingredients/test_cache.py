@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from pierogis.ingredients import Ingredient
+from pierogis.ingredients.cache import FrameCache, PixelCache
+
+
+@pytest.fixture
+def array():
+    return np.asarray([[[200, 200, 200], [30, 30, 30]],
+                       [[130, 130, 130], [60, 60, 60]]]).astype(np.dtype('uint8'))
+
+
+def test_put_get(array):
+    cache = PixelCache()
+
+    cached = cache.put('key', array)
+
+    assert cache.get('key') is cached
+    assert np.all(cached == array)
+    assert not cached.flags.writeable
+
+
+def test_evict(array):
+    # room for two arrays
+    cache = PixelCache(max_bytes=array.nbytes * 2)
+
+    cache.put('first', array)
+    cache.put('second', array)
+    cache.get('first')
+    cache.put('third', array)
+
+    assert cache.get('second') is None
+    assert cache.get('first') is not None
+    assert len(cache) == 2
+
+
+def test_load(array):
+    cache = PixelCache()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return array
+
+    cache.load('key', loader)
+    cache.load('key', loader)
+
+    assert len(loads) == 1
+
+
+def test_luma(array):
+    frame_cache = FrameCache()
+
+    luma = frame_cache.luma(array)
+
+    assert luma.dtype == np.dtype('uint8')
+    # grey pixels keep their value
+    assert np.all(luma == array[:, :, 0])
+    assert frame_cache.luma(array) is luma
+
+
+def test_mask(array):
+    frame_cache = FrameCache()
+    seasoning = Ingredient()
+
+    mask = frame_cache.mask(seasoning, array)
+
+    assert frame_cache.mask(seasoning, array) is mask
+    assert frame_cache.mask(seasoning, array.copy()) is not mask
+
+
+def test_mask_threads(array):
+    """masks can be cooked and released from several threads at once"""
+    frame_cache = FrameCache()
+    arrays = [array.copy() for _ in range(8)]
+
+    def mask_release(pixels):
+        for _ in range(200):
+            frame_cache.mask(Ingredient(), pixels)
+            frame_cache.release(pixels)
+
+    with ThreadPoolExecutor(len(arrays)) as executor:
+        list(executor.map(mask_release, arrays))
+
+    assert frame_cache._masks == {}
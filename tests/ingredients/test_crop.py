@@ -151,3 +151,16 @@ def test_crop_x_y_height(array):
 
     assert cooked_array.shape[0] == array.shape[0] - x
     assert cooked_array.shape[1] == height
+
+
+def test_cook_batch(array):
+    """
+    crop a stack of frames
+    """
+    crop = Crop(x=1, width=2, height=2)
+    frames = np.stack([array, array[::-1]])
+
+    cooked_frames = crop.cook_batch(frames)
+
+    assert np.all(cooked_frames[0] == crop.cook(frames[0]))
+    assert np.all(cooked_frames[1] == crop.cook(frames[1]))
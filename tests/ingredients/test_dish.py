@@ -1,7 +1,7 @@
 import numpy as np
 import pytest
 
-from pierogis.ingredients import Dish, Pierogi, Recipe
+from pierogis.ingredients import Dish, Flip, Pierogi, Quantize, Recipe
 
 
 @pytest.fixture
@@ -35,3 +35,36 @@ def test_dish_serve(array):
     cooked_dish = dish.serve()
 
     assert np.all(cooked_dish.pierogi.pixels == pierogi.pixels)
+
+
+def test_serve_ingredient(array):
+    """any ingredient can be served as the recipe"""
+    dish = Dish(pierogi=Pierogi(pixels=array), recipe=Flip())
+
+    assert np.all(dish.serve().pierogi.pixels == Flip().cook(array))
+
+    previous = Dish(pierogi=Pierogi(pixels=array), recipe=Flip())
+    cooked_dish = dish.serve_incremental(previous, previous.serve())
+
+    assert np.all(cooked_dish.pierogi.pixels == Flip().cook(array))
+
+
+def test_serve_indexed(array):
+    """recipes ending in a quantize serve an indexed pierogi"""
+    quantize = Quantize(colors=['000000', 'ffffff'])
+    dish = Dish(pierogi=Pierogi(pixels=array), recipe=Recipe(ingredients=[quantize]))
+
+    cooked_dish = dish.serve()
+
+    assert cooked_dish.pierogi.indexed
+    assert np.all(cooked_dish.pierogi.pixels == quantize.cook(array))
+
+
+def test_preview():
+    """a preview is served smaller"""
+    array = np.random.default_rng(0).integers(0, 256, (40, 20, 3), dtype=np.dtype('uint8'))
+    dish = Dish(pierogi=Pierogi(pixels=array), recipe=Recipe(ingredients=[Quantize(colors=['000000', 'ffffff'])]))
+
+    preview_dish = dish.preview(scale=.25)
+
+    assert preview_dish.pierogi.pixels.shape == (10, 5, 3)
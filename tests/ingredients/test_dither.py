@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from pierogis.ingredients import Dither
+
+
+@pytest.fixture
+def array():
+    return np.random.default_rng(0).integers(0, 256, (12, 10, 3), dtype=np.dtype('uint8'))
+
+
+@pytest.mark.parametrize('method', Dither.METHODS)
+def test_cook(array, method):
+    """only palette colors are output"""
+    colors = ['000000', 'ffffff', 'ff0000']
+    dither = Dither(colors=colors, method=method)
+
+    cooked_array = dither.cook(array)
+
+    assert cooked_array.shape == array.shape
+    assert np.all(np.any(
+        np.all(cooked_array[:, :, np.newaxis] == dither.palette, axis=3), axis=2
+    ))
+
+
+@pytest.mark.parametrize('method', Dither.METHODS)
+def test_cook_gray(method):
+    """middle gray dithers to about half black and half white"""
+    array = np.full((16, 16, 3), 128, dtype=np.dtype('uint8'))
+
+    cooked_array = Dither(method=method).cook(array)
+
+    assert abs(cooked_array.mean() - 128) < 16
+
+
+def test_cook_level(array):
+    """no dithering is the same as quantizing"""
+    dither = Dither(colors=['000000', 'ffffff'], level=0)
+
+    quantized_array = dither.nearest_palette_index(array.reshape(-1, 3))
+
+    assert np.all(dither.cook(array) == dither.palette[quantized_array].reshape(array.shape))
+
+
+def test_bayer_matrix():
+    matrix = Dither.bayer_matrix(2)
+
+    assert np.all(matrix == (np.asarray([[0, 2], [3, 1]]) + .5) / 4 - .5)
+
+
+@pytest.mark.parametrize('method', Dither.METHODS)
+def test_cook_batch(array, method):
+    """cooking a stack of frames matches cooking each frame"""
+    dither = Dither(method=method)
+
+    frames = np.stack([array, array[::-1]])
+
+    cooked_frames = dither.cook_batch(frames)
+
+    assert np.all(cooked_frames[0] == dither.cook(frames[0]))
+    assert np.all(cooked_frames[1] == dither.cook(frames[1]))
+
+
+@pytest.mark.parametrize('method', Dither.METHODS)
+def test_cook_np_rs(array, method):
+    """test cook_rs and cook_np return the same array"""
+    dither = Dither(colors=['000000', 'ffffff', 'ff0000'], method=method)
+
+    frames = np.ascontiguousarray(array[np.newaxis])
+
+    assert np.all(dither.cook_rs(frames.copy()) == dither.cook_np(frames))
@@ -0,0 +1,122 @@
+import threading
+
+import numpy as np
+import pytest
+
+from pierogis.ingredients import Flip, Ingredient, Recipe, RecipeGraph, Threshold
+from pierogis.ingredients.cache import FrameCache
+from pierogis.ingredients.graph import BASE, Node
+
+
+@pytest.fixture
+def array():
+    return np.asarray([[[200, 200, 200], [30, 30, 30]],
+                       [[130, 130, 130], [60, 60, 60]]]).astype(np.dtype('uint8'))
+
+
+def test_cook_sequence(array):
+    """a graph of nodes each cooking the one before it cooks like a recipe"""
+    graph = RecipeGraph(
+        nodes={
+            'flip': Node(Flip(axis=0)),
+            'flop': Node(Flip(axis=1), pixels='flip')
+        }
+    )
+
+    recipe = Recipe(ingredients=[Flip(axis=0), Flip(axis=1)])
+
+    assert np.all(graph.cook(array) == recipe.cook(array))
+
+
+def test_cook_masks(array):
+    """a mask output is cooked once and layers a branch over the base"""
+    threshold = Threshold(lower_threshold=100, upper_threshold=150)
+
+    graph = RecipeGraph(
+        nodes={
+            'mask': Node(threshold),
+            'flip': Node(Flip(axis=0), masks=['mask']),
+        }
+    )
+
+    binary_array = np.all(threshold.cook(array) == 255, axis=2)
+    expected_pixels = np.array(array)
+    expected_pixels[binary_array] = Flip(axis=0).cook(array)[binary_array]
+
+    assert np.all(graph.cook(array) == expected_pixels)
+
+
+def test_cook_branches_parallel(array):
+    """branches that don't depend on each other are cooked at the same time"""
+    barrier = threading.Barrier(2, timeout=5)
+
+    class Meet(Ingredient):
+        def cook(self, pixels):
+            # only passes if the other branch is cooking too
+            barrier.wait()
+            return pixels
+
+    graph = RecipeGraph(
+        nodes={
+            'left': Node(Meet()),
+            'right': Node(Meet()),
+            'both': Node(Flip(), pixels='left', masks=['right'])
+        },
+        threads=2
+    )
+
+    assert graph.cook(array).shape == array.shape
+
+
+def test_cook_frees_intermediates(array, monkeypatch):
+    """an output is released once the last node using it is done"""
+    released = []
+    monkeypatch.setattr(FrameCache, 'release', lambda self, pixels: released.append(id(pixels)))
+
+    outputs = {}
+
+    class Keep(Ingredient):
+        def cook(self, pixels):
+            # the output of the first node, as the graph keeps it
+            outputs['first'] = pixels
+            return np.array(pixels)
+
+    class Check(Ingredient):
+        def cook(self, pixels):
+            outputs['released'] = id(outputs['first']) in released
+            return pixels
+
+    graph = RecipeGraph(
+        nodes={
+            'first': Node(Flip()),
+            'second': Node(Keep(), pixels='first'),
+            'third': Node(Check(), pixels='second')
+        },
+        threads=1
+    )
+
+    graph.cook(array)
+
+    assert outputs['released']
+
+
+def test_cycle():
+    with pytest.raises(ValueError):
+        RecipeGraph(
+            nodes={
+                'flip': Node(Flip(), pixels='flop'),
+                'flop': Node(Flip(), pixels='flip')
+            }
+        )
+
+
+def test_unknown_output():
+    with pytest.raises(ValueError):
+        RecipeGraph(nodes={'flip': Node(Flip(), pixels='missing')})
+
+
+def test_base_name():
+    graph = RecipeGraph(nodes={'flip': Node(Flip())})
+
+    assert graph.nodes['flip'].pixels == BASE
+    assert graph.output == 'flip'
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from pierogis.ingredients import Dish, Pierogi, Quantize, Recipe, Rotate, Sort, Threshold
+from pierogis.ingredients.increments import cook_increment, dirty_tiles
+
+
+@pytest.fixture
+def array():
+    return np.random.default_rng(0).integers(0, 256, (300, 200, 3), dtype=np.dtype('uint8'))
+
+
+@pytest.fixture
+def changed_array(array):
+    changed_array = array.copy()
+    changed_array[40:50, 100:120] = 255 - changed_array[40:50, 100:120]
+
+    return changed_array
+
+
+def test_dirty_tiles(array, changed_array):
+    """tiles with a changed pixel are dirty"""
+    dirty = dirty_tiles(changed_array, array, tile=32)
+
+    assert dirty.shape == (10, 7)
+    assert np.array_equal(np.argwhere(dirty), [[1, 3]])
+    assert not np.any(dirty_tiles(array, array))
+
+
+@pytest.mark.parametrize('turns', [0, 1])
+def test_cook_increment(array, changed_array, turns, monkeypatch):
+    """recooking the changed tiles matches cooking the whole frame"""
+    recipe = Recipe(ingredients=[Threshold(), Sort(rotate=Rotate(turns=turns))])
+
+    cooked_shapes = []
+    cook = Recipe.cook
+
+    def counted_cook(self, pixels, *args):
+        cooked_shapes.append(pixels.shape)
+        return cook(self, pixels, *args)
+
+    previous_cooked_pixels = recipe.cook(array)
+    expected_pixels = recipe.cook(changed_array)
+
+    monkeypatch.setattr(Recipe, 'cook', counted_cook)
+
+    cooked_pixels = cook_increment(recipe, changed_array, array, previous_cooked_pixels)
+
+    assert np.all(cooked_pixels == expected_pixels)
+    assert all(shape[0] * shape[1] < array.shape[0] * array.shape[1] for shape in cooked_shapes)
+
+
+def test_cook_increment_unchanged(array):
+    """an unchanged frame reuses the previous cooked frame"""
+    previous_cooked_pixels = Threshold().cook(array)
+
+    cooked_pixels = cook_increment(Threshold(), array, array, previous_cooked_pixels)
+
+    assert np.all(cooked_pixels == previous_cooked_pixels)
+    assert cooked_pixels is not previous_cooked_pixels
+
+
+def test_serve_incremental(array, changed_array):
+    """recipes that need the whole frame are served whole"""
+    recipe = Recipe(ingredients=[Quantize(colors=['000000', 'ffffff']), Sort()])
+
+    previous = Dish(pierogi=Pierogi(pixels=array), recipe=recipe)
+    dish = Dish(pierogi=Pierogi(pixels=changed_array), recipe=recipe)
+
+    cooked_dish = dish.serve_incremental(previous, previous.serve())
+
+    assert np.all(cooked_dish.pierogi.pixels == dish.serve().pierogi.pixels)
@@ -34,3 +34,19 @@ def test_cook(array):
             [[20, 40, 100], [20, 40, 100], [10, 20, 200], [10, 20, 200]]
         ]
     )
+
+
+def test_cook_factor(array):
+    """
+    scale 4x with repeated 2x passes
+    """
+    mmpx = MMPX(factor=4)
+    cooked_array = mmpx.cook(array)
+
+    assert cooked_array.shape == (array.shape[0] * 4, array.shape[1] * 4, 3)
+    assert np.all(cooked_array[:4, :4] == [200, 200, 200])
+
+
+def test_prep_factor():
+    with pytest.raises(ValueError):
+        MMPX(factor=3)
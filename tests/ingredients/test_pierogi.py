@@ -6,6 +6,7 @@ import pytest
 from PIL import Image
 
 from pierogis.ingredients import Pierogi
+from pierogis.ingredients.cache import PixelCache
 
 
 @pytest.fixture
@@ -71,6 +72,75 @@ def test_save(array: np.ndarray, tmp_path):
     assert os.path.exists(path)
 
 
+def test_from_path_crop_resize(array: np.ndarray, path):
+    """
+    test cropping and resizing while loading
+    """
+    pierogi = Pierogi.from_path(path, box=(0, 0, 1, 2))
+    assert pierogi.pixels.shape == (1, 2, 3)
+
+    pierogi = Pierogi.from_path(path, size=(1, 1))
+    assert pierogi.pixels.shape == (1, 1, 3)
+
+
+def test_from_path_cache(path):
+    """
+    test that identical loads share cached pixels
+    """
+    cache = PixelCache()
+
+    pixels = Pierogi.from_path(path, cache=cache).pixels
+
+    assert Pierogi.from_path(path, cache=cache).pixels is pixels
+    assert not pixels.flags.writeable
+
+
+def test_from_path_shape(path):
+    """
+    test that width and height are read without loading pixels
+    """
+    pierogi = Pierogi.from_path(path)
+
+    assert pierogi.width == 2
+    assert pierogi.height == 2
+    assert pierogi._pixels is None
+
+
+def test_save_npy(array: np.ndarray, tmp_path):
+    """
+    test saving and loading uncompressed pixels
+    """
+
+    pierogi = Pierogi(pixels=array)
+
+    path = str(tmp_path / "output.npy")
+    pierogi.save(path)
+
+    assert np.all(Pierogi.from_path(path).pixels == array)
+
+
+def test_save_indexed(array: np.ndarray, tmp_path):
+    """
+    indexed pierogis save as palette pngs that load indexed
+    """
+    palette = np.asarray([[0, 0, 0], [255, 0, 0], [0, 0, 255]], dtype='uint8')
+    indices = (array[:, :, 0] % 3).astype('uint8')
+
+    pierogi = Pierogi(indices=indices, palette=palette)
+
+    assert np.all(pierogi.pixels == palette[indices])
+
+    output_path = os.path.join(tmp_path, 'output.png')
+    pierogi.save(output_path)
+
+    assert Image.open(output_path).mode == 'P'
+
+    loaded_pierogi = Pierogi.from_path(output_path)
+
+    assert loaded_pierogi.indexed
+    assert np.all(loaded_pierogi.pixels == pierogi.pixels)
+
+
 def test_resize(array: np.ndarray):
     """
     test resize method
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from pierogis.ingredients import Quantize, Recipe, SpatialQuantize, Threshold
+from pierogis.ingredients.budget import budget
+from pierogis.ingredients.quantize import extract_palette, extract_palette_np
+
+
+@pytest.fixture
+def centers():
+    return np.asarray([[10, 20, 30], [200, 50, 50], [50, 200, 60], [240, 240, 240]])
+
+
+@pytest.fixture
+def array(centers):
+    """pixels clustered around a few colors"""
+    rng = np.random.default_rng(0)
+
+    pixels = centers[rng.integers(0, len(centers), (40, 30))] + rng.integers(-3, 4, (40, 30, 3))
+
+    return pixels.clip(0, 255).astype(np.dtype('uint8'))
+
+
+def test_cook(array, centers):
+    """snap to the closest palette color"""
+    quantize = Quantize(colors=['0a141e', 'c83232', '32c83c', 'f0f0f0'])
+
+    cooked_array = quantize.cook(array)
+
+    assert np.all(np.isin(cooked_array, centers))
+
+
+def test_cook_indexed(array):
+    """palette indices look up the same colors cook outputs"""
+    quantize = Quantize(colors=['0a141e', 'c83232', '32c83c', 'f0f0f0'])
+
+    indices, palette = quantize.cook_indexed(array)
+
+    assert indices.dtype == np.dtype('uint8')
+    assert np.all(palette[indices] == quantize.cook(array))
+
+
+def test_index_pixels(array):
+    """find the index of pixels already in the palette"""
+    palette = np.asarray([[240, 240, 240], [10, 20, 30], [200, 50, 50]], dtype='uint8')
+    indices = np.random.default_rng(0).integers(0, 3, array.shape[:2])
+
+    assert np.all(Quantize.index_pixels(palette[indices], palette) == indices)
+
+
+def test_extract_palette(array, centers):
+    """extract the colors the pixels are clustered around"""
+    palette = extract_palette(array, 4)
+
+    assert np.all(np.abs(palette[np.lexsort(palette.T[::-1])] - centers[np.lexsort(centers.T[::-1])]) <= 1)
+
+
+def test_extract_palette_distinct():
+    """only as many colors as the pixels have are extracted"""
+    array = np.zeros((3, 3, 3), dtype=np.dtype('uint8'))
+
+    palette = extract_palette(array, 8)
+
+    assert palette.shape == (1, 3)
+
+
+def test_cook_extract(array):
+    """quantize with a palette extracted from the pixels if no colors are provided"""
+    quantize = Quantize(palette_size=4)
+
+    cooked_array = quantize.cook(array)
+
+    assert len(np.unique(cooked_array.reshape(-1, 3), axis=0)) == 4
+
+
+def test_extract_palette_np_rs(array):
+    """test the rust and numpy palettes are the same"""
+    from pierogis.algorithms import palette
+
+    pixels = np.ascontiguousarray(array.reshape(-1, 3))
+
+    assert np.all(np.abs(
+        palette(pixels, 4, Quantize.KMEANS_ITERATIONS).astype(int)
+        - extract_palette_np(pixels, 4, Quantize.KMEANS_ITERATIONS)
+    ) <= 1)
+
+
+def test_preview(array, centers):
+    """the preview of a spatial quantize snaps to the nearest color of its palette"""
+    colors = ['0a141e', 'c83232', '32c83c', 'f0f0f0']
+    spatial_quantize = SpatialQuantize(colors=colors)
+    spatial_quantize.season(Threshold())
+
+    preview = Recipe(ingredients=[spatial_quantize]).preview().ingredients[0]
+
+    assert type(preview) is Quantize
+    assert preview.seasonings == spatial_quantize.seasonings
+    assert np.all(preview.cook(array) == Quantize(colors=colors).cook(array))
+
+
+def test_effort(array):
+    """under a time budget, repeats, then iterations, then the annealing schedule are cut"""
+    spatial_quantize = SpatialQuantize(iterations=4, repeats=2, seconds=1)
+
+    budget.clear()
+    assert spatial_quantize.effort(array) == (4, 2, spatial_quantize.final_temp)
+
+    full_work = spatial_quantize.work(array, 4, 2, spatial_quantize.final_temp)
+
+    # the full work took 16 times the budget
+    budget.record(SpatialQuantize, full_work, 16)
+
+    iterations, repeats, final_temp = spatial_quantize.effort(array)
+
+    assert (iterations, repeats) == (1, 1)
+    assert spatial_quantize.final_temp < final_temp < spatial_quantize.initial_temp
+    assert spatial_quantize.work(array, iterations, repeats, final_temp) == pytest.approx(full_work / 16)
+
+    budget.clear()
+
+
+def test_effort_rounding(array):
+    """a budget never raises effort past the settings, even when rounding leaves extra"""
+    spatial_quantize = SpatialQuantize(iterations=3, repeats=4, seconds=.6)
+
+    budget.clear()
+
+    # the full work takes a second, so the budget is .6 of it and repeats round down to 2
+    budget.record(SpatialQuantize, spatial_quantize.work(array, 3, 4, spatial_quantize.final_temp), 1)
+
+    iterations, repeats, final_temp = spatial_quantize.effort(array)
+
+    assert (iterations, repeats) == (3, 2)
+    assert final_temp == pytest.approx(spatial_quantize.final_temp)
+
+    budget.clear()
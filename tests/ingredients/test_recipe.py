@@ -1,7 +1,8 @@
 import numpy as np
 import pytest
 
-from pierogis.ingredients import Recipe, Ingredient
+from pierogis.ingredients import Flip, Quantize, Recipe, Ingredient, Sort, Threshold
+from pierogis.ingredients.cache import FrameCache
 
 
 @pytest.fixture
@@ -23,4 +24,49 @@ def test_add(ingredient):
     recipe = Recipe()
     cooked_array = recipe.add(ingredient)
 
-    assert len(recipe.ingredients) == 1
\ No newline at end of file
+    assert len(recipe.ingredients) == 1
+
+
+def test_cook_shared_luma(array, monkeypatch):
+    """sort and its threshold seasoning use one brightness computation of the input"""
+    lumas = []
+    compute_luma = FrameCache.compute_luma
+
+    def counted_luma(pixels):
+        lumas.append(pixels)
+        return compute_luma(pixels)
+
+    monkeypatch.setattr(FrameCache, 'compute_luma', staticmethod(counted_luma))
+
+    sort = Sort()
+    sort.season(Threshold())
+
+    Recipe(ingredients=[sort]).cook(array)
+
+    assert sum(pixels is array for pixels in lumas) == 1
+
+
+def test_cook_batch(array):
+    """cooking a stack of frames matches cooking each frame"""
+    recipe = Recipe(ingredients=[Flip(axis=1), Quantize(colors=['000000', 'ffffff', '7f7f7f'])])
+
+    frames = np.stack([array, array[::-1]])
+
+    cooked_frames = recipe.cook_batch(frames)
+
+    assert np.all(cooked_frames[0] == recipe.cook(frames[0]))
+    assert np.all(cooked_frames[1] == recipe.cook(frames[1]))
+
+
+def test_cook_batch_seasoned(array):
+    """seasoned recipes are cooked a frame at a time"""
+    sort = Sort()
+    sort.season(Threshold())
+    recipe = Recipe(ingredients=[sort])
+
+    frames = np.stack([array, array[::-1]])
+
+    cooked_frames = recipe.cook_batch(frames)
+
+    assert np.all(cooked_frames[0] == recipe.cook(frames[0]))
+    assert np.all(cooked_frames[1] == recipe.cook(frames[1]))
@@ -2,6 +2,7 @@ import numpy as np
 import pytest
 
 from pierogis.ingredients.seasonings import Rectangle
+from pierogis.ingredients.cache import FrameCache
 from pierogis.ingredients.seasonings.rectangle import Direction
 
 
@@ -385,3 +386,13 @@ def test_cook_width_height_e_aspect(array: np.ndarray):
     cooked_array = rectangle.cook(array)
 
     assert np.all(cooked_array[400:500, 200:300] == 255)
+
+
+def test_cook_frame_shared(array: np.ndarray):
+    """rectangles with the same parameters share a mask for the same shape"""
+    mask = Rectangle(width=100, height=100).cook_frame(array, FrameCache())
+    other_mask = Rectangle(width=100, height=100).cook_frame(array.copy(), FrameCache())
+
+    assert other_mask is mask
+    assert not mask.flags.writeable
+    assert np.all(mask == Rectangle(width=100, height=100).cook(array))
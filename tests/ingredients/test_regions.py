@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from pierogis.ingredients import Flip, Quantize, Recipe, Rotate, Sort, Threshold
+from pierogis.ingredients import recipe as recipe_module
+from pierogis.ingredients.regions import mask_boxes, region_halos
+from pierogis.ingredients.seasonings import Rectangle
+
+
+@pytest.fixture
+def array():
+    return np.random.default_rng(0).integers(0, 256, (300, 200, 3), dtype=np.dtype('uint8'))
+
+
+def test_mask_boxes():
+    """a box around each run of lines with a selected pixel"""
+    binary_array = np.zeros((10, 8), dtype=bool)
+    binary_array[1:3, 2] = True
+    binary_array[2, 5] = True
+    binary_array[6:8, 3:4] = True
+
+    assert mask_boxes(binary_array) == [(slice(1, 3), slice(2, 6)), (slice(6, 8), slice(3, 4))]
+    assert mask_boxes(np.zeros((10, 8), dtype=bool)) == []
+
+
+def test_region_halos():
+    """regions need a mask known before cooking and an ingredient that isn't global"""
+    threshold = Threshold()
+    threshold.season(Rectangle(width=10, height=10))
+    assert region_halos(threshold) == (0, 0)
+
+    sort = Sort()
+    sort.season(Rectangle(width=10, height=10))
+    assert region_halos(sort) == (0, None)
+
+    seasoned_sort = Sort()
+    seasoned_sort.season(Threshold())
+    assert region_halos(seasoned_sort) is None
+
+    quantize = Quantize()
+    quantize.season(Rectangle(width=10, height=10))
+    assert region_halos(quantize) is None
+
+
+@pytest.mark.parametrize('ingredient', [
+    Threshold(),
+    Sort(),
+    Sort(rotate=Rotate(turns=1)),
+    Flip(axis=1),
+])
+def test_cook_regions(array, ingredient, monkeypatch):
+    """cooking the regions selected by a mask matches cooking the whole frame"""
+    ingredient.season(Rectangle(width=40, height=30, x=100, y=50))
+    recipe = Recipe(ingredients=[ingredient])
+
+    cooked_shapes = []
+    cook_frame = type(ingredient).cook_frame
+
+    def counted_cook_frame(self, pixels, frame_cache):
+        cooked_shapes.append(pixels.shape)
+        return cook_frame(self, pixels, frame_cache)
+
+    monkeypatch.setattr(type(ingredient), 'cook_frame', counted_cook_frame)
+
+    cooked_pixels = recipe.cook(array)
+
+    assert all(shape[0] * shape[1] < array.shape[0] * array.shape[1] for shape in cooked_shapes)
+
+    monkeypatch.setattr(recipe_module, 'region_halos', lambda ingredient: None)
+
+    assert np.all(cooked_pixels == recipe.cook(array))
+
+
+def test_cook_regions_empty(array):
+    """nothing is cooked where a mask selects nothing"""
+    threshold = Threshold()
+    threshold.season(Rectangle(width=0, height=0))
+
+    assert np.all(Recipe(ingredients=[threshold]).cook(array) == array)
@@ -125,3 +125,17 @@ def test_cook_height_width_scale_resample(array):
 
     assert cooked_array.shape[0] == width * scale
     assert cooked_array.shape[1] == height * scale
+
+
+@pytest.mark.parametrize('width,height', [(100, 200), (2, 1), (73, 5)])
+def test_cook_batch(array, width, height):
+    """
+    nearest neighbor resizing a stack of frames matches resizing each frame
+    """
+    resize = Resize(width=width, height=height)
+    frames = np.stack([array, array[::-1]])
+
+    cooked_frames = resize.cook_batch(frames)
+
+    assert np.all(cooked_frames[0] == resize.cook(frames[0]))
+    assert np.all(cooked_frames[1] == resize.cook(frames[1]))
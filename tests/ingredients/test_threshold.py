@@ -2,6 +2,7 @@ import numpy as np
 import pytest
 
 from pierogis.ingredients import Threshold
+from pierogis.ingredients.cache import FrameCache
 
 
 @pytest.fixture
@@ -117,3 +118,90 @@ def test_cook_np_rs_inner(array):
     np_cooked_array = threshold.cook_np(array)
 
     assert np.all(rs_cooked_array == np_cooked_array)
+
+
+@pytest.mark.parametrize('lower_threshold, upper_threshold, inner', [
+    (-1, 256, False),
+    (-1, 100, False),
+    (100, 256, False),
+    (300, 400, False),
+    (300, 400, True),
+    (-20, -10, True),
+    (-1, 256, True),
+    (100.5, 100.7, True),
+])
+def test_integer_thresholds(lower_threshold, upper_threshold, inner):
+    """the kernel thresholds include the same brightnesses, even for bounds out of range"""
+    threshold = Threshold(lower_threshold=lower_threshold, upper_threshold=upper_threshold, inner=inner)
+    lumas = np.arange(256)
+
+    kernel_lower, kernel_upper, kernel_inner = threshold._integer_thresholds()
+
+    assert 0 <= kernel_lower <= 255 and 0 <= kernel_upper <= 255
+
+    # the same comparisons as the kernel
+    in_range = (lumas <= kernel_upper) & (lumas >= kernel_lower)
+    out_of_range = (lumas >= kernel_upper) | (lumas <= kernel_lower)
+    kernel_included = in_range if kernel_inner else out_of_range
+
+    assert np.all(kernel_included == threshold.included(lumas))
+
+
+@pytest.mark.parametrize('lower_threshold, upper_threshold, inner', [
+    (-1, 256, False),
+    (300, 400, True),
+])
+def test_cook_np_rs_out_of_range(array, lower_threshold, upper_threshold, inner):
+    """test cook_rs and cook_np agree for thresholds outside of 0-255"""
+    threshold = Threshold(lower_threshold=lower_threshold, upper_threshold=upper_threshold, inner=inner)
+    array = np.stack([array, np.zeros_like(array), np.full_like(array, 255)])
+
+    rs_cooked_array = threshold.cook_rs(array)
+    np_cooked_array = threshold.cook_np(array)
+
+    assert np.all(rs_cooked_array == np_cooked_array)
+
+
+def test_cook_frame(array):
+    """test cooking with a frame cache matches cook_np"""
+    threshold = Threshold()
+
+    frame_cooked_array = threshold.cook_frame(array, FrameCache())
+    np_cooked_array = threshold.cook_np(array)
+
+    assert np.all(frame_cooked_array == np_cooked_array)
+
+
+def test_cook_batch(array):
+    """test cooking a stack of frames matches cooking each frame"""
+    threshold = Threshold()
+
+    frames = np.stack([array, array[::-1]]).astype(np.dtype('uint8'))
+
+    cooked_frames = threshold.cook_batch(frames)
+
+    assert cooked_frames.shape == frames.shape
+    assert np.all(cooked_frames[0] == threshold.cook_np(frames[0]))
+    assert np.all(cooked_frames[1] == threshold.cook_np(frames[1]))
+
+
+def test_cook_out(array):
+    """test cooking into a provided buffer"""
+    threshold = Threshold()
+
+    out = np.zeros(array.shape, dtype=np.dtype('uint8'))
+    cooked_array = threshold.cook(array, out=out)
+
+    assert cooked_array is out
+    assert np.all(out == threshold.cook_np(array))
+    assert threshold.backend in ('rust', 'numpy')
+
+
+def test_cook_mask(array):
+    """test the mask of included pixels matches the cooked pixels"""
+    threshold = Threshold()
+
+    mask = threshold.cook_mask(array)
+
+    assert mask.dtype == np.dtype(bool)
+    assert np.all(mask == [[True, True], [False, True]])
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pierogis.ingredients import Dish, Pierogi, Quantize, Recipe, Rotate, Sort, Threshold
+from pierogis.ingredients.tiles import cook_tiles
+
+
+@pytest.fixture
+def array():
+    return np.random.default_rng(0).integers(0, 256, (300, 200, 3), dtype=np.dtype('uint8'))
+
+
+@pytest.mark.parametrize('turns', [0, 1])
+def test_cook_tiles(array, turns, tmp_path):
+    """cooking a tile at a time into a memory mapped file matches cooking the whole frame"""
+    input_path = str(tmp_path / 'input.npy')
+    output_path = str(tmp_path / 'output.npy')
+
+    np.save(input_path, array)
+    pixels = np.load(input_path, mmap_mode='r')
+
+    recipe = Recipe(ingredients=[Threshold(), Sort(rotate=Rotate(turns=turns))])
+
+    # tiles of a few lines
+    assert cook_tiles(recipe, pixels, output_path, threads=2, tile_bytes=array.nbytes // 7)
+    assert np.all(np.load(output_path) == recipe.cook(array))
+
+
+def test_cook_tiles_frame(array, tmp_path):
+    """recipes that need the whole frame aren't cooked in tiles"""
+    output_path = str(tmp_path / 'output.npy')
+
+    assert not cook_tiles(Quantize(), array, output_path)
+    assert not os.path.exists(output_path)
+
+
+def test_serve_to(array, tmp_path):
+    """a dish is served to a .npy path the same as it's served"""
+    output_path = str(tmp_path / 'output.npy')
+    dish = Dish(pierogi=Pierogi(pixels=array), recipe=Recipe(ingredients=[Threshold()]))
+
+    dish.serve_to(output_path)
+
+    assert np.all(np.load(output_path) == dish.serve().pierogi.pixels)
+
+
+@pytest.mark.parametrize('extension', ['.ppm', '.bmp', '.tif'])
+def test_map_raw(array, extension, tmp_path):
+    """uncompressed images are memory mapped in the same orientation as they're decoded"""
+    path = str(tmp_path / ('input' + extension))
+    Image.fromarray(np.rot90(array)).save(path)
+
+    mapped_pixels = Pierogi._map_raw(path)
+
+    assert mapped_pixels is not None
+    assert np.all(mapped_pixels == array)
@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+import pytest
+
+from pierogis.ingredients import Ingredient, Threshold
+from pierogis.ingredients.tuning import Autotuner
+
+
+class Timed(Ingredient):
+    BACKENDS = {
+        'slow': 'cook_slow',
+        'fast': 'cook_fast',
+        'missing': 'cook_missing',
+    }
+
+    def prep(self, **kwargs):
+        self.calls = []
+        self.shapes = []
+
+    def cook_slow(self, pixels):
+        self.calls.append('slow')
+        self.shapes.append(pixels.shape)
+        time.sleep(.01)
+        return pixels
+
+    def cook_fast(self, pixels):
+        self.calls.append('fast')
+        self.shapes.append(pixels.shape)
+        return pixels
+
+    def cook_missing(self, pixels):
+        raise ImportError
+
+
+@pytest.fixture
+def array():
+    return np.zeros((4, 3, 3), dtype=np.dtype('uint8'))
+
+
+def test_cook(array):
+    """the fastest backend is chosen and kept"""
+    autotuner = Autotuner(repeats=1)
+    ingredient = Timed()
+
+    autotuner.cook(ingredient, array)
+
+    assert ingredient.backend == 'fast'
+    assert autotuner.choice(ingredient, array) == 'fast'
+
+    ingredient.calls = []
+    autotuner.cook(ingredient, array)
+
+    assert ingredient.calls == ['fast']
+
+
+def test_cook_shape(array):
+    """backends are timed again for a new shape"""
+    autotuner = Autotuner(repeats=1)
+    ingredient = Timed()
+
+    autotuner.cook(ingredient, array)
+    autotuner.cook(ingredient, np.zeros((2, 2, 3), dtype=np.dtype('uint8')))
+
+    assert len(autotuner) == 2
+
+
+def test_cook_crop():
+    """large frames are timed on a crop and cooked whole once"""
+    autotuner = Autotuner(repeats=2, timing_lines=2)
+    ingredient = Timed()
+    pixels = np.zeros((5, 3, 3), dtype=np.dtype('uint8'))
+
+    cooked_pixels = autotuner.cook(ingredient, pixels)
+
+    assert cooked_pixels.shape == pixels.shape
+    assert ingredient.calls == ['slow', 'slow', 'fast', 'fast', 'fast']
+    assert ingredient.shapes == [(2, 2, 3)] * 4 + [(5, 3, 3)]
+
+
+def test_cook_crop_out():
+    """output arrays are cropped with the pixels for timing"""
+    autotuner = Autotuner(repeats=1, timing_lines=2)
+    threshold = Threshold(lower_threshold=100, upper_threshold=150)
+    pixels = np.random.default_rng(0).integers(0, 256, (5, 3, 3), dtype=np.dtype('uint8'))
+    out = np.empty(pixels.shape, dtype=np.dtype('uint8'))
+
+    autotuner.cook(threshold, pixels, out)
+
+    assert np.all(out == threshold.cook_np(pixels))
+
+
+def test_cook_threshold(array):
+    """threshold reports the backend it cooked with"""
+    threshold = Threshold()
+
+    threshold.cook(array)
+
+    assert threshold.backend in Threshold.BACKENDS
@@ -5,6 +5,18 @@ import numpy as np
 import pytest
 
 from pierogis.kitchen import Kitchen, Chef
+from pierogis.probe import Probe, _probe
+
+
+@pytest.fixture(autouse=True)
+def probe_dir(tmp_path, monkeypatch):
+    """keep frame index files out of the home dir, and probes from leaking between tests"""
+    monkeypatch.setattr(Probe, 'DIR', str(tmp_path / 'probe'))
+    _probe.cache_clear()
+
+    yield
+
+    _probe.cache_clear()
 
 
 @pytest.fixture
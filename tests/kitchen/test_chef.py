@@ -4,7 +4,8 @@ import numpy as np
 import pytest
 from PIL import Image
 
-from pierogis.ingredients import Dish, Pierogi
+from pierogis.ingredients import Crop, Dish, Pierogi, Recipe, RecipeGraph, Resize, Sort
+from pierogis.ingredients.graph import BASE
 from pierogis.kitchen import Chef, menu
 from pierogis.kitchen.ticket import Ticket, PierogiDesc, IngredientDesc
 
@@ -159,3 +160,99 @@ def test_cook_dish_image(chef, image_dish):
     dish = chef.cook_dish(image_dish)
 
     assert dish
+
+
+def test_plan_loading():
+    recipe = Recipe(ingredients=[Crop(width=2, height=2, x=1), Resize(scale=.5), Sort()])
+
+    steps, box, size, resample = Chef.plan_loading(recipe, 4, 3)
+
+    assert steps == 2
+    assert box == (1, 0, 3, 2)
+    assert size == (1, 1)
+
+
+def test_plan_loading_opacity():
+    recipe = Recipe(ingredients=[Resize(scale=.5, opacity=50)])
+
+    steps, box, size, resample = Chef.plan_loading(recipe, 4, 3)
+
+    assert steps == 0
+
+
+def test_assemble_dish_push_down(chef, ticket, array):
+    ticket.ingredients[ticket.recipe[0]].kwargs['scale'] = .5
+
+    dish = chef.assemble_ticket(ticket, menu.menu)
+
+    assert dish.recipe.ingredients == []
+    assert dish.serve().pierogi.pixels.shape == (1, 2, 3)
+
+
+def test_assemble_dish_push_down_referenced(chef, ticket, pierogi_key):
+    """the base pierogi is pushed down even when an ingredient also takes it"""
+    ticket.ingredients[ticket.recipe[0]].kwargs['scale'] = .5
+    ticket.ingredients[ticket.recipe[0]].kwargs['pierogi'] = pierogi_key
+
+    dish = chef.assemble_ticket(ticket, menu.menu)
+
+    assert dish.recipe.ingredients == []
+    assert dish.pierogi.width == 1
+
+
+def test_assemble_dish_preview(chef, ticket):
+    """previews are loaded at a smaller scale and cooked with the recipe's preview"""
+    ticket.preview_scale = .5
+
+    dish = chef.assemble_ticket(ticket, menu.menu)
+
+    assert (dish.pierogi.width, dish.pierogi.height) == (2, 2)
+
+
+def test_assemble_dish_seconds(chef, ticket):
+    """a ticket's time budget is split between the ingredients that cut down their work"""
+    ticket.ingredients[ticket.recipe[0]].type_name = 'sort'
+    ticket.ingredients['first'] = IngredientDesc('quantize', kwargs={})
+    ticket.ingredients['second'] = IngredientDesc('quantize', kwargs={})
+    ticket.recipe = [ticket.recipe[0], 'first', 'second']
+    ticket.seconds = 3
+
+    dish = chef.assemble_ticket(ticket, menu.menu)
+
+    assert [ingredient.seconds for ingredient in dish.recipe.ingredients] == [None, 1.5, 1.5]
+
+
+def test_assemble_dish_graph(chef, ticket, pierogi_key, ingredient_key):
+    """linked tickets are assembled into a graph named by ingredient uuid"""
+    unlinked_hash = ticket.recipe_hash
+
+    ticket.ingredients['threshold'] = IngredientDesc('threshold', kwargs={})
+    ticket.recipe = ['threshold', ingredient_key]
+    ticket.add_link(ingredient_key, pixels=pierogi_key, masks=['threshold'])
+
+    dish = chef.assemble_ticket(ticket, menu.menu)
+
+    assert isinstance(dish.recipe, RecipeGraph)
+    assert dish.recipe.output == ingredient_key
+    assert dish.recipe.nodes[ingredient_key].pixels == BASE
+    assert dish.recipe.nodes[ingredient_key].masks == ['threshold']
+    assert dish.serve().pierogi.pixels.shape == dish.pierogi.pixels.shape
+    assert ticket.recipe_hash != unlinked_hash
+
+
+def test_assemble_dish_graph_preview(chef, ticket, ingredient_key, array, tmp_path):
+    """pierogis used as masks in a graph are loaded at the preview scale too"""
+    mask = np.zeros(array.shape, dtype=np.dtype('uint8'))
+    mask[:2] = 255
+    mask_path = str(tmp_path / 'mask.png')
+    Image.fromarray(mask).save(mask_path)
+
+    ticket.ingredients[ingredient_key].type_name = 'sort'
+    mask_key = ticket.add_pierogi(mask_path, 0)
+    ticket.add_link(ingredient_key, masks=[mask_key])
+    ticket.preview_scale = .5
+
+    dish = chef.assemble_ticket(ticket, menu.menu)
+
+    assert dish.recipe.inputs[mask_key].pixels.shape == dish.pierogi.pixels.shape
+    assert dish.serve().pierogi.pixels.shape == dish.pierogi.pixels.shape
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from pierogis.kitchen import Journal, Kitchen, Chef, Ticket
+from pierogis.kitchen.menu import ResizeFilling
+
+
+@pytest.fixture
+def journal(tmp_path) -> Journal:
+    return Journal(str(tmp_path / '.octo.journal'))
+
+
+@pytest.fixture
+def ticket(image_path, tmp_path) -> Ticket:
+    ticket = ResizeFilling.generate_ticket(Ticket(), image_path, 0, scale=2)
+    ticket.output_path = str(tmp_path / 'cooked.png')
+    ticket.frame_index = 0
+
+    return ticket
+
+
+def test_cook_ticket_records(journal: Journal, ticket: Ticket):
+    Kitchen.cook_ticket(Chef, ticket, journal)
+
+    entries = journal.entries()
+
+    assert os.path.isfile(ticket.output_path)
+    assert entries[ticket.output_path]['frame_index'] == 0
+
+
+def test_is_cooked(journal: Journal, ticket: Ticket, image_path):
+    Kitchen.cook_ticket(Chef, ticket, journal)
+
+    fresh_ticket = ResizeFilling.generate_ticket(Ticket(), image_path, 0, scale=2)
+    fresh_ticket.output_path = ticket.output_path
+
+    assert Journal.is_cooked(fresh_ticket, journal.entries())
+
+
+def test_is_cooked_truncated(journal: Journal, ticket: Ticket):
+    Kitchen.cook_ticket(Chef, ticket, journal)
+
+    with open(ticket.output_path, 'r+b') as output_file:
+        output_file.truncate(10)
+
+    assert not Journal.is_cooked(ticket, journal.entries())
+
+
+def test_is_cooked_stale(journal: Journal, ticket: Ticket, image_path):
+    Kitchen.cook_ticket(Chef, ticket, journal)
+
+    changed_ticket = ResizeFilling.generate_ticket(Ticket(), image_path, 0, scale=3)
+    changed_ticket.output_path = ticket.output_path
+
+    assert not Journal.is_cooked(changed_ticket, journal.entries())
+
+
+def test_is_cooked_time_budget(journal: Journal, ticket: Ticket, image_path):
+    """frames cut down to fit a time budget aren't the full quality output"""
+    ticket.seconds = 1
+    Kitchen.cook_ticket(Chef, ticket, journal)
+
+    full_ticket = ResizeFilling.generate_ticket(Ticket(), image_path, 0, scale=2)
+    full_ticket.output_path = ticket.output_path
+
+    assert not Journal.is_cooked(full_ticket, journal.entries())
+
+
+def test_entries_partial_line(journal: Journal, ticket: Ticket):
+    Kitchen.cook_ticket(Chef, ticket, journal)
+
+    with open(journal.path, 'a') as journal_file:
+        journal_file.write('{"frame_index": 1, "output_pa')
+
+    assert len(journal.entries()) == 1
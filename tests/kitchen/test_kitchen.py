@@ -2,7 +2,8 @@ import os
 
 import pytest
 
-from pierogis.kitchen import Order, Kitchen, Ticket
+from pierogis.kitchen import Journal, Order, Kitchen, Ticket
+from pierogis.probe import probe
 
 
 @pytest.fixture
@@ -51,3 +52,59 @@ def test_plate_webm(kitchen: Kitchen, order: Order, webm_output_path: str):
     )
 
     assert os.path.isfile(output_path)
+
+
+def test_progressive_tickets(kitchen: Kitchen):
+    """every 16th frame is cooked first, then every 8th, and so on"""
+    order = Order('progressive', 'input.mp4')
+
+    for frame_index in range(33):
+        order.add_ticket(Ticket(output_path=str(frame_index)))
+
+    tickets = kitchen._progressive_tickets(order, order.tickets)
+    frame_indices = [int(ticket.output_path) for ticket in tickets]
+
+    assert frame_indices[:5] == [0, 16, 32, 8, 24]
+    assert frame_indices[5:9] == [4, 12, 20, 28]
+    assert sorted(frame_indices) == list(range(33))
+
+
+def test_queue_order_progressive_incremental(kitchen: Kitchen):
+    """frames in progressive order can't be diffed with the frame before them"""
+    order = Order('progressive', 'input.mp4', incremental=True)
+    order.progressive = True
+
+    with pytest.raises(ValueError):
+        kitchen.queue_order(order, lambda *args, **kwargs: None)
+
+
+def test_plate_partial(kitchen: Kitchen, order: Order, mp4_output_path: str, tmp_path):
+    """the evenly spaced frames cooked so far are plated"""
+    order._output_path = mp4_output_path
+
+    order.journal = Journal(str(tmp_path / '.octo.journal'))
+
+    cooked_ticket = order.tickets[0]
+    order.journal.record(0, cooked_ticket.output_path, cooked_ticket.recipe_hash)
+    order.tickets = [cooked_ticket, Ticket(output_path=str(tmp_path / 'uncooked.png'))] * 2
+
+    assert kitchen.cooked_stride(order) == 2
+
+    output_path = kitchen.plate(order, partial=True)
+
+    assert probe(output_path).frames == 2
+
+
+def test_cooked_stride_stale(kitchen: Kitchen, order: Order, tmp_path):
+    """frames left by another run aren't counted as cooked"""
+    order.journal = Journal(str(tmp_path / '.octo.journal'))
+
+    # every frame has an output, but none were cooked by this order
+    assert all(os.path.isfile(ticket.output_path) for ticket in order.tickets)
+    assert kitchen.cooked_stride(order) is None
+
+    # or were cooked with another recipe
+    for frame_index, ticket in enumerate(order.tickets):
+        order.journal.record(frame_index, ticket.output_path, 'another recipe')
+
+    assert kitchen.cooked_stride(order) is None
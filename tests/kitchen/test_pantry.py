@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pytest
+
+from pierogis.ingredients import Pierogi
+from pierogis.kitchen import Pantry
+from pierogis.kitchen.ticket import PierogiDesc
+
+
+@pytest.fixture
+def pantry(tmp_path) -> Pantry:
+    return Pantry(str(tmp_path / 'pantry'))
+
+
+def test_stock(pantry: Pantry, animation_path: str):
+    pantry.stock(animation_path)
+
+    assert pantry.is_stocked(animation_path)
+    assert pantry.frames(animation_path).shape[0] == 2
+
+
+def test_loader(pantry: Pantry, animation_path: str):
+    pantry.stock(animation_path)
+
+    pierogi = Pierogi(loader=pantry.loader(animation_path, 1))
+
+    assert np.all(pierogi.pixels == Pierogi.from_path(animation_path, 1).pixels)
+
+
+def test_pierogi_desc(pantry: Pantry, animation_path: str):
+    pantry.stock(animation_path)
+
+    pierogi_desc = PierogiDesc('files_key', 1, pantry=pantry)
+    pierogi = pierogi_desc.create({'files_key': animation_path})
+
+    assert isinstance(pierogi.pixels.base, np.memmap)
+
+
+def test_restock_modified(pantry: Pantry, image_path: str):
+    pantry.stock(image_path)
+
+    os.utime(image_path, ns=(0, 0))
+
+    assert not pantry.is_stocked(image_path)
+
+
+def test_evict(tmp_path, image_path: str, animation_path: str):
+    pantry = Pantry(str(tmp_path / 'pantry'), max_bytes=1)
+
+    pantry.stock(image_path)
+    pantry.stock(animation_path)
+
+    assert not pantry.is_stocked(image_path)
+    assert pantry.is_stocked(animation_path)
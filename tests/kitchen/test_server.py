@@ -1,11 +1,14 @@
 import os
 from typing import List
 
+import numpy as np
 import pytest
+from PIL import Image
 
 from pierogis.kitchen import Kitchen, Server, Ticket
 from pierogis.kitchen.menu import ResizeFilling
 from pierogis.kitchen.order import Order
+from pierogis.probe import probe
 
 
 @pytest.fixture
@@ -195,6 +198,115 @@ def test_take_order_resume(server, kitchen, animation_path):
     run_take_order(server, kitchen, args)
 
 
+def test_take_order_source_cache(server, kitchen, animation_path, tmp_path):
+    """test decoding frames into a source cache"""
+    args = [
+        "resize", animation_path,
+        "--source-cache", str(tmp_path / 'pantry')
+    ]
+
+    order = run_take_order(server, kitchen, args)
+
+    assert order.pantry.is_stocked(animation_path)
+
+
+def test_take_order_frame_format(server, kitchen, animation_path):
+    """test cooking to uncompressed frames and cleaning presaved frames"""
+    args = [
+        "resize", animation_path,
+        "--presave",
+        "--frame-format", "npy"
+    ]
+
+    order = run_take_order(server, kitchen, args)
+
+    assert all(path.endswith('.npy') for path in order.ticket_output_paths)
+    assert os.listdir(kitchen.raw_dir) == []
+
+
+def test_take_order_batch(server, kitchen, animation_path, monkeypatch):
+    """test small frames cooked in a batch match frames cooked one at a time"""
+    cooked_tickets = []
+    cook_tickets = Kitchen.cook_tickets
+
+    def counted_cook_tickets(cooker, tickets, *args):
+        cooked_tickets.extend(tickets)
+        cook_tickets(cooker, tickets, *args)
+
+    monkeypatch.setattr(Kitchen, 'cook_tickets', staticmethod(counted_cook_tickets))
+
+    args = ["threshold", animation_path, "--frame-format", "npy"]
+
+    batch_order = run_take_order(server, kitchen, args)
+
+    assert len(cooked_tickets) == 2
+
+    monkeypatch.setattr(Kitchen, 'BATCH_PIXELS', 0)
+
+    order = run_take_order(server, kitchen, args)
+
+    for batch_output_path, output_path in zip(
+            batch_order.ticket_output_paths, order.ticket_output_paths
+    ):
+        assert np.all(np.load(batch_output_path) == np.load(output_path))
+
+
+def test_take_order_tiles(server, kitchen, animation_path, monkeypatch):
+    """test large frames cooked a tile at a time match frames cooked whole"""
+    monkeypatch.setattr(Kitchen, 'BATCH_PIXELS', 0)
+
+    args = ["sort", animation_path, "--frame-format", "npy"]
+
+    order = run_take_order(server, kitchen, args)
+    # the outputs are cooked again to the same paths
+    frames = [np.load(output_path) for output_path in order.ticket_output_paths]
+
+    monkeypatch.setattr(Kitchen, 'TILE_PIXELS', 0)
+
+    tiled_order = run_take_order(server, kitchen, args)
+
+    for tiled_output_path, pixels in zip(tiled_order.ticket_output_paths, frames):
+        assert np.all(np.load(tiled_output_path) == pixels)
+
+
+def test_take_order_incremental(server, kitchen, animation_path):
+    """test frames cooked incrementally match frames cooked whole"""
+    args = ["sort", animation_path, "--frame-format", "npy"]
+
+    order = run_take_order(server, kitchen, args)
+    # the outputs are cooked again to the same paths
+    frames = [np.load(output_path) for output_path in order.ticket_output_paths]
+
+    incremental_order = run_take_order(server, kitchen, args + ["--incremental"])
+
+    for incremental_output_path, pixels in zip(incremental_order.ticket_output_paths, frames):
+        assert np.all(np.load(incremental_output_path) == pixels)
+
+
+def test_take_order_dither(server, kitchen, image_path):
+    """test dither order with options"""
+    args = [
+        "dither", image_path,
+        "-c", "000000", "ffffff", "ff0000",
+        "-m", "atkinson"
+    ]
+
+    run_take_order(server, kitchen, args)
+
+
+def test_take_order_dither_gif(server, kitchen, animation_path, tmp_path):
+    """test dithered frames are cooked and plated as palette images"""
+    output_path = str(tmp_path / 'output.gif')
+    args = ["dither", animation_path, "-o", output_path]
+
+    order = run_take_order(server, kitchen, args)
+
+    for ticket_output_path in order.ticket_output_paths:
+        assert Image.open(ticket_output_path).mode == 'P'
+
+    assert Image.open(output_path).format == 'GIF'
+
+
 def test_take_order_custom(server, kitchen, image_path):
     """test custom with a txt file as a recipe"""
     args = ["custom", image_path, "sort; quantize"]
@@ -289,3 +401,62 @@ def test_take_order_animation(server, kitchen, animation_path):
     args = ["resize", animation_path]
 
     run_take_order(server, kitchen, args)
+
+
+def test_take_order_togo_segments(server, kitchen, dir_path, mp4_output_path):
+    """test encoding segments of an animation at the same time"""
+    args = [
+        "togo", dir_path,
+        "--segments", "2",
+        "--output", mp4_output_path,
+    ]
+
+    order = run_take_order(server, kitchen, args)
+
+    assert probe(mp4_output_path).frames == len(order.tickets)
+    # segments are removed once they are joined
+    output_dir = os.path.dirname(mp4_output_path)
+    assert not any(filename.startswith('output.segment') for filename in os.listdir(output_dir))
+
+
+def test_take_order_preview(server, kitchen, animation_path):
+    """test a preview cooks every few frames at a smaller size"""
+    args = ["sort", animation_path, "--preview"]
+
+    order = run_take_order(server, kitchen, args)
+
+    assert order.output_path.endswith('-preview.png')
+    assert len(order.tickets) == 1
+
+    image = Image.open(next(order.ticket_output_paths))
+    assert image.width < probe(animation_path).size[0]
+
+
+def test_take_order_preview_output(server, kitchen, animation_path, png_output_path):
+    """test a preview doesn't overwrite an explicit output path"""
+    args = ["sort", animation_path, "--preview", "-o", png_output_path]
+
+    order = run_take_order(server, kitchen, args)
+
+    base, ext = os.path.splitext(png_output_path)
+    assert order.output_path == base + '-preview' + ext
+    assert os.path.isfile(order.output_path)
+    assert not os.path.isfile(png_output_path)
+
+
+def test_take_order_progressive(server, kitchen, animation_path):
+    """test an order cooked in progressive order"""
+    args = ["sort", animation_path, "--progressive"]
+
+    order = run_take_order(server, kitchen, args)
+
+    assert order.progressive
+
+
+def test_take_order_time_budget(server, kitchen, animation_path):
+    """test the time budget of an order is shared by its tickets"""
+    args = ["sort", animation_path, "--time-budget", "60"]
+
+    order = run_take_order(server, kitchen, args)
+
+    assert all(0 < ticket.seconds <= 60 for ticket in order.tickets)
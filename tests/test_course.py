@@ -0,0 +1,23 @@
+import os
+
+import numpy as np
+
+from pierogis.course import Course
+from pierogis.ingredients import Dish, Pierogi
+from pierogis.probe import Probe
+
+
+def test_save_segments_relative(tmp_path, monkeypatch):
+    """segments are found when the output path is relative to another directory"""
+    monkeypatch.chdir(tmp_path)
+    os.mkdir('sub')
+
+    dishes = [
+        Dish(pierogi=Pierogi(pixels=np.full((16, 16, 3), value * 40, dtype='uint8')))
+        for value in range(6)
+    ]
+
+    Course(dishes=dishes).save(os.path.join('sub', 'out.mp4'), fps=10, segments=3, align=2)
+
+    assert os.listdir('sub') == ['out.mp4']
+    assert Probe(os.path.join('sub', 'out.mp4'), cache_dir=str(tmp_path / 'probe')).frames == 6
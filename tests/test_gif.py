@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pierogis.gif import delta, save_gif
+
+
+@pytest.fixture
+def frames():
+    frames = []
+    frame = np.zeros((24, 32, 3), dtype='uint8')
+    frame[:, 16:] = 255
+
+    for i in range(4):
+        frame = frame.copy()
+        frame[4 + i:8 + i, 4:8] = [255, 0, 0]
+        frames.append(frame)
+
+    return frames
+
+
+def test_delta():
+    palette = np.array([[0, 0, 0], [255, 255, 255], [255, 0, 0]], dtype='uint8')
+    indices = np.zeros((6, 8), dtype='uint8')
+    indices[2:4, 3:6] = 2
+    indices[2, 4] = 0
+
+    box, cropped = delta(np.zeros((6, 8, 3), dtype='uint8'), indices, palette, 3)
+
+    assert box == (3, 2, 6, 4)
+    assert np.all(cropped == [[2, 3, 2], [2, 2, 2]])
+
+
+def test_delta_unchanged():
+    palette = np.array([[0, 0, 0], [255, 255, 255]], dtype='uint8')
+    indices = np.ones((6, 8), dtype='uint8')
+
+    box, _ = delta(palette[indices], indices, palette, 2)
+
+    assert box is None
+
+
+def test_save_gif(frames, tmp_path):
+    output_path = str(tmp_path / 'output.gif')
+    unoptimized_path = str(tmp_path / 'unoptimized.gif')
+
+    images = [Image.fromarray(frame) for frame in frames]
+
+    save_gif(output_path, images, duration=100)
+    save_gif(unoptimized_path, images, duration=100, optimize=False)
+
+    gif = Image.open(output_path)
+
+    assert gif.n_frames == 4
+
+    for i, frame in enumerate(frames):
+        gif.seek(i)
+        assert np.all(np.asarray(gif.convert('RGB')) == frame)
+        assert gif.info['duration'] == 100
+
+    # later frames only hold the box that changed
+    assert os.path.getsize(output_path) < os.path.getsize(unoptimized_path)
+
+
+def test_save_gif_identical(frames, tmp_path):
+    output_path = str(tmp_path / 'output.gif')
+
+    images = [Image.fromarray(frame) for frame in [frames[0], frames[0], frames[1]]]
+
+    save_gif(output_path, images, duration=50)
+
+    gif = Image.open(output_path)
+
+    assert gif.n_frames == 2
+    assert gif.info['duration'] == 100
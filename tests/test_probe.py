@@ -0,0 +1,76 @@
+import os
+
+import imageio
+import numpy as np
+import pytest
+
+from pierogis.ingredients import Pierogi
+from pierogis.probe import Probe
+
+
+@pytest.fixture
+def array():
+    return np.asarray([[[200, 200, 200], [30, 30, 30]],
+                       [[130, 130, 130], [60, 60, 60]]]).astype(np.dtype('uint8'))
+
+
+@pytest.fixture
+def image_path(array, tmp_path):
+    output_path = tmp_path / 'input.png'
+    imageio.imwrite(output_path, array)
+
+    return str(output_path)
+
+
+@pytest.fixture
+def animation_path(tmp_path):
+    output_path = tmp_path / 'input.mp4'
+    frames = [np.full((32, 48, 3), i * 40, dtype='uint8') for i in range(5)]
+    imageio.mimwrite(output_path, ims=frames, fps=10)
+
+    return str(output_path)
+
+
+def test_probe_image(image_path):
+    probe = Probe(image_path)
+
+    assert probe.size == (2, 2)
+    assert probe.frames == 1
+    assert not probe.is_video
+
+
+def test_probe_video(animation_path, tmp_path):
+    probe = Probe(animation_path, cache_dir=str(tmp_path / 'probe'))
+
+    assert probe.size == (48, 32)
+    assert probe.fps == 10
+    assert probe.frames == 5
+    assert probe.is_video
+
+    # the frame index is reused
+    probe = Probe(animation_path, cache_dir=str(tmp_path / 'probe'))
+    assert len(probe.pts) == 5
+
+
+def test_probe_video_evict(animation_path, tmp_path):
+    """the least recently used frame indexes are evicted past max_bytes"""
+    cache_dir = str(tmp_path / 'probe')
+    other_path = str(tmp_path / 'other.mp4')
+    imageio.mimwrite(other_path, ims=[np.zeros((32, 48, 3), dtype='uint8')] * 3, fps=10)
+
+    assert Probe(animation_path, cache_dir=cache_dir, max_bytes=1).frames == 5
+    assert Probe(other_path, cache_dir=cache_dir, max_bytes=1).frames == 3
+
+    # only the index just written is kept
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_seek(animation_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(Probe, 'DIR', str(tmp_path / 'probe'))
+
+    reader = imageio.get_reader(animation_path)
+
+    for frame_index in range(5):
+        pixels = Pierogi.from_path(animation_path, frame_index).pixels
+
+        assert np.all(np.rot90(pixels) == reader.get_data(frame_index))